@@ -0,0 +1,80 @@
+# Benchmark request parsing / validation / serialization on the test client
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_api_json [--requests N]
+#
+# Runs in-process through Flask's test client, so the numbers isolate
+# framework and (de)serialization overhead from network and WSGI server
+# costs. The response cache is disabled so /predict runs the full path.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_PATH", os.path.join(project_root, "model", "flight_delay_model.pkl"))
+
+from src.api import METRICS, app
+
+PAYLOADS = [
+    {"origin": "JFK", "dest": "LAX", "airline": "UA", "dep_time": 800,
+     "arr_time": 1100, "elapsed_time": 360, "distance": 2475},
+    {"origin": "SFO", "dest": "ORD", "airline": "DL", "dep_time": "1730"},
+    {"origin": "ATL", "dest": "DFW", "airline": "AA"},
+]
+
+
+def app_seconds(endpoint: str) -> tuple:
+    """(sum, count) of the in-app request_duration_seconds histogram."""
+    key = ("request_duration_seconds", (("endpoint", endpoint),))
+    _, total, count = METRICS.snapshot()["histograms"].get(key, (None, 0.0, 0))
+    return total, count
+
+
+def run(client, endpoint: str, requests: int) -> dict:
+    """POST the payloads round-robin and time every request."""
+    app_total0, app_count0 = app_seconds(endpoint)
+    bodies = [json.dumps(p) for p in PAYLOADS]
+    latencies = np.empty(requests)
+    start = time.perf_counter()
+    for i in range(requests):
+        t0 = time.perf_counter()
+        response = client.post(endpoint, data=bodies[i % len(bodies)],
+                               content_type="application/json")
+        latencies[i] = time.perf_counter() - t0
+        assert response.status_code == 200, response.data
+    elapsed = time.perf_counter() - start
+    us = latencies * 1e6
+    app_total, app_count = app_seconds(endpoint)
+    return {
+        "rps": requests / elapsed,
+        "app_us": (app_total - app_total0) / (app_count - app_count0) * 1e6,
+        "p50_us": float(np.percentile(us, 50)),
+        "p99_us": float(np.percentile(us, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test-client throughput of /predict and /features")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per endpoint")
+    args = parser.parse_args()
+    
+    client = app.test_client()
+    for endpoint in ("/features", "/predict"):
+        run(client, endpoint, 200)  # warm-up
+        result = run(client, endpoint, args.requests)
+        print(f"{endpoint:<10} {result['rps']:>8.0f} req/s  "
+              f"p50 {result['p50_us']:.0f}us  p99 {result['p99_us']:.0f}us  "
+              f"in-app {result['app_us']:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
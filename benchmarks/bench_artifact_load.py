@@ -0,0 +1,78 @@
+# Benchmark model load time and memory: pickle vs mmap artifact
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_artifact_load [--workers N]
+#
+# Each measurement runs in a fresh interpreter so imports and page cache
+# state do not leak between modes.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PICKLE_PATH = os.path.join(project_root, "model", "flight_delay_model.pkl")
+
+# Runs in the child: import deps first so only the load itself is timed
+CHILD = r"""
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+sys.path.insert(0, {root!r})
+import numpy, sklearn.ensemble, sklearn.preprocessing
+from src.model import FlightDelayModel
+
+
+def memory_kb():
+    fields = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Rss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+
+rss0, private0 = memory_kb()
+start = time.perf_counter()
+model = FlightDelayModel({path!r})
+model.predict([0.0] * len(model.feature_columns))
+elapsed = time.perf_counter() - start
+rss1, private1 = memory_kb()
+print(json.dumps({{"load_ms": elapsed * 1000, "rss_kb": rss1 - rss0, "private_kb": private1 - private0}}))
+"""
+
+
+def measure(path: str) -> dict:
+    """Load the model at path in a child interpreter and report its cost."""
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=project_root, path=path)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pickle and mmap artifact loading")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per mode")
+    args = parser.parse_args()
+    
+    sys.path.insert(0, project_root)
+    import pickle
+    from src.artifact import export_artifact
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(PICKLE_PATH, "rb") as f:
+            export_artifact(pickle.load(f), tmp)
+        
+        print(f"{'format':<14}{'load ms':>10}{'RSS KiB':>10}{'private KiB':>13}")
+        for name, path in [("pickle", PICKLE_PATH), ("mmap artifact", tmp)]:
+            runs = [measure(path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r["load_ms"])
+            print(f"{name:<14}{best['load_ms']:>10.1f}{best['rss_kb']:>10}{best['private_kb']:>13}")
+
+
+if __name__ == "__main__":
+    main()
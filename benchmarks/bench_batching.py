@@ -0,0 +1,84 @@
+# Load test for micro-batched inference
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_batching [--threads N] [--requests N]
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.batching import MicroBatcher
+from src.model import FlightDelayModel
+
+MODEL_PATH = os.path.join(project_root, "model", "flight_delay_model.pkl")
+
+
+def run_load(predict, rows: np.ndarray, threads: int, requests_per_thread: int) -> dict:
+    """Drive predict() from concurrent threads and collect latencies."""
+    latencies = [[] for _ in range(threads)]
+    
+    def worker(t):
+        for i in range(requests_per_thread):
+            row = rows[(t * requests_per_thread + i) % len(rows)]
+            start = time.perf_counter()
+            predict(row)
+            latencies[t].append(time.perf_counter() - start)
+    
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    all_ms = np.concatenate([np.array(lat) for lat in latencies]) * 1000
+    return {
+        "throughput": len(all_ms) / elapsed,
+        "p50_ms": float(np.percentile(all_ms, 50)),
+        "p99_ms": float(np.percentile(all_ms, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test micro-batched inference")
+    parser.add_argument("--threads", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    
+    model = FlightDelayModel(MODEL_PATH)
+    rng = np.random.default_rng(0)
+    rows = np.column_stack([
+        rng.integers(0, 100, 1000), rng.integers(0, 100, 1000), rng.integers(0, 20, 1000),
+        rng.integers(0, 2400, 1000), rng.integers(0, 2400, 1000),
+        rng.integers(30, 400, 1000), rng.integers(100, 3000, 1000)
+    ]).astype(np.float64)
+    
+    batcher = MicroBatcher(model.predict_proba_batch, args.max_batch_size, args.max_wait_ms)
+    modes = [
+        ("unbatched", model.predict_proba),
+        ("micro-batched", batcher.predict)
+    ]
+    
+    print(f"{args.threads} threads x {args.requests} requests")
+    print(f"{'mode':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, predict in modes:
+        result = run_load(predict, rows, args.threads, args.requests)
+        print(f"{name:<16}{result['throughput']:>10.0f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+    
+    stats = batcher.stats()
+    print(f"mean batch size: {stats['mean_batch_size']:.1f} over {stats['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
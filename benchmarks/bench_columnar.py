@@ -0,0 +1,116 @@
+# Benchmark JSON against columnar (.npz) bulk prediction requests
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_columnar [--sizes 1000 100000 1000000]
+#
+# Each batch goes through /predict/batch on Flask's test client in both
+# formats. Reported per format: payload size, client-side encode and
+# decode time, the full request time and the server's per-stage time
+# (parse, features, inference, serialize) from the stage histogram.
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("MAX_BATCH_SIZE", "1000000")
+os.environ.setdefault("MODEL_PATH", os.path.join(project_root, "model", "flight_delay_model.pkl"))
+
+from src.api import COLUMNAR_MIMETYPE, METRICS, app
+from src.columnar import encode_request
+from src.feature_engineering import KNOWN_AIRLINE_CODES, KNOWN_AIRPORT_CODES
+
+STAGES = ("parse", "features", "inference", "serialize")
+
+
+def make_columns(n: int, seed: int = 0) -> dict:
+    """Random flights over the known codes, as request field columns."""
+    rng = np.random.default_rng(seed)
+    return {
+        "origin": rng.choice(KNOWN_AIRPORT_CODES, n),
+        "dest": rng.choice(KNOWN_AIRPORT_CODES, n),
+        "airline": rng.choice(KNOWN_AIRLINE_CODES, n),
+        "dep_time": rng.integers(500, 2300, n).astype(np.float64),
+        "arr_time": rng.integers(0, 2400, n).astype(np.float64),
+        "elapsed_time": rng.integers(60, 400, n).astype(np.float64),
+        "distance": rng.integers(100, 2800, n).astype(np.float64)
+    }
+
+
+def stage_seconds() -> dict:
+    """Running totals of the /predict/batch stage histogram."""
+    histograms = METRICS.snapshot()["histograms"]
+    totals = {}
+    for stage in STAGES:
+        key = ("stage_duration_seconds", (("endpoint", "/predict/batch"), ("stage", stage)))
+        totals[stage] = histograms.get(key, (None, 0.0, 0))[1]
+    return totals
+
+
+def run(client, fmt: str, columns: dict) -> dict:
+    """Encode, send and decode one batch; all times in milliseconds."""
+    t0 = time.perf_counter()
+    if fmt == "json":
+        flights = [dict(zip(columns, values)) for values in zip(*(c.tolist() for c in columns.values()))]
+        body, content_type = json.dumps({"flights": flights}), "application/json"
+    else:
+        body, content_type = encode_request(columns), COLUMNAR_MIMETYPE
+    t1 = time.perf_counter()
+    
+    before = stage_seconds()
+    response = client.post("/predict/batch", data=body, content_type=content_type)
+    t2 = time.perf_counter()
+    after = stage_seconds()
+    assert response.status_code == 200, response.data[:200]
+    
+    if fmt == "json":
+        predictions = [p["prediction"] for p in json.loads(response.data)["predictions"]]
+    else:
+        predictions = np.load(io.BytesIO(response.data))["prediction"]
+    t3 = time.perf_counter()
+    assert len(predictions) == len(columns["origin"])
+    
+    return {
+        "request_bytes": len(body),
+        "response_bytes": len(response.data),
+        "encode_ms": (t1 - t0) * 1e3,
+        "request_ms": (t2 - t1) * 1e3,
+        "decode_ms": (t3 - t2) * 1e3,
+        **{f"{stage}_ms": (after[stage] - before[stage]) * 1e3 for stage in STAGES}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs columnar /predict/batch")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="Rows per batch")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size and format (best kept)")
+    args = parser.parse_args()
+    
+    client = app.test_client()
+    run(client, "npz", make_columns(100))  # warm-up
+    run(client, "json", make_columns(100))
+    
+    print(f"{'rows':>8} {'format':<6}{'req MB':>8}{'resp MB':>8}{'encode':>9}{'request':>9}"
+          f"{'parse':>9}{'features':>9}{'infer':>9}{'serial':>9}{'decode':>9}   (ms)")
+    for n in args.sizes:
+        columns = make_columns(n)
+        for fmt in ("json", "npz"):
+            result = min((run(client, fmt, columns) for _ in range(args.repeat)),
+                         key=lambda r: r["request_ms"])
+            print(f"{n:>8} {fmt:<6}{result['request_bytes'] / 1e6:>8.2f}{result['response_bytes'] / 1e6:>8.2f}"
+                  f"{result['encode_ms']:>9.1f}{result['request_ms']:>9.1f}{result['parse_ms']:>9.1f}"
+                  f"{result['features_ms']:>9.1f}{result['inference_ms']:>9.1f}"
+                  f"{result['serialize_ms']:>9.1f}{result['decode_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
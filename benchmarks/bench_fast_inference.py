@@ -0,0 +1,48 @@
+# Single-row latency: sklearn path vs fused FastInferenceEngine
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_fast_inference [--number N]
+
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model import FlightDelayModel
+
+MODEL_PATH = os.path.join(project_root, "model", "flight_delay_model.pkl")
+
+ROW = [47.0, 33.0, 1.0, 800.0, 1100.0, 360.0, 2475.0]
+
+
+def per_call_us(fn, number: int) -> float:
+    """Best-of-5 per-call time in microseconds."""
+    return min(timeit.Timer(fn).repeat(repeat=5, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-row inference latency")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing run")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+    
+    model = FlightDelayModel(MODEL_PATH)
+    cases = [
+        ("sklearn predict", lambda: int(model.predict_batch([ROW])[0])),
+        ("sklearn predict_proba", lambda: model.predict_proba_batch([ROW])[0]),
+        ("fused predict", lambda: model.engine.predict(ROW)),
+        ("fused predict_proba", lambda: model.engine.predict_proba(ROW))
+    ]
+    
+    print(f"{'path':<24}{'us/call':>10}")
+    for name, fn in cases:
+        print(f"{name:<24}{per_call_us(fn, args.number):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
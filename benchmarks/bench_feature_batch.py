@@ -0,0 +1,66 @@
+# Benchmark for vectorized feature extraction
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_feature_batch [--rows N]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import (
+    extract_features,
+    extract_features_batch,
+    KNOWN_AIRPORT_CODES,
+    KNOWN_AIRLINE_CODES
+)
+
+
+def make_flights(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random flights drawn from the known code lists."""
+    rng = np.random.default_rng(seed)
+    airports = np.array(KNOWN_AIRPORT_CODES, dtype=object)
+    airlines = np.array(KNOWN_AIRLINE_CODES, dtype=object)
+    return pd.DataFrame({
+        "origin": rng.choice(airports, rows),
+        "dest": rng.choice(airports, rows),
+        "airline": rng.choice(airlines, rows)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_features_batch")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of flights")
+    args = parser.parse_args()
+    
+    df = make_flights(args.rows)
+    
+    start = time.perf_counter()
+    rowwise = [
+        extract_features(o, d, a)
+        for o, d, a in zip(df["origin"], df["dest"], df["airline"])
+    ]
+    rowwise_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batch = extract_features_batch(df)
+    batch_s = time.perf_counter() - start
+    
+    expected = np.array([list(f.values()) for f in rowwise], dtype=np.int32)
+    assert np.array_equal(batch, expected), "batch output differs from extract_features"
+    
+    print(f"rows: {args.rows:,}")
+    print(f"row-by-row extract_features: {rowwise_s:8.3f} s ({args.rows / rowwise_s:,.0f} rows/s)")
+    print(f"extract_features_batch:      {batch_s:8.3f} s ({args.rows / batch_s:,.0f} rows/s)")
+    print(f"speedup: {rowwise_s / batch_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
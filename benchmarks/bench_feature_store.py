@@ -0,0 +1,67 @@
+# Benchmark for the route feature store: lookup latency and memory
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_feature_store [--routes N] [--number N]
+
+import argparse
+import itertools
+import os
+import sys
+import timeit
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import KNOWN_AIRLINE_CODES, KNOWN_AIRPORT_CODES, extract_features
+from src.feature_store import RouteFeatureStore
+
+
+def make_routes(count: int) -> list:
+    """The first count (origin, dest, airline) routes over the known codes."""
+    routes = (
+        (origin, dest, airline)
+        for origin, dest in itertools.permutations(KNOWN_AIRPORT_CODES, 2)
+        for airline in KNOWN_AIRLINE_CODES
+    )
+    return list(itertools.islice(routes, count))
+
+
+def per_call_ns(fn, *args, number: int) -> float:
+    """Best-of-5 per-call time in nanoseconds."""
+    timer = timeit.Timer(lambda: fn(*args))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the route feature store")
+    parser.add_argument("--routes", type=int, default=5000, help="Routes to precompute")
+    parser.add_argument("--number", type=int, default=200000, help="Calls per timing run")
+    args = parser.parse_args()
+    
+    routes = make_routes(args.routes)
+    timer = timeit.default_timer()
+    store = RouteFeatureStore(routes)
+    build_ms = (timeit.default_timer() - timer) * 1000
+    memory = store.memory_bytes()
+    print(f"{len(store)} routes built in {build_ms:.1f} ms")
+    print(f"memory: table {memory['table']} B, index {memory['index']} B, "
+          f"total {memory['total'] / 1024:.1f} KiB ({memory['total'] / len(store):.0f} B/route)")
+    print()
+    
+    known = routes[len(routes) // 2]
+    unknown = ("ZZZ", "QQQ", "Q9")
+    cases = [
+        ("live, known codes", extract_features, known),
+        ("live, unknown codes (LRU)", extract_features, unknown),
+        ("store hit", store.lookup, known),
+        ("store miss (live fallback)", store.lookup, unknown),
+    ]
+    
+    print(f"{'case':<30}{'ns/call':>10}")
+    for name, fn, route in cases:
+        print(f"{name:<30}{per_call_ns(fn, *route, number=args.number):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
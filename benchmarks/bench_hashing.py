@@ -0,0 +1,134 @@
+# Micro-benchmark for airport/airline code hashing
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_hashing [--number N] [--codes FILE]
+#
+# Times each hash scheme per call and over a bulk set of distinct codes,
+# then reports how evenly each scheme spreads real code lists over the
+# model's buckets.
+
+import argparse
+import hashlib
+import itertools
+import os
+import string
+import sys
+import timeit
+from collections import Counter
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import (
+    HASH_BUCKETS,
+    HASH_SCHEMES,
+    KNOWN_AIRLINE_CODES,
+    KNOWN_AIRPORT_CODES,
+    hash_airline_code,
+    hash_airport_code
+)
+
+
+def legacy_hash(code: str, num_buckets: int = 100) -> int:
+    """Original implementation: hexdigest string parsed back into an int."""
+    if not code or not isinstance(code, str):
+        return 0
+    hashed = hashlib.md5(code.encode("utf-8")).hexdigest()
+    return int(hashed, 16) % num_buckets
+
+
+def per_call_ns(fn, *args, number: int) -> float:
+    """Best-of-5 per-call time in nanoseconds."""
+    timer = timeit.Timer(lambda: fn(*args))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def bulk_ms(bucket_fn, codes: list, num_buckets: int) -> float:
+    """Best-of-5 time in milliseconds to bucket every code once, uncached."""
+    timer = timeit.Timer(lambda: [bucket_fn(code, num_buckets) for code in codes])
+    return min(timer.repeat(repeat=5, number=1)) * 1e3
+
+
+def read_codes(path: str) -> list:
+    """Distinct codes from a file, one per line (first CSV column)."""
+    with open(path) as f:
+        codes = (line.split(",")[0].strip() for line in f)
+        return sorted({code for code in codes if code})
+
+
+def balance(bucket_fn, codes: list, num_buckets: int) -> dict:
+    """
+    How evenly a bucket function spreads codes.
+    
+    Args:
+        bucket_fn: (code, num_buckets) -> bucket
+        codes: Distinct codes
+        num_buckets: Bucket count
+    
+    Returns:
+        Dictionary with occupied buckets, max load, collisions (codes
+        sharing a bucket with an earlier one), the collisions expected
+        from a uniformly random hash, and the chi-square statistic of
+        the bucket loads against uniform (about num_buckets - 1 if even)
+    """
+    n, m = len(codes), num_buckets
+    loads = Counter(bucket_fn(code, m) for code in codes)
+    expected_load = n / m
+    return {
+        "occupied": len(loads),
+        "max_load": max(loads.values()),
+        "collisions": n - len(loads),
+        "expected_collisions": n - m * (1 - (1 - 1 / m) ** n),
+        "chi_square": sum((loads.get(b, 0) - expected_load) ** 2 for b in range(m)) / expected_load
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark for code hashing")
+    parser.add_argument("--number", type=int, default=200000, help="Calls per timing run")
+    parser.add_argument("--codes", default=None,
+                        help="Extra airport code list (one code per line) for the balance report")
+    args = parser.parse_args()
+    
+    cases = [
+        ("legacy md5 hexdigest", legacy_hash, "JFK", 100),
+        *((f"{name} (uncached)", fn, "JFK", 100) for name, fn in HASH_SCHEMES.items()),
+        ("known airport (index)", hash_airport_code, "JFK", 100),
+        ("known airline (index)", hash_airline_code, "UA", 20),
+        ("unknown code (LRU hit)", hash_airport_code, "ZZZ", 100),
+    ]
+    
+    print(f"{'case':<26}{'ns/call':>10}")
+    for name, fn, code, buckets in cases:
+        print(f"{name:<26}{per_call_ns(fn, code, buckets, number=args.number):>10.0f}")
+    
+    # Every three-letter code: what a cold cache or bulk scoring pays
+    all_codes = ["".join(c) for c in itertools.product(string.ascii_uppercase, repeat=3)]
+    print(f"\nBucketing all {len(all_codes)} three-letter codes (no cache)")
+    print(f"{'scheme':<10}{'ms':>10}{'ns/code':>10}")
+    for name, fn in HASH_SCHEMES.items():
+        ms = bulk_ms(fn, all_codes, HASH_BUCKETS['origin'])
+        print(f"{name:<10}{ms:>10.2f}{ms * 1e6 / len(all_codes):>10.0f}")
+    
+    code_lists = [
+        ("airports", list(KNOWN_AIRPORT_CODES), HASH_BUCKETS['origin']),
+        ("airlines", list(KNOWN_AIRLINE_CODES), HASH_BUCKETS['airline']),
+        ("3-letter", all_codes, HASH_BUCKETS['origin']),
+    ]
+    if args.codes:
+        code_lists.insert(2, (os.path.basename(args.codes), read_codes(args.codes), HASH_BUCKETS['origin']))
+    
+    print("\nBucket balance")
+    print(f"{'codes':<14}{'n':>6}{'buckets':>8}{'scheme':>8}{'occupied':>10}"
+          f"{'max load':>10}{'collisions':>12}{'expected':>10}{'chi2':>10}")
+    for label, codes, buckets in code_lists:
+        for name, fn in HASH_SCHEMES.items():
+            stats = balance(fn, codes, buckets)
+            print(f"{label:<14}{len(codes):>6}{buckets:>8}{name:>8}{stats['occupied']:>10}"
+                  f"{stats['max_load']:>10}{stats['collisions']:>12}"
+                  f"{stats['expected_collisions']:>10.1f}{stats['chi_square']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
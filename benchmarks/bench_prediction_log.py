@@ -0,0 +1,111 @@
+# Benchmark the request-path cost of the prediction log
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_prediction_log [--calls N] [--requests N]
+#
+# Part 1 times PredictionLogger.log() itself while the writer thread
+# flushes in the background (plain and gzip files). Part 2 compares
+# /predict latency on Flask's test client with logging off and on. The
+# response cache is disabled so every request runs the full path.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_PATH", os.path.join(project_root, "model", "flight_delay_model.pkl"))
+
+import src.api
+from src.api import app
+from src.prediction_log import PredictionLogger
+
+RECORD = {
+    "ts": 1760000000.0, "endpoint": "/predict", "model_version": "3e86db2c744b",
+    "origin": "JFK", "dest": "LAX", "airline": "UA", "dep_time": 800.0, "arr_time": 1100.0,
+    "elapsed_time": 360.0, "distance": 2475.0, "origin_hash": 47, "dest_hash": 33,
+    "airline_hash": 1, "prediction": 0
+}
+
+PAYLOAD = {"origin": "JFK", "dest": "LAX", "airline": "UA", "dep_time": 800, "distance": 2475}
+
+
+def percentiles(seconds: np.ndarray, scale: float) -> str:
+    """p50/p99/p99.9 of a latency sample in the given unit."""
+    p50, p99, p999 = np.percentile(seconds * scale, [50, 99, 99.9])
+    return f"p50 {p50:>7.0f}  p99 {p99:>7.0f}  p99.9 {p999:>7.0f}"
+
+
+def bench_log_calls(calls: int, compress: bool) -> tuple:
+    """Per-call latency of log() and the writer's throughput."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log = PredictionLogger(tmpdir, capacity=calls, compress=compress)
+        latencies = np.empty(calls)
+        start = time.perf_counter()
+        for i in range(calls):
+            t0 = time.perf_counter()
+            log.log(dict(RECORD))
+            latencies[i] = time.perf_counter() - t0
+        log.close(timeout=60)
+        elapsed = time.perf_counter() - start
+        stats = log.stats()
+    return latencies, stats, elapsed
+
+
+def bench_predict(client, requests: int) -> np.ndarray:
+    """Latency of /predict requests through the test client."""
+    body = json.dumps(PAYLOAD)
+    latencies = np.empty(requests)
+    for i in range(requests):
+        t0 = time.perf_counter()
+        response = client.post("/predict", data=body, content_type="application/json")
+        latencies[i] = time.perf_counter() - t0
+        assert response.status_code == 200, response.data
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request-path cost of the prediction log")
+    parser.add_argument("--calls", type=int, default=200000, help="log() calls per configuration")
+    parser.add_argument("--requests", type=int, default=5000, help="/predict requests per configuration")
+    args = parser.parse_args()
+    
+    print("log() call latency (ns), writer flushing concurrently")
+    for compress in (False, True):
+        latencies, stats, elapsed = bench_log_calls(args.calls, compress)
+        print(f"  {'gzip' if compress else 'plain':<6}{percentiles(latencies, 1e9)}  "
+              f"flushed {stats['flushed']} dropped {stats['dropped']} "
+              f"({stats['flushed'] / elapsed:,.0f} records/s end to end)")
+    
+    client = app.test_client()
+    bench_predict(client, 200)  # warm-up
+    print("\n/predict latency (us)")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs = [
+            ("off", None),
+            ("plain", PredictionLogger(tmpdir)),
+            ("gzip", PredictionLogger(tmpdir, compress=True))
+        ]
+        # Interleave rounds so drift affects every configuration alike
+        samples = {name: [] for name, _ in configs}
+        for _ in range(5):
+            for name, log in configs:
+                with mock.patch.object(src.api, "prediction_log", log):
+                    samples[name].append(bench_predict(client, args.requests // 5))
+        for name, log in configs:
+            if log is not None:
+                log.close()
+            print(f"  {name:<6}{percentiles(np.concatenate(samples[name]), 1e6)}")
+
+
+if __name__ == "__main__":
+    main()
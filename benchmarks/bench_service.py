@@ -0,0 +1,366 @@
+# Load Test and Latency Benchmark Suite
+# MLOps HW2 - Efe Çetin
+#
+# Usage:
+#   python -m benchmarks.bench_service                                 # Flask test client
+#   python -m benchmarks.bench_service --mode http --url http://localhost:8080
+#   python -m benchmarks.bench_service --mode http --spawn --workers 2  # start gunicorn here
+#   python -m benchmarks.bench_service --output after.json --baseline before.json --threshold 0.1
+#
+# Every scenario is driven by --concurrency threads that share a request
+# budget. Results (RPS, p50/p95/p99 latency) are printed, optionally saved
+# as JSON, and compared against a baseline file; the exit status is 1 when
+# any scenario regressed by more than the threshold.
+# --repeat N runs each scenario N times and keeps the median-RPS run.
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import KNOWN_AIRLINE_CODES, KNOWN_AIRPORT_CODES
+
+# Flights per request for the batch / stream scenarios
+BATCH_FLIGHTS = 100
+
+DEFAULT_SCENARIOS = ("predict", "features", "predict_batch", "predict_stream")
+
+
+def make_flights(n: int, seed: int = 0) -> List[dict]:
+    """Reproducible request payloads over known airports and airlines."""
+    rng = np.random.default_rng(seed)
+    airports = sorted(KNOWN_AIRPORT_CODES)
+    airlines = sorted(KNOWN_AIRLINE_CODES)
+    flights = []
+    for _ in range(n):
+        origin, dest = rng.choice(airports, 2, replace=False)
+        dep = int(rng.integers(0, 24)) * 100 + int(rng.integers(0, 60))
+        flights.append({
+            "origin": str(origin), "dest": str(dest), "airline": str(rng.choice(airlines)),
+            "dep_time": dep, "arr_time": (dep + 300) % 2400,
+            "elapsed_time": int(rng.integers(45, 400)), "distance": int(rng.integers(100, 3000))
+        })
+    return flights
+
+
+def build_scenarios(flights: List[dict]) -> Dict[str, dict]:
+    """
+    Request bodies for every scenario.
+    
+    Returns:
+        Mapping of scenario name to path, content_type, bodies (list of
+        bytes, used round-robin) and rows (flights per request)
+    """
+    single = [json.dumps(f).encode() for f in flights]
+    batches = [
+        flights[i:i + BATCH_FLIGHTS] for i in range(0, len(flights), BATCH_FLIGHTS)
+    ] or [flights]
+    return {
+        "predict": {"path": "/predict", "content_type": "application/json",
+                    "bodies": single, "rows": 1},
+        "features": {"path": "/features", "content_type": "application/json",
+                     "bodies": single, "rows": 1},
+        "predict_batch": {"path": "/predict/batch", "content_type": "application/json",
+                          "bodies": [json.dumps({"flights": b}).encode() for b in batches],
+                          "rows": BATCH_FLIGHTS},
+        "predict_stream": {"path": "/predict/stream", "content_type": "application/x-ndjson",
+                           "bodies": ["".join(json.dumps(f) + "\n" for f in b).encode() for b in batches],
+                           "rows": BATCH_FLIGHTS},
+    }
+
+
+def flask_client_transport() -> Callable[[], Callable]:
+    """Per-thread poster backed by the Flask test client (in-process)."""
+    from src.api import app
+    
+    def make():
+        client = app.test_client()
+        
+        def post(path: str, body: bytes, content_type: str) -> int:
+            response = client.post(path, data=body, content_type=content_type)
+            response.get_data()
+            return response.status_code
+        return post
+    return make
+
+
+def http_transport(base_url: str, timeout: float) -> Callable[[], Callable]:
+    """Per-thread poster using a keep-alive requests.Session."""
+    import requests
+    
+    def make():
+        session = requests.Session()
+        
+        def post(path: str, body: bytes, content_type: str) -> int:
+            response = session.post(
+                base_url + path, data=body, headers={"Content-Type": content_type}, timeout=timeout
+            )
+            return response.status_code
+        return post
+    return make
+
+
+def run_scenario(make_post: Callable, scenario: dict, concurrency: int,
+                 requests: int, warmup: int) -> dict:
+    """
+    Drive one scenario from `concurrency` threads.
+    
+    Args:
+        make_post: Factory returning a post(path, body, content_type) -> status
+            callable for one thread
+        scenario: Entry from build_scenarios
+        concurrency: Client threads
+        requests: Measured requests across all threads
+        warmup: Unmeasured requests sent first from one thread
+    
+    Returns:
+        Dictionary with requests, errors, rps, rows_per_second and
+        mean/p50/p95/p99 latency in milliseconds
+    
+    Raises:
+        ValueError: If requests or concurrency is below 1
+    """
+    if requests < 1 or concurrency < 1:
+        raise ValueError("requests and concurrency must be at least 1")
+    path, content_type, bodies = scenario["path"], scenario["content_type"], scenario["bodies"]
+    
+    post = make_post()
+    for i in range(warmup):
+        post(path, bodies[i % len(bodies)], content_type)
+    
+    tickets = itertools.count()
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    
+    def worker(t: int):
+        post = make_post()
+        while True:
+            i = next(tickets)
+            if i >= requests:
+                return
+            body = bodies[i % len(bodies)]
+            start = time.perf_counter()
+            try:
+                ok = post(path, body, content_type) == 200
+            except Exception:
+                ok = False
+            latencies[t].append(time.perf_counter() - start)
+            if not ok:
+                errors[t] += 1
+    
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    ms = np.concatenate([np.array(lat) for lat in latencies]) * 1000
+    return {
+        "requests": int(len(ms)),
+        "errors": int(sum(errors)),
+        "seconds": elapsed,
+        "rps": len(ms) / elapsed,
+        "rows_per_second": len(ms) * scenario["rows"] / elapsed,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99))
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Find scenarios that got slower than the baseline.
+    
+    A scenario regresses when its RPS drops, or its p99 latency rises, by
+    more than `threshold` (a fraction, e.g. 0.1 for 10%). Scenarios present
+    in only one of the two runs are ignored.
+    
+    Args:
+        current: Output of this run (the saved JSON document)
+        baseline: A previously saved JSON document
+        threshold: Allowed relative change
+    
+    Returns:
+        One human-readable line per regression (empty if none)
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: rps {base['rps']:.0f} -> {result['rps']:.0f} "
+                f"({result['rps'] / base['rps'] - 1:+.1%})"
+            )
+        if result["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p99 {base['p99_ms']:.2f}ms -> {result['p99_ms']:.2f}ms "
+                f"({result['p99_ms'] / base['p99_ms'] - 1:+.1%})"
+            )
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    """Current commit hash, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _free_port() -> int:
+    """An unused local TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(workers: int, threads: int, startup_timeout: float = 60.0):
+    """
+    Start gunicorn with the production config on a free port.
+    
+    Returns:
+        (process, base_url) once /health answers 200
+    """
+    import requests
+    
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), LOG_LEVEL="warning")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "python:src.gunicorn_config", "src.api:app"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            if requests.get(base_url + "/health", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become healthy in time")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the flight delay API")
+    parser.add_argument("--mode", choices=("testclient", "http"), default="testclient")
+    parser.add_argument("--url", default="http://localhost:8080", help="Server for --mode http")
+    parser.add_argument("--spawn", action="store_true", help="Start gunicorn locally for --mode http")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers with --spawn")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker with --spawn")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help="Comma-separated subset of " + ", ".join(DEFAULT_SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per scenario")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per scenario; the median-RPS run is kept")
+    parser.add_argument("--payloads", type=int, default=1000, help="Distinct flights to cycle through")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout (http)")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed RPS drop / p99 increase vs baseline (fraction)")
+    args = parser.parse_args(argv)
+    
+    for option in ("requests", "concurrency", "payloads"):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option} must be at least 1")
+    
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    scenarios = build_scenarios(make_flights(args.payloads))
+    unknown = [n for n in names if n not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    
+    server = None
+    base_url = args.url
+    if args.mode == "http" and args.spawn:
+        server, base_url = spawn_server(args.workers, args.threads)
+    make_post = (
+        http_transport(base_url, args.timeout) if args.mode == "http" else flask_client_transport()
+    )
+    
+    results = {}
+    try:
+        print(f"mode={args.mode} concurrency={args.concurrency} requests={args.requests}")
+        print(f"{'scenario':<16}{'rps':>10}{'rows/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for name in names:
+            runs = sorted(
+                (run_scenario(make_post, scenarios[name], args.concurrency, args.requests, args.warmup)
+                 for _ in range(max(args.repeat, 1))),
+                key=lambda run: run["rps"]
+            )
+            r = results[name] = runs[len(runs) // 2]
+            print(f"{name:<16}{r['rps']:>10.0f}{r['rows_per_second']:>11.0f}{r['p50_ms']:>9.2f}"
+                  f"{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['errors']:>8}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+    
+    document = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "mode": args.mode, "concurrency": args.concurrency, "requests": args.requests,
+            "repeat": args.repeat,
+            "payloads": args.payloads, "workers": args.workers if args.spawn else None,
+            "threads": args.threads if args.spawn else None
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved results to {args.output}")
+    
+    failed = any(r["errors"] for r in results.values())
+    if failed:
+        print("FAIL: some requests returned errors")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("mode") != args.mode:
+            print("Warning: baseline was recorded in a different mode")
+        regressions = compare_results(document, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            failed = True
+        else:
+            print(f"No regressions beyond {args.threshold:.0%} vs {args.baseline}")
+    
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Benchmark the request-path cost of shadow scoring
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_shadow [--requests N] [--batch N]
+#
+# /predict and /predict/batch latency on Flask's test client with no
+# candidate, and with one candidate (a second copy of the bundle) at
+# shadow sample rates 0.1 and 1.0. Rounds are interleaved so drift
+# affects every configuration alike; the response cache is disabled.
+
+import argparse
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_PATH", os.path.join(project_root, "model", "flight_delay_model.pkl"))
+
+import src.api
+from src.api import app
+from src.feature_engineering import KNOWN_AIRLINE_CODES, KNOWN_AIRPORT_CODES
+from src.model import FlightDelayModel
+from src.registry import ModelRegistry
+
+ROUNDS = 5
+
+
+def make_flights(n: int, seed: int = 0) -> list:
+    """Random flights over the known codes."""
+    rng = np.random.default_rng(seed)
+    return [
+        {"origin": str(rng.choice(KNOWN_AIRPORT_CODES)), "dest": str(rng.choice(KNOWN_AIRPORT_CODES)),
+         "airline": str(rng.choice(KNOWN_AIRLINE_CODES)), "dep_time": int(rng.integers(500, 2300)),
+         "distance": int(rng.integers(100, 2800))}
+        for _ in range(n)
+    ]
+
+
+def make_registry(rate: float, candidate: bool) -> ModelRegistry:
+    """Registry with the serving model as primary and optionally one candidate."""
+    registry = ModelRegistry(rate)
+    registry.register("primary", src.api._model)
+    if candidate:
+        model = FlightDelayModel(src.api.model_reloader.model_path)
+        model.warm_up()
+        registry.register("candidate", model)
+    return registry
+
+
+def bench(client, path: str, bodies: list) -> np.ndarray:
+    """Latency of one POST per body through the test client."""
+    latencies = np.empty(len(bodies))
+    for i, body in enumerate(bodies):
+        t0 = time.perf_counter()
+        response = client.post(path, data=body, content_type="application/json")
+        latencies[i] = time.perf_counter() - t0
+        assert response.status_code == 200, response.data
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request-path cost of shadow scoring")
+    parser.add_argument("--requests", type=int, default=5000, help="/predict requests per configuration")
+    parser.add_argument("--batch", type=int, default=100, help="Flights per /predict/batch request")
+    args = parser.parse_args()
+    
+    flights = make_flights(args.requests)
+    single = [json.dumps(f) for f in flights]
+    batches = [json.dumps(flights[i:i + args.batch])
+               for i in range(0, len(flights), args.batch)]
+    
+    client = app.test_client()
+    bench(client, "/predict", single[:200])  # warm-up
+    
+    for path, bodies, scale, unit in (("/predict", single, 1e6, "us"),
+                                      ("/predict/batch", batches, 1e3, "ms")):
+        configs = [
+            ("off", make_registry(0.0, False)),
+            ("rate 0.1", make_registry(0.1, True)),
+            ("rate 1.0", make_registry(1.0, True))
+        ]
+        samples = {name: [] for name, _ in configs}
+        per_round = max(1, len(bodies) // ROUNDS)
+        for r in range(ROUNDS):
+            for name, registry in configs:
+                with mock.patch.object(src.api, "registry", registry):
+                    samples[name].append(bench(client, path, bodies[r * per_round:(r + 1) * per_round]))
+                    # Let the shadow thread catch up outside the timed window
+                    registry.drain()
+        
+        print(f"\n{path} latency ({unit})")
+        for name, registry in configs:
+            p50, p99 = np.percentile(np.concatenate(samples[name]) * scale, [50, 99])
+            stats = registry.stats()
+            candidate = stats["models"].get("candidate", {})
+            print(f"  {name:<9}p50 {p50:>8.1f}  p99 {p99:>8.1f}  "
+                  f"shadowed {stats['shadow_requests']:>5} dropped {stats['shadow_dropped']:>4}  "
+                  f"agreement {candidate.get('agreement_rate')}")
+
+
+if __name__ == "__main__":
+    main()
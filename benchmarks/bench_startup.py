@@ -0,0 +1,82 @@
+# Benchmark cold start: imports, model load and time to first response
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m benchmarks.bench_startup [--repeat N]
+#
+# Each scenario runs in a fresh interpreter; the time reported is from
+# just before the first project import until the scenario finished.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PICKLE_PATH = os.path.join(project_root, "model", "flight_delay_model.pkl")
+
+# Child body per scenario; runs after `start` is taken
+SCENARIOS = {
+    "import feature_engineering": "import src.feature_engineering",
+    "api ready, eager (pickle)": "import src.api",
+    "api ready, eager (artifact)": "import src.api",
+    "first /features, background": (
+        "import src.api\n"
+        "r = src.api.app.test_client().post('/features', json={'origin': 'JFK', 'dest': 'LAX', 'airline': 'UA'})\n"
+        "assert r.status_code == 200"
+    ),
+}
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+{body}
+elapsed = time.perf_counter() - start
+loaded = [m for m in ("numpy", "pandas", "sklearn", "flask") if m in sys.modules]
+report = {{}}
+if "src.api" in sys.modules:
+    report = sys.modules["src.api"].startup_report()["phases"]
+print(json.dumps({{"ms": elapsed * 1000, "loaded": loaded, "phases": report}}))
+"""
+
+
+def measure(body: str, env: dict) -> dict:
+    """Run one scenario in a child interpreter."""
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=project_root, body=body)],
+        check=True, capture_output=True, text=True, env={**os.environ, "LOG_LEVEL": "WARNING", **env}
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark service cold start")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per scenario")
+    args = parser.parse_args()
+    
+    sys.path.insert(0, project_root)
+    import pickle
+    from src.artifact import export_artifact
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(PICKLE_PATH, "rb") as f:
+            export_artifact(pickle.load(f), tmp)
+        envs = {
+            "api ready, eager (artifact)": {"MODEL_PATH": tmp},
+            "first /features, background": {"MODEL_LOAD_MODE": "background"},
+        }
+        
+        print(f"{'scenario':<30}{'median ms':>10}  modules loaded / phases (ms)")
+        for name, body in SCENARIOS.items():
+            runs = [measure(body, envs.get(name, {})) for _ in range(args.repeat)]
+            median = statistics.median(r["ms"] for r in runs)
+            last = runs[-1]
+            phases = " ".join(f"{k}={v * 1000:.0f}" for k, v in last["phases"].items())
+            print(f"{name:<30}{median:>10.1f}  {','.join(last['loaded']) or '-'} {phases}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,735 @@
 # Flask API for Flight Delay Prediction
 # MLOps HW2 - Efe Çetin
 
-from flask import Flask, request, jsonify
-import os
-import sys
+import time
+
+# Start of the "imports" phase in the startup report
+_import_start = time.perf_counter()
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+import hmac
+import io
+import logging
+import marshal
+import os
+import threading
+from typing import Optional
 
 from src.feature_engineering import (
-    hash_airport_code,
-    hash_airline_code,
-    extract_features
+    DELAY_LABELS,
+    FEATURE_NAMES,
+    extract_features,
+    build_feature_vector
+)
+from src.feature_store import DEFAULT_MAX_ROUTES, RouteFeatureStore
+from src.json_provider import OrjsonProvider, dumps as json_dumps, loads as json_loads
+from src.model import FlightDelayModel, ModelReloader, get_model, model_path, set_model
+from src.schema import NUMERIC_FIELDS, ROUTE_FIELDS, ValidationError, parse_flight
+from src.batching import MicroBatcher
+from src.cache import PredictionCache
+from src.metrics import BATCH_SIZE_BUCKETS, MetricsRegistry, StageTimer
+from src.prediction_log import PredictionLogger
+from src.profiling import RequestProfiler
+from src.registry import ModelRegistry
+
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
 )
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# orjson-backed jsonify() / get_json() when orjson is installed
+app.json = OrjsonProvider(app)
+
+# Upper bound on flights accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 10000))
+
+# Content type of columnar (.npz) /predict/batch requests and responses,
+# and the most rows one may hold
+COLUMNAR_MIMETYPE = "application/x-npz"
+MAX_COLUMNAR_BATCH_SIZE = int(os.environ.get("MAX_COLUMNAR_BATCH_SIZE", 1000000))
+
+# Rows scored per model call by /predict/stream
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 1000))
+STREAM_READ_BUFFER = 64 * 1024
+
+# Micro-batching of concurrent /predict calls (useful with GUNICORN_THREADS > 1)
+BATCHING_ENABLED = os.environ.get("BATCHING_ENABLED", "0") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 2.0))
+
+# /predict response cache; PREDICTION_CACHE_SIZE=0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 300))
+
+# Seconds between MODEL_PATH change checks (0 disables the watcher)
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", 0))
+
+# Route list CSV (origin,dest,airline) to precompute features for (unset: none)
+FEATURE_STORE_PATH = os.environ.get("FEATURE_STORE_PATH")
+# Add routes missing from the store on first use, up to FEATURE_STORE_MAX_ROUTES
+FEATURE_STORE_INSERT = os.environ.get("FEATURE_STORE_INSERT", "0") == "1"
+FEATURE_STORE_MAX_ROUTES = int(os.environ.get("FEATURE_STORE_MAX_ROUTES", DEFAULT_MAX_ROUTES))
+
+# Fraction of prediction requests run under cProfile (0 disables profiling)
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+# Directory for per-worker .prof dumps every PROFILE_DUMP_INTERVAL seconds
+PROFILE_DUMP_DIR = os.environ.get("PROFILE_DUMP_DIR")
+PROFILE_DUMP_INTERVAL = float(os.environ.get("PROFILE_DUMP_INTERVAL", 60))
+
+# Directory for the JSONL prediction log (unset disables logging)
+PREDICTION_LOG_DIR = os.environ.get("PREDICTION_LOG_DIR")
+PREDICTION_LOG_BUFFER = int(os.environ.get("PREDICTION_LOG_BUFFER", 10000))
+# "drop" or "block" (up to PREDICTION_LOG_BLOCK_TIMEOUT seconds) when the buffer is full
+PREDICTION_LOG_POLICY = os.environ.get("PREDICTION_LOG_POLICY", "drop").lower()
+PREDICTION_LOG_BLOCK_TIMEOUT = float(os.environ.get("PREDICTION_LOG_BLOCK_TIMEOUT", 1.0))
+PREDICTION_LOG_FLUSH_INTERVAL = float(os.environ.get("PREDICTION_LOG_FLUSH_INTERVAL", 1.0))
+PREDICTION_LOG_MAX_BYTES = int(os.environ.get("PREDICTION_LOG_MAX_BYTES", 64 * 1024 * 1024))
+PREDICTION_LOG_MAX_AGE = float(os.environ.get("PREDICTION_LOG_MAX_AGE", 3600))
+PREDICTION_LOG_COMPRESS = os.environ.get("PREDICTION_LOG_COMPRESS", "0") == "1"
+
+# Registry label of the MODEL_PATH model, and candidate models shadow-scored
+# against it ("label=path,label=path"; unset: none)
+MODEL_LABEL = os.environ.get("MODEL_LABEL", "primary")
+MODEL_CANDIDATES = os.environ.get("MODEL_CANDIDATES", "")
+# Fraction of prediction requests also scored by every candidate
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", 0))
+# Rows waiting for the shadow thread before new requests are dropped, and
+# the most rows of one request shadow-scored (larger ones are down-sampled)
+SHADOW_QUEUE_ROWS = int(os.environ.get("SHADOW_QUEUE_ROWS", 10000))
+SHADOW_MAX_ROWS = int(os.environ.get("SHADOW_MAX_ROWS", 1000))
+
+# Endpoints eligible for profiling
+PROFILED_ENDPOINTS = frozenset(("/predict", "/predict/batch", "/predict/stream", "/features"))
+
+# "eager" loads the model at import (shared by pre-forked workers);
+# "background" loads it per worker in a thread started by
+# start_worker_services(), so /features and /health answer at once
+MODEL_LOAD_MODE = os.environ.get("MODEL_LOAD_MODE", "eager").lower()
+
+# Shared secret for /admin/* endpoints (unset disables them)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Directory for sharing /metrics across pre-forked workers (unset: per process)
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+METRICS = MetricsRegistry()
+METRICS.counter("requests_total", "HTTP requests by endpoint, method and status")
+METRICS.histogram("request_duration_seconds", "End-to-end request latency by endpoint")
+METRICS.histogram(
+    "stage_duration_seconds",
+    "Latency of request stages (parse, features, inference, serialize)"
+)
+METRICS.histogram("batch_size", "Rows per vectorized model call", BATCH_SIZE_BUCKETS)
+METRICS.gauge("model_load_seconds", "Time taken to load the model bundle")
+METRICS.gauge("startup_seconds", "Cold-start time by phase (imports, model_load, warm_up)")
+METRICS.histogram("model_inference_seconds", "Latency of model calls by registry label")
+
+# Cold-start state, filled in by load_model()
+_model: Optional[FlightDelayModel] = None
+model_load_seconds: Optional[float] = None
+_model_loader: Optional[threading.Thread] = None
+
+# Seconds spent in each startup phase, see startup_report()
+startup_phases = {}
+
+
+def _record_model_call(label: str, seconds: float, rows: int) -> None:
+    """Feed registry-timed model calls into the model_inference_seconds histogram."""
+    METRICS.observe("model_inference_seconds", seconds, (("model", label),))
+
+
+def _publish_primary(model: FlightDelayModel) -> None:
+    """
+    Route traffic to a new primary (the registry's on_primary callback).
+    
+    Request handlers read _model once into a local, so requests already
+    in flight complete on the previous model. The prediction cache only
+    holds results of one model version, so it is emptied here: every
+    warm entry is lost on a swap, and /predict hit rates restart from 0.
+    """
+    global _model
+    previous = _model
+    _model = model
+    set_model(model)
+    if previous is not None:
+        logger.info("Swapped model %s -> %s", previous.version, model.version)
+        if prediction_cache is not None:
+            prediction_cache.clear(model.version)
+            logger.info("Cleared the prediction cache for model %s", model.version)
+
+
+# Primary and candidate models; every primary change (load, hot-reload,
+# set_primary) is published to _model, which the handlers serve
+registry = ModelRegistry(
+    SHADOW_SAMPLE_RATE, SHADOW_QUEUE_ROWS, SHADOW_MAX_ROWS, _record_model_call, _publish_primary
+)
+
+
+def _observe_and_shadow(model: FlightDelayModel, seconds: Optional[float], rows, predictions) -> None:
+    """
+    Time and possibly shadow-score a primary call; a no-op unless shadowing.
+    
+    Without candidates (or with SHADOW_SAMPLE_RATE=0) the request path
+    neither looks up the model's label nor records per-model latency.
+    
+    Args:
+        model: Model that scored the rows
+        seconds: Wall time of the call, None if served from the cache
+        rows: Feature rows it scored
+        predictions: Its predicted classes
+    """
+    if not registry.shadowing:
+        return
+    label = registry.label_of(model)
+    if seconds is not None:
+        registry.observe(label, seconds, len(rows))
+    if len(rows):
+        registry.shadow(rows, predictions, label)
+
+
+def load_model() -> Optional[FlightDelayModel]:
+    """
+    Load and warm the model bundle once and record cold-start time.
+    
+    Called at import time in the default "eager" mode, so the pickle is
+    read before the server accepts traffic (and before any pre-fork
+    workers are created); in "background" mode start_worker_services()
+    calls it from a thread.
+    
+    Returns:
+        The loaded model, or None if loading failed
+    """
+    global model_load_seconds
+    
+    start = time.perf_counter()
+    try:
+        model = get_model()
+    except Exception:
+        logger.exception("Model failed to load; /predict will return 503")
+        return None
+    model_load_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    model.warm_up()
+    _record_startup_phase("model_load", model_load_seconds)
+    _record_startup_phase("warm_up", time.perf_counter() - start)
+    METRICS.set_gauge("model_load_seconds", model_load_seconds)
+    # Published last: requests only see a warmed model
+    registry.register(MODEL_LABEL, model, primary=True)
+    logger.info(
+        "Model loaded in %.1f ms (%d features, version %s)",
+        model_load_seconds * 1000, len(model.feature_columns), model.version
+    )
+    _load_candidates()
+    report = startup_report()
+    logger.info(
+        "Startup: %s (%s mode)",
+        ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in report["phases"].items()),
+        report["mode"]
+    )
+    return model
+
+
+def _record_startup_phase(phase: str, seconds: float) -> None:
+    """Store one startup phase duration for the report and /metrics."""
+    startup_phases[phase] = seconds
+    METRICS.set_gauge("startup_seconds", seconds, (("phase", phase),))
+
+
+def startup_report() -> dict:
+    """
+    Cold-start breakdown of this process.
+    
+    Returns:
+        Dictionary with the model load mode, seconds per completed
+        phase (imports, model_load, warm_up) and their total
+    """
+    phases = dict(startup_phases)
+    return {
+        "mode": MODEL_LOAD_MODE,
+        "phases": phases,
+        "total_seconds": sum(phases.values())
+    }
+
+
+def parse_candidates(spec: str) -> list:
+    """
+    Parse a MODEL_CANDIDATES value.
+    
+    Args:
+        spec: Comma-separated label=path pairs
+    
+    Returns:
+        List of (label, path) tuples
+    
+    Raises:
+        ValueError: If an entry is not label=path or a label repeats
+    """
+    candidates = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        label, sep, path = entry.partition("=")
+        if not sep or not label.strip() or not path.strip():
+            raise ValueError(f"Invalid MODEL_CANDIDATES entry: {entry!r} (expected label=path)")
+        candidates.append((label.strip(), path.strip()))
+    labels = [label for label, _ in candidates] + [MODEL_LABEL]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"Duplicate model label in MODEL_CANDIDATES (primary is {MODEL_LABEL!r})")
+    return candidates
+
+
+def _load_candidates() -> None:
+    """Load, warm and register the MODEL_CANDIDATES models for shadow scoring."""
+    try:
+        candidates = parse_candidates(MODEL_CANDIDATES)
+    except ValueError:
+        logger.exception("Ignoring MODEL_CANDIDATES")
+        return
+    for label, path in candidates:
+        try:
+            model = FlightDelayModel(path)
+            model.warm_up()
+            registry.register(label, model)
+        except Exception:
+            logger.exception("Candidate model %s failed to load from %s; not shadowing it", label, path)
+            continue
+        logger.info("Candidate model %s loaded (version %s)", label, model.version)
+
+
+def _swap_model(model: FlightDelayModel) -> None:
+    """
+    Make a freshly loaded model the active one (ModelReloader's on_swap).
+    
+    The model replaces the registry's primary, keeping its label, and is
+    published to the handlers by _publish_primary.
+    
+    Raises:
+        ValueError: If its feature columns differ from the candidates'
+    """
+    registry.register(registry.primary_label or MODEL_LABEL, model, primary=True)
+
+
+def load_feature_store() -> Optional[RouteFeatureStore]:
+    """
+    Build the route feature store from FEATURE_STORE_PATH.
+    
+    Returns:
+        The store, or None if no route file is configured or it failed
+        to load (features are then always computed live)
+    """
+    if not FEATURE_STORE_PATH:
+        return None
+    start = time.perf_counter()
+    try:
+        store = RouteFeatureStore.from_file(
+            FEATURE_STORE_PATH, insert_unknown=FEATURE_STORE_INSERT,
+            max_routes=FEATURE_STORE_MAX_ROUTES
+        )
+    except Exception:
+        logger.exception("Feature store failed to load from %s; hashing live", FEATURE_STORE_PATH)
+        return None
+    memory = store.memory_bytes()
+    logger.info(
+        "Feature store loaded in %.1f ms (%d routes, %.1f KiB: table %d B, index %d B)",
+        (time.perf_counter() - start) * 1000, len(store), memory["total"] / 1024,
+        memory["table"], memory["index"]
+    )
+    return store
+
+
+feature_store: Optional[RouteFeatureStore] = load_feature_store()
+
+
+def _route_features(origin, dest, airline) -> dict:
+    """Hashed features from the feature store, or computed live without one."""
+    if feature_store is not None:
+        return feature_store.lookup(origin, dest, airline)
+    return extract_features(origin, dest, airline)
+
+
+model_reloader = ModelReloader(model_path(), _swap_model, MODEL_RELOAD_INTERVAL)
+
+
+def _predict_proba_rows(rows):
+    """Batched predict_proba against the currently loaded model."""
+    return _model.predict_proba_batch(rows)
+
+
+def _record_micro_batch(size: int) -> None:
+    """Feed micro-batcher batch sizes into the batch_size histogram."""
+    METRICS.observe("batch_size", size, (("source", "micro_batcher"),))
+
+
+batcher: Optional[MicroBatcher] = (
+    MicroBatcher(_predict_proba_rows, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, _record_micro_batch)
+    if BATCHING_ENABLED else None
+)
+
+profiler: Optional[RequestProfiler] = (
+    RequestProfiler(PROFILE_SAMPLE_RATE, PROFILE_DUMP_DIR)
+    if PROFILE_SAMPLE_RATE > 0 else None
+)
+
+prediction_log: Optional[PredictionLogger] = (
+    PredictionLogger(
+        PREDICTION_LOG_DIR,
+        capacity=PREDICTION_LOG_BUFFER,
+        policy=PREDICTION_LOG_POLICY,
+        block_timeout=PREDICTION_LOG_BLOCK_TIMEOUT,
+        flush_interval=PREDICTION_LOG_FLUSH_INTERVAL,
+        max_bytes=PREDICTION_LOG_MAX_BYTES,
+        max_age=PREDICTION_LOG_MAX_AGE,
+        compress=PREDICTION_LOG_COMPRESS
+    )
+    if PREDICTION_LOG_DIR else None
+)
+
+prediction_cache: Optional[PredictionCache] = (
+    PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+    if PREDICTION_CACHE_SIZE > 0 else None
+)
+
+
+def _collect_runtime_metrics() -> list:
+    """Scrape-time view of model, cache and batcher state (this process only)."""
+    families = []
+    model = _model
+    if model is not None:
+        families.append((
+            "model_info", "gauge", "Active model version (value is always 1)",
+            [((("version", model.version),), 1)]
+        ))
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        for name in ("hits", "misses", "evictions", "expirations"):
+            families.append((
+                f"cache_{name}_total", "counter", f"Prediction cache {name}", [((), cache[name])]
+            ))
+        families.append(("cache_size", "gauge", "Prediction cache entries", [((), cache["size"])]))
+    reload = model_reloader.stats()
+    families.append((
+        "model_reloads_total", "counter", "Successful model hot-reloads", [((), reload["reloads"])]
+    ))
+    families.append((
+        "model_reload_failures_total", "counter", "Failed model hot-reloads",
+        [((), reload["failures"])]
+    ))
+    if feature_store is not None:
+        store = feature_store.stats()
+        for name in ("hits", "misses", "inserts"):
+            families.append((
+                f"feature_store_{name}_total", "counter", f"Route feature store {name}",
+                [((), store[name])]
+            ))
+        families.append((
+            "feature_store_routes", "gauge", "Routes held by the feature store",
+            [((), store["routes"])]
+        ))
+        families.append((
+            "feature_store_memory_bytes", "gauge", "Approximate feature store memory",
+            [((), store["memory_bytes"])]
+        ))
+    if prediction_log is not None:
+        log_stats = prediction_log.stats()
+        for name, help_text in (
+            ("logged", "Prediction records queued for the log"),
+            ("dropped", "Prediction records dropped (buffer full or write failed)"),
+            ("flushed", "Prediction records written to log files")
+        ):
+            families.append((
+                f"prediction_log_{name}_total", "counter", help_text, [((), log_stats[name])]
+            ))
+        families.append((
+            "prediction_log_buffered", "gauge", "Entries waiting in the prediction log buffer",
+            [((), log_stats["buffered"])]
+        ))
+    if registry.candidates:
+        shadow = registry.stats()
+        families.append((
+            "model_agreement_rate", "gauge", "Share of shadow-scored rows where a candidate matches the primary",
+            [((("model", label),), entry["agreement_rate"])
+             for label, entry in shadow["models"].items() if entry.get("agreement_rate") is not None]
+        ))
+        families.append((
+            "shadow_requests_total", "counter", "Requests queued for shadow scoring",
+            [((), shadow["shadow_requests"])]
+        ))
+        families.append((
+            "shadow_dropped_total", "counter", "Sampled requests dropped because the shadow queue was full",
+            [((), shadow["shadow_dropped"])]
+        ))
+    if batcher is not None:
+        families.append((
+            "batcher_queue_depth", "gauge", "Rows waiting for the micro-batcher",
+            [((), batcher.stats()["queue_depth"])]
+        ))
+    return families
+
+
+METRICS.add_collector(_collect_runtime_metrics)
+
+
+def start_worker_services() -> None:
+    """
+    Start per-process background services after a pre-fork.
+    
+    Called from gunicorn's post_fork hook; threads started in the
+    master would not survive fork().
+    """
+    if METRICS_MULTIPROC_DIR:
+        METRICS.enable_multiprocess(METRICS_MULTIPROC_DIR, METRICS_FLUSH_INTERVAL)
+    # Every worker watches MODEL_PATH itself, so all of them pick up a new file
+    model_reloader.start()
+    _start_model_loader()
+    if profiler is not None:
+        profiler.start_dumper(PROFILE_DUMP_INTERVAL)
+
+
+def stop_worker_services() -> None:
+    """
+    Flush per-process state before a worker exits.
+    
+    Called from gunicorn's worker_exit hook and on ASGI lifespan shutdown.
+    """
+    if prediction_log is not None:
+        prediction_log.close()
+
+
+def _start_model_loader() -> None:
+    """Load the model in a background thread ("background" mode, once)."""
+    global _model_loader
+    if MODEL_LOAD_MODE != "background" or _model is not None or _model_loader is not None:
+        return
+    _model_loader = threading.Thread(target=load_model, name="model-loader", daemon=True)
+    _model_loader.start()
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+def _start_profile():
+    """Sample this request for profiling (before_request hook)."""
+    if request.url_rule is not None and request.url_rule.rule in PROFILED_ENDPOINTS:
+        profile = profiler.start()
+        if profile is not None:
+            g.profile = profile
+
+
+def _stop_profile(exc):
+    """
+    Finish a sampled request's profile (teardown_request hook).
+    
+    Teardown runs after a streamed body has been fully generated, so
+    /predict/stream profiles cover the whole response.
+    """
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profiler.stop(profile)
+
+
+# Hooks only exist when profiling is on; the default path is untouched
+if profiler is not None:
+    app.before_request(_start_profile)
+    app.teardown_request(_stop_profile)
+
+
+@app.after_request
+def _record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    METRICS.inc("requests_total", (
+        ("endpoint", endpoint),
+        ("method", request.method),
+        ("status", str(response.status_code))
+    ))
+    start = g.get("request_start")
+    if start is not None:
+        METRICS.observe(
+            "request_duration_seconds", time.perf_counter() - start, (("endpoint", endpoint),)
+        )
+    return response
+
+
+def _flight_row(flight, model: FlightDelayModel) -> tuple:
+    """
+    Validate one flight and build its hashed features and model row.
+    
+    Args:
+        flight: Parsed JSON value for a single flight
+        model: Model whose feature_columns define the row layout
+    
+    Returns:
+        Tuple of (parsed flight, hashed features dict, feature row)
+    
+    Raises:
+        ValueError: If the flight does not match the request schema
+    """
+    flight = parse_flight(flight)
+    features = _route_features(flight["origin"], flight["dest"], flight["airline"])
+    row = build_feature_vector(features, flight, model.feature_columns, model.feature_defaults)
+    return flight, features, row
+
+
+def _prediction_record(endpoint: str, model: FlightDelayModel, flight: dict, features: dict, prediction) -> dict:
+    """One prediction log record: request fields, hashed features and result."""
+    return {
+        "ts": time.time(),
+        "endpoint": endpoint,
+        "model_version": model.version,
+        **flight,
+        "origin_hash": features["origin_hash"],
+        "dest_hash": features["dest_hash"],
+        "airline_hash": features["airline_hash"],
+        "prediction": prediction
+    }
+
+
+def model_unavailable():
+    """Response returned while no model is loaded."""
+    return jsonify({"error": "Model not loaded"}), 503
+
+
+def admin_forbidden():
+    """
+    Check the X-Admin-Token header against ADMIN_TOKEN.
+    
+    Returns:
+        An error response if the caller is not allowed, otherwise None
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (ADMIN_TOKEN not set)"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "Invalid admin token"}), 401
+    return None
+
 
-# Delay category labels
-DELAY_LABELS = {
-    0: "On-time (0-10 min)",
-    1: "Medium Delay (11-30 min)",
-    2: "Large Delay (31+ min)"
-}
+def health_status() -> tuple:
+    """
+    Health payload shared by the Flask and async (src/asgi.py) servers.
+    
+    Returns:
+        Tuple of (HTTP status, response body dict)
+    """
+    model = _model
+    if model is None:
+        return 503, {
+            "status": "unavailable",
+            "service": "flight-delay-prediction",
+            "model_loaded": False,
+            "model_version": None
+        }
+    
+    return 200, {
+        "status": "healthy",
+        "service": "flight-delay-prediction",
+        "model_loaded": True,
+        "model_version": model.version
+    }
 
 
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint for smoke testing."""
+    status, payload = health_status()
+    return jsonify(payload), status
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Runtime statistics of in-process serving components."""
     return jsonify({
-        "status": "healthy",
-        "service": "flight-delay-prediction"
+        "batching": batcher.stats() if batcher is not None else None,
+        "cache": prediction_cache.stats() if prediction_cache is not None else None,
+        "feature_store": feature_store.stats() if feature_store is not None else None,
+        "profiling": profiler.summary() if profiler is not None else None,
+        "prediction_log": prediction_log.stats() if prediction_log is not None else None,
+        "models": registry.stats(),
+        "startup": startup_report(),
+        "reload": model_reloader.stats()
     }), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Load MODEL_PATH again and atomically swap it in.
+    
+    Requires the X-Admin-Token header. Only the worker that receives the
+    call reloads; with several workers, set MODEL_RELOAD_INTERVAL so each
+    one notices the new file on its own.
+    
+    Response:
+        {
+            "previous_version": "3f2a9c1b7e4d",
+            "model_version": "a81c0d52e9f6",
+            "load_seconds": 0.012
+        }
+    """
+    denied = admin_forbidden()
+    if denied is not None:
+        return denied
+    
+    previous = _model
+    start = time.perf_counter()
+    try:
+        model = model_reloader.reload()
+    except Exception as e:
+        logger.exception("Model reload failed; keeping current model")
+        return jsonify({
+            "error": f"Reload failed: {e}",
+            "model_version": previous.version if previous is not None else None
+        }), 500
+    
+    return jsonify({
+        "previous_version": previous.version if previous is not None else None,
+        "model_version": model.version,
+        "load_seconds": time.perf_counter() - start
+    }), 200
+
+
+@app.route("/admin/profile", methods=["GET", "DELETE"])
+def admin_profile():
+    """
+    Aggregated cProfile statistics of sampled requests in this worker.
+    
+    Requires the X-Admin-Token header and PROFILE_SAMPLE_RATE > 0.
+    GET returns a pstats table (query: sort, default cumulative; limit,
+    default 30), or with format=pstats a binary .prof file for pstats or
+    snakeviz. DELETE discards the collected statistics.
+    """
+    denied = admin_forbidden()
+    if denied is not None:
+        return denied
+    if profiler is None:
+        return jsonify({"error": "Profiling is disabled (PROFILE_SAMPLE_RATE=0)"}), 404
+    
+    if request.method == "DELETE":
+        profiler.reset()
+        return jsonify(profiler.summary()), 200
+    
+    if request.args.get("format") == "pstats":
+        return Response(
+            marshal.dumps(profiler.raw_stats()), mimetype="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename=profile-{os.getpid()}.prof"}
+        )
+    
+    try:
+        limit = int(request.args.get("limit", 30))
+        report = profiler.report(request.args.get("sort", "cumulative"), limit)
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid sort or limit: {e}"}), 400
+    return Response(report, mimetype="text/plain")
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
     """
@@ -49,49 +746,319 @@ def predict():
             "distance": 2475
         }
     
+    The numeric fields are optional and default to their training mean.
+    
     Response:
         {
             "origin_hash": 42,
             "dest_hash": 17,
             "airline_hash": 5,
             "prediction": 0,
-            "prediction_label": "On-time (0-10 min)"
+            "prediction_label": "On-time (0-10 min)",
+            "model_version": "3f2a9c1b7e4d"
         }
     """
     try:
-        data = request.get_json()
+        stages = StageTimer(METRICS, "/predict")
+        data = request.get_json(silent=True)
+        stages.mark("parse")
         
         if not data:
             return jsonify({"error": "No JSON data provided"}), 400
         
-        # Required fields
-        required = ["origin", "dest", "airline"]
-        for field in required:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        model = _model
+        if model is None:
+            return model_unavailable()
         
-        # Extract hashed features
-        origin_hash = hash_airport_code(data["origin"])
-        dest_hash = hash_airport_code(data["dest"])
-        airline_hash = hash_airline_code(data["airline"])
+        # Validate, then order hashed + numeric features like the training data
+        try:
+            flight, features, row = _flight_row(data, model)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        stages.mark("features")
         
-        # For now, use a simple heuristic-based prediction
-        # In production, this would use the ML model
-        # Random prediction based on hashes (placeholder)
-        prediction = (origin_hash + dest_hash + airline_hash) % 3
+        key = tuple(row)
+        prediction = seconds = None
+        if prediction_cache is not None:
+            prediction = prediction_cache.get(key, model.version)
         
-        return jsonify({
-            "origin_hash": origin_hash,
-            "dest_hash": dest_hash,
-            "airline_hash": airline_hash,
+        if prediction is None:
+            start = time.perf_counter()
+            if batcher is not None:
+                # Scored by the model this request captured, even mid-swap
+                proba = batcher.predict(row, predict_fn=model.predict_proba_batch)
+                prediction = model.classes[int(proba.argmax())]
+            else:
+                prediction = model.predict(row)
+            seconds = time.perf_counter() - start
+            if prediction_cache is not None:
+                prediction_cache.put(key, model.version, prediction)
+        stages.mark("inference")
+        _observe_and_shadow(model, seconds, [row], [prediction])
+        
+        if prediction_log is not None:
+            prediction_log.log(_prediction_record("/predict", model, flight, features, prediction))
+        
+        response = jsonify({
+            **features,
             "prediction": prediction,
-            "prediction_label": DELAY_LABELS[prediction]
-        }), 200
+            "prediction_label": DELAY_LABELS[prediction],
+            "model_version": model.version
+        })
+        stages.mark("serialize")
+        return response, 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Predict delay categories for many flights in one request.
+    
+    Request body (a bare array of flights is also accepted):
+        {
+            "flights": [
+                {"origin": "JFK", "dest": "LAX", "airline": "UA", ...},
+                {"origin": "SFO", "dest": "ORD", "airline": "DL", ...}
+            ]
+        }
+    
+    Response:
+        {
+            "count": 2,
+            "errors": 0,
+            "model_version": "3f2a9c1b7e4d",
+            "predictions": [
+                {"origin_hash": 42, ..., "prediction": 0, "prediction_label": "..."},
+                ...
+            ]
+        }
+    
+    Results keep the request order. Invalid flights get an
+    {"index": i, "error": "..."} entry instead of failing the whole batch.
+    
+    With Content-Type application/x-npz the request and response are
+    columnar instead (see predict_batch_columnar).
+    """
+    if request.mimetype == COLUMNAR_MIMETYPE:
+        return predict_batch_columnar()
+    
+    try:
+        stages = StageTimer(METRICS, "/predict/batch")
+        data = request.get_json(silent=True)
+        stages.mark("parse")
+        flights = data.get("flights") if isinstance(data, dict) else data
+        
+        if not isinstance(flights, list):
+            return jsonify({"error": "Expected a JSON array of flights"}), 400
+        if len(flights) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch exceeds {MAX_BATCH_SIZE} flights"}), 413
+        
+        model = _model
+        if model is None:
+            return model_unavailable()
         
+        results = [None] * len(flights)
+        rows = []
+        row_index = []
+        parsed = []
+        
+        for i, flight in enumerate(flights):
+            try:
+                flight, features, row = _flight_row(flight, model)
+            except ValueError as e:
+                results[i] = {"index": i, "error": str(e)}
+                continue
+            results[i] = features
+            rows.append(row)
+            row_index.append(i)
+            parsed.append(flight)
+        
+        stages.mark("features")
+        
+        # One scaler + model call for every valid flight
+        start = time.perf_counter()
+        predictions = model.predict_batch(rows).tolist()
+        _observe_and_shadow(model, time.perf_counter() - start, rows, predictions)
+        METRICS.observe("batch_size", len(rows), (("source", "batch_endpoint"),))
+        for i, prediction in zip(row_index, predictions):
+            results[i]["prediction"] = prediction
+            results[i]["prediction_label"] = DELAY_LABELS[prediction]
+        stages.mark("inference")
+        
+        if prediction_log is not None:
+            prediction_log.log_batch([
+                _prediction_record("/predict/batch", model, flight, results[i], prediction)
+                for flight, i, prediction in zip(parsed, row_index, predictions)
+            ])
+        
+        response = jsonify({
+            "count": len(results),
+            "errors": len(results) - len(row_index),
+            "model_version": model.version,
+            "predictions": results
+        })
+        stages.mark("serialize")
+        return response, 200
+    
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def predict_batch_columnar():
+    """
+    Predict a columnar (.npz) batch of flights.
+    
+    Request body: np.savez archive with origin, dest and airline (integer
+    indices into origin_dictionary etc., or plain string arrays) and
+    optional float dep_time, arr_time, elapsed_time and distance columns
+    (NaN for missing). See src.columnar.
+    
+    Response body (application/x-npz): origin_hash, dest_hash,
+    airline_hash, prediction and prediction_label_dictionary columns in
+    request order; the model version is in the X-Model-Version header.
+    
+    The batch is validated as a whole: a malformed column fails the
+    request with 400 instead of producing per-row errors.
+    """
+    try:
+        stages = StageTimer(METRICS, "/predict/batch")
+        # NumPy is only needed once a columnar request arrives
+        from src.columnar import (
+            BatchTooLargeError, build_columnar_matrix, encode_response, read_npz, route_codes
+        )
+        
+        model = _model
+        if model is None:
+            return model_unavailable()
+        
+        try:
+            columns = read_npz(request.get_data(), max_rows=MAX_COLUMNAR_BATCH_SIZE)
+            stages.mark("parse")
+            X, hashed = build_columnar_matrix(columns, model.feature_columns, model.feature_defaults)
+        except BatchTooLargeError:
+            return jsonify({"error": f"Batch exceeds {MAX_COLUMNAR_BATCH_SIZE} flights"}), 413
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
+        stages.mark("features")
+        
+        start = time.perf_counter()
+        predictions = model.predict_batch(X)
+        _observe_and_shadow(model, time.perf_counter() - start, X, predictions)
+        METRICS.observe("batch_size", len(X), (("source", "columnar"),))
+        stages.mark("inference")
+        
+        if prediction_log is not None:
+            prediction_log.log_columns(
+                {"ts": time.time(), "endpoint": "/predict/batch", "model_version": model.version},
+                # Copies: request columns are views of the body, which a
+                # buffered entry would otherwise keep alive
+                {
+                    **{field: route_codes(columns, field).copy() for field in ROUTE_FIELDS},
+                    **{field: columns[field].copy() for field in NUMERIC_FIELDS if field in columns},
+                    **{name: hashed[:, j].copy() for j, name in enumerate(FEATURE_NAMES)},
+                    "prediction": predictions
+                }
+            )
+        
+        response = Response(
+            encode_response(hashed, predictions, DELAY_LABELS), mimetype=COLUMNAR_MIMETYPE,
+            headers={"X-Model-Version": model.version or ""}
+        )
+        stages.mark("serialize")
+        return response
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _score_stream_chunk(model: FlightDelayModel, chunk: list):
+    """
+    Score one chunk of (line_number, raw_line) pairs.
+    
+    Yields:
+        One NDJSON-encoded result per non-empty input line, in order
+    """
+    results = []
+    rows = []
+    row_index = []
+    parsed = []
+    for line_number, raw in chunk:
+        try:
+            flight, features, row = _flight_row(json_loads(raw), model)
+        except ValueError as e:
+            # JSON decode errors are ValueErrors too
+            results.append({"line": line_number, "error": str(e)})
+            continue
+        results.append({"line": line_number, **features})
+        rows.append(row)
+        row_index.append(len(results) - 1)
+        parsed.append(flight)
+    
+    if rows:
+        start = time.perf_counter()
+        predictions = model.predict_batch(rows).tolist()
+        _observe_and_shadow(model, time.perf_counter() - start, rows, predictions)
+        METRICS.observe("batch_size", len(rows), (("source", "stream"),))
+        for i, prediction in zip(row_index, predictions):
+            results[i]["prediction"] = prediction
+            results[i]["prediction_label"] = DELAY_LABELS[prediction]
+            results[i]["model_version"] = model.version
+        if prediction_log is not None:
+            prediction_log.log_batch([
+                _prediction_record("/predict/stream", model, flight, results[i], prediction)
+                for flight, i, prediction in zip(parsed, row_index, predictions)
+            ])
+    
+    yield "".join(json_dumps(result) + "\n" for result in results)
+
+
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """
+    Score newline-delimited JSON flights incrementally.
+    
+    Request body (application/x-ndjson), one flight per line:
+        {"origin": "JFK", "dest": "LAX", "airline": "UA", ...}
+        {"origin": "SFO", "dest": "ORD", "airline": "DL", ...}
+    
+    Response (application/x-ndjson), one result per non-empty line:
+        {"line": 1, "origin_hash": 42, ..., "prediction": 0, "prediction_label": "...",
+         "model_version": "3f2a9c1b7e4d"}
+        {"line": 2, "error": "Missing required field: airline"}
+    
+    Lines are read and scored STREAM_CHUNK_SIZE at a time and results are
+    written back as each chunk finishes, so memory stays flat however
+    large the input is. Malformed lines produce an error record. The whole
+    stream is scored by the model that was active when it started.
+    """
+    model = _model
+    if model is None:
+        return model_unavailable()
+    
+    stream = request.stream
+    if isinstance(stream, io.RawIOBase):
+        # Werkzeug's LimitedStream is unbuffered: readline() would read one
+        # byte per call (gunicorn hands over its own buffered body instead)
+        stream = io.BufferedReader(stream, buffer_size=STREAM_READ_BUFFER)
+    
+    def generate():
+        chunk = []
+        for line_number, raw in enumerate(iter(stream.readline, b""), start=1):
+            if not raw.strip():
+                continue
+            chunk.append((line_number, raw))
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield from _score_stream_chunk(model, chunk)
+                chunk = []
+        if chunk:
+            yield from _score_stream_chunk(model, chunk)
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/features", methods=["POST"])
 def get_features():
     """
@@ -112,23 +1079,37 @@ def get_features():
         }
     """
     try:
-        data = request.get_json()
+        stages = StageTimer(METRICS, "/features")
+        data = request.get_json(silent=True)
+        stages.mark("parse")
         
         if not data:
             return jsonify({"error": "No JSON data provided"}), 400
         
-        features = extract_features(
-            data.get("origin", ""),
-            data.get("dest", ""),
-            data.get("airline", "")
-        )
-        
-        return jsonify(features), 200
+        # Route codes are optional here; missing ones hash to bucket 0
+        try:
+            flight = parse_flight(data, require_route=False)
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
+        features = _route_features(flight["origin"], flight["dest"], flight["airline"])
+        stages.mark("features")
         
+        response = jsonify(features)
+        stages.mark("serialize")
+        return response, 200
+    
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+_record_startup_phase("imports", time.perf_counter() - _import_start)
+
+# Eager, one-time model load before any request is served
+if MODEL_LOAD_MODE != "background":
+    load_model()
+
+
 if __name__ == "__main__":
+    start_worker_services()
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port, debug=False)
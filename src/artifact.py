@@ -0,0 +1,385 @@
+# Memory-Mappable Model Artifact Format
+# MLOps HW2 - Efe Çetin
+#
+# A model directory holds a small manifest.json plus one raw .npy file per
+# parameter array. Loading with mmap_mode='r' maps the arrays straight from
+# the page cache, so every worker on a host shares one physical copy, and
+# nothing is unpickled.
+#
+# Usage: python -m src.artifact model/flight_delay_model.pkl model/flight_delay_model
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from typing import Optional
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_NAME = "flight-delay-model"
+FORMAT_VERSION = 1
+
+# Smallest probability GradientBoosting's prior init will take a log of
+_PRIOR_EPS = np.finfo(np.float32).eps
+
+# Rows traversed at once by ArrayTreeEnsemble (bounds the index matrix size)
+_TREE_CHUNK_ROWS = 4096
+
+
+def _softmax(raw: np.ndarray) -> np.ndarray:
+    """Row-wise softmax, stable against large scores."""
+    exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _expit(x: np.ndarray) -> np.ndarray:
+    """Logistic sigmoid."""
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def scores_to_proba(scores: np.ndarray, proba: str) -> np.ndarray:
+    """
+    Turn decision scores into class probabilities.
+    
+    Args:
+        scores: (n_rows, n_score_columns) decision scores
+        proba: 'softmax' (multinomial), 'ovr' (normalized one-vs-rest
+            sigmoids) or 'binary' (single sigmoid column)
+    """
+    if proba == "binary":
+        positive = _expit(scores[:, 0])
+        return np.column_stack([1.0 - positive, positive])
+    if proba == "ovr":
+        prob = _expit(scores)
+        return prob / prob.sum(axis=1, keepdims=True)
+    return _softmax(scores)
+
+
+class ArrayScaler:
+    """StandardScaler.transform backed by plain arrays."""
+    
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+    
+    def transform(self, X) -> np.ndarray:
+        """Standardize rows with the stored mean and scale."""
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ArrayLinearModel:
+    """Linear classifier (coefficients + intercept) backed by plain arrays."""
+    
+    model_type = "linear"
+    
+    def __init__(self, arrays: dict, classes: list, proba: str):
+        self.arrays = arrays
+        self.coef = arrays["coef"]
+        self.intercept = arrays["intercept"]
+        self.classes_ = np.asarray(classes)
+        self.proba = proba
+    
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Raw class scores of shape (n_rows, n_score_columns)."""
+        return X @ self.coef.T + self.intercept
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities of shape (n_rows, n_classes)."""
+        return scores_to_proba(self.decision_function(X), self.proba)
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Most likely class label per row."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class ArrayTreeEnsemble:
+    """
+    GradientBoostingClassifier backed by flattened tree node arrays.
+    
+    All trees share one set of node arrays. Leaves point to themselves,
+    so every row can take exactly max_depth steps in lockstep across all
+    trees instead of walking each tree separately.
+    """
+    
+    model_type = "gradient_boosting"
+    
+    def __init__(self, arrays: dict, classes: list, proba: str,
+                 learning_rate: float, max_depth: int):
+        self.arrays = arrays
+        self.roots = arrays["roots"]
+        self.tree_class = arrays["tree_class"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.init_raw = arrays["init_raw"]
+        self.classes_ = np.asarray(classes)
+        self.proba = proba
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        # One-hot (n_trees, n_score_columns) to sum leaf values per class
+        self._class_onehot = np.eye(len(self.init_raw))[self.tree_class]
+    
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+    
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Raw boosted scores of shape (n_rows, n_score_columns)."""
+        out = np.empty((len(X), len(self.init_raw)), dtype=np.float64)
+        for start in range(0, len(X), _TREE_CHUNK_ROWS):
+            chunk = X[start:start + _TREE_CHUNK_ROWS]
+            leaf_values = self.value[self.leaves(chunk)]
+            out[start:start + len(chunk)] = (
+                self.init_raw + self.learning_rate * (leaf_values @ self._class_onehot)
+            )
+        return out
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities of shape (n_rows, n_classes)."""
+        return scores_to_proba(self.decision_function(X), self.proba)
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Most likely class label per row."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def _linear_arrays(model) -> tuple:
+    """Extract (arrays, meta) from a fitted linear classifier."""
+    classes = model.classes_
+    if len(classes) == 2:
+        proba = "binary"
+    elif getattr(model, "multi_class", None) == "multinomial" or (
+        getattr(model, "multi_class", None) == "auto"
+        and getattr(model, "solver", "lbfgs") != "liblinear"
+    ):
+        proba = "softmax"
+    else:
+        proba = "ovr"
+    arrays = {
+        "coef": np.ascontiguousarray(model.coef_, dtype=np.float64),
+        "intercept": np.ascontiguousarray(np.atleast_1d(model.intercept_), dtype=np.float64)
+    }
+    return arrays, {"proba": proba}
+
+
+def _gradient_boosting_arrays(model, n_features: int) -> tuple:
+    """Extract (arrays, meta) from a fitted GradientBoostingClassifier."""
+    if not (model.init_ == "zero" or getattr(model.init_, "strategy", None) == "prior"):
+        raise ValueError("Only 'zero' or prior-based GradientBoosting init is supported")
+    
+    n_columns = model.estimators_.shape[1]
+    if model.init_ == "zero":
+        init_raw = np.zeros(n_columns)
+    elif n_columns > 1:
+        init_raw = np.log(np.clip(model.init_.class_prior_, _PRIOR_EPS, 1 - _PRIOR_EPS))
+    else:
+        # Binary deviance starts from the log-odds of the positive class
+        positive = np.clip(model.init_.class_prior_[1], _PRIOR_EPS, 1 - _PRIOR_EPS)
+        init_raw = np.array([np.log(positive / (1 - positive))])
+    
+    roots, tree_class = [], []
+    feature, threshold, left, right, value = [], [], [], [], []
+    offset = 0
+    for stage in model.estimators_:
+        for k, estimator in enumerate(stage):
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            tree_class.append(k)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            left.append(offset + np.where(is_leaf, nodes, tree.children_left))
+            right.append(offset + np.where(is_leaf, nodes, tree.children_right))
+            value.append(tree.value[:, 0, 0])
+            offset += tree.node_count
+    
+    if offset and max(np.concatenate(feature)) >= n_features:
+        raise ValueError("Tree references a feature outside the input width")
+    
+    arrays = {
+        "roots": np.asarray(roots, dtype=np.int64),
+        "tree_class": np.asarray(tree_class, dtype=np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "value": np.concatenate(value).astype(np.float64),
+        "init_raw": np.asarray(init_raw, dtype=np.float64)
+    }
+    meta = {
+        "proba": "softmax" if n_columns > 1 else "binary",
+        "learning_rate": float(model.learning_rate),
+        "max_depth": int(max(e.tree_.max_depth for e in model.estimators_.ravel()))
+    }
+    return arrays, meta
+
+
+def model_arrays(model, n_features: int) -> tuple:
+    """
+    Extract the parameters of a fitted classifier as NumPy arrays.
+    
+    Args:
+        model: GradientBoostingClassifier or a linear classifier with
+            coef_/intercept_ (LogisticRegression, SGDClassifier, ...)
+        n_features: Width of the model input
+    
+    Returns:
+        Tuple of (model_type, arrays, meta)
+    
+    Raises:
+        ValueError: If the estimator type is not supported
+    """
+    if hasattr(model, "estimators_") and hasattr(model, "init_"):
+        return ("gradient_boosting",) + _gradient_boosting_arrays(model, n_features)
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return ("linear",) + _linear_arrays(model)
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+
+def export_artifact(bundle: dict, out_dir: str) -> str:
+    """
+    Write a model bundle as raw .npy buffers plus a JSON manifest.
+    
+    Args:
+        bundle: Dict with 'model', 'scaler' and 'feature_columns', as
+            stored in flight_delay_model.pkl
+        out_dir: Directory to write into (created if missing)
+    
+    Returns:
+        Path of the written manifest
+    """
+    feature_columns = list(bundle["feature_columns"])
+    model = bundle["model"]
+    scaler = bundle["scaler"]
+    model_type, arrays, meta = model_arrays(model, len(feature_columns))
+    arrays["scaler_mean"] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays["scaler_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+    
+    os.makedirs(out_dir, exist_ok=True)
+    files = {}
+    for name, array in arrays.items():
+        filename = f"{name}.npy"
+        np.save(os.path.join(out_dir, filename), np.ascontiguousarray(array))
+        files[name] = filename
+    
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "model_type": model_type,
+        "feature_columns": feature_columns,
+        "classes": [int(c) for c in model.classes_],
+        "arrays": files,
+        **meta
+    }
+    for key, value in bundle.items():
+        if key not in ("model", "scaler", "feature_columns"):
+            manifest[key] = value
+    
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def is_artifact(path: str) -> bool:
+    """True if path is an artifact directory or its manifest."""
+    if os.path.isdir(path):
+        return os.path.exists(os.path.join(path, MANIFEST_NAME))
+    return os.path.basename(path) == MANIFEST_NAME
+
+
+def artifact_version(path: str) -> str:
+    """
+    Content hash of an artifact (manifest plus every array file).
+    
+    Args:
+        path: Artifact directory or its manifest.json
+    
+    Returns:
+        First 12 hex digits of the SHA-256 over the artifact files
+    """
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    with open(os.path.join(directory, MANIFEST_NAME), "rb") as f:
+        manifest_bytes = f.read()
+    
+    digest = hashlib.sha256(manifest_bytes)
+    for filename in sorted(json.loads(manifest_bytes)["arrays"].values()):
+        with open(os.path.join(directory, filename), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def load_artifact(path: str, mmap_mode: Optional[str] = "r") -> dict:
+    """
+    Load an exported artifact into a bundle FlightDelayModel understands.
+    
+    Args:
+        path: Artifact directory or its manifest.json
+        mmap_mode: Passed to np.load; 'r' shares pages across processes,
+            None reads the arrays into private memory
+    
+    Returns:
+        Bundle dict with 'model', 'scaler', 'feature_columns' and any
+        extra manifest keys
+    """
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    
+    if manifest.get("format") != FORMAT_NAME or manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact format: {manifest.get('format')} v{manifest.get('format_version')}"
+        )
+    
+    arrays = {
+        # allow_pickle=False: the artifact never executes code on load
+        name: np.load(os.path.join(directory, filename), mmap_mode=mmap_mode, allow_pickle=False)
+        for name, filename in manifest["arrays"].items()
+    }
+    
+    model_type = manifest["model_type"]
+    if model_type == "gradient_boosting":
+        model = ArrayTreeEnsemble(
+            arrays, manifest["classes"], manifest["proba"],
+            manifest["learning_rate"], manifest["max_depth"]
+        )
+    elif model_type == "linear":
+        model = ArrayLinearModel(arrays, manifest["classes"], manifest["proba"])
+    else:
+        raise ValueError(f"Unsupported model type in artifact: {model_type}")
+    
+    bundle = {
+        key: value for key, value in manifest.items()
+        if key not in ("format", "format_version", "model_type", "classes",
+                       "arrays", "proba", "learning_rate", "max_depth")
+    }
+    bundle["model"] = model
+    bundle["scaler"] = ArrayScaler(arrays["scaler_mean"], arrays["scaler_scale"])
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a pickled model bundle as an mmap-able artifact")
+    parser.add_argument("pickle_path", help="Path to flight_delay_model.pkl")
+    parser.add_argument("out_dir", help="Directory to write the artifact into")
+    args = parser.parse_args()
+    
+    with open(args.pickle_path, "rb") as f:
+        bundle = pickle.load(f)
+    print(f"Wrote {export_artifact(bundle, args.out_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# Asyncio Serving Mode (ASGI)
+# MLOps HW2 - Efe Çetin
+#
+# Usage: uvicorn src.asgi:app --host 0.0.0.0 --port 8080 --workers 2
+#
+# The event loop owns every connection: it reads request bodies and writes
+# responses, so thousands of slow or idle keep-alive clients cost no
+# threads. /health is answered on the loop; every other request runs the
+# unchanged Flask app (same routes, validation and errors) on a bounded
+# thread pool, so CPU-bound inference never blocks the loop. When the
+# pool and its queue are full, new requests get 503 + Retry-After at once,
+# before their body is read.
+#
+# Request bodies and responses are buffered whole: /predict/stream gets
+# its NDJSON input in one piece (up to ASYNC_MAX_BODY_BYTES) and its output
+# is sent once the handler finishes. Stream large files through the
+# default gunicorn server instead.
+
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import src.api as api
+from src.json_provider import dumps as json_dumps
+
+# Threads running Flask handlers (inference is CPU bound; keep this small)
+ASYNC_WORKERS = int(os.environ.get("ASYNC_WORKERS", 4))
+
+# Requests allowed to wait for a thread before new ones are refused
+ASYNC_MAX_QUEUE = int(os.environ.get("ASYNC_MAX_QUEUE", 64))
+
+# Largest request body accepted (bodies are read fully before dispatch, so
+# buffered bodies take at most capacity x ASYNC_MAX_BODY_BYTES of memory)
+ASYNC_MAX_BODY_BYTES = int(os.environ.get("ASYNC_MAX_BODY_BYTES", 8 * 1024 * 1024))
+
+api.METRICS.counter(
+    "async_rejected_total", "Requests refused with 503 because the async work queue was full"
+)
+
+
+class AsyncApp:
+    """
+    ASGI application wrapping the Flask app with a bounded executor.
+    
+    Admission control runs on the event loop only, so the in-flight
+    counter needs no lock: a request is admitted if fewer than
+    max_workers + max_queue are being read, running or waiting. Refused
+    requests are answered before their body is read, which bounds the
+    memory held by request bodies to capacity x max_body_bytes.
+    """
+    
+    def __init__(self, wsgi_app, max_workers: int = ASYNC_WORKERS,
+                 max_queue: int = ASYNC_MAX_QUEUE, max_body_bytes: int = ASYNC_MAX_BODY_BYTES):
+        """
+        Initialize the app.
+        
+        Args:
+            wsgi_app: WSGI callable handling everything but /health
+            max_workers: Executor threads
+            max_queue: Admitted requests allowed to wait for a thread
+            max_body_bytes: Request bodies above this get 413
+        """
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_body_bytes = max_body_bytes
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def capacity(self) -> int:
+        """Most requests admitted at once (running + queued)."""
+        return self.max_workers + self.max_queue
+    
+    def stats(self) -> dict:
+        """
+        Admission counters for monitoring.
+        
+        Returns:
+            Dictionary with in_flight, capacity, max_workers and rejected
+        """
+        return {
+            "in_flight": self.in_flight,
+            "capacity": self.capacity,
+            "max_workers": self.max_workers,
+            "rejected": self.rejected
+        }
+    
+    def _pool(self) -> ThreadPoolExecutor:
+        """The executor, created on first use in the serving process."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="async-infer")
+        return self._executor
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+    
+    async def _lifespan(self, receive, send) -> None:
+        """Start per-process services on startup; drain the pool and flush on shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                api.start_worker_services()
+                self._pool()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                api.stop_worker_services()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    async def _http(self, scope, receive, send) -> None:
+        """Serve one HTTP request."""
+        if scope["path"] == "/health" and scope["method"] == "GET":
+            status, payload = api.health_status()
+            api.METRICS.inc("requests_total", (
+                ("endpoint", "/health"), ("method", "GET"), ("status", str(status))
+            ))
+            await _send_json(send, status, payload)
+            return
+        
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            api.METRICS.inc("async_rejected_total")
+            await _send_json(send, 503, {"error": "Server overloaded, retry later"},
+                             [(b"retry-after", b"1")])
+            return
+        
+        self.in_flight += 1
+        try:
+            body = await _read_body(receive, self.max_body_bytes)
+            if body is None:
+                await _send_json(send, 413, {"error": "Request body too large"})
+                return
+            loop = asyncio.get_running_loop()
+            status, headers, chunks = await loop.run_in_executor(
+                self._pool(), _call_wsgi, self.wsgi_app, _environ(scope, body)
+            )
+        finally:
+            self.in_flight -= 1
+        
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+
+async def _read_body(receive, limit: int) -> Optional[bytes]:
+    """Read the whole request body, or None once it exceeds limit bytes."""
+    parts = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        parts.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(parts)
+
+
+async def _send_json(send, status: int, payload: dict, headers: Optional[list] = None) -> None:
+    """Send a complete JSON response from the event loop."""
+    body = json_dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *(headers or [])
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _environ(scope: dict, body: bytes) -> dict:
+    """Build a WSGI environ (PEP 3333) from an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif key != "CONTENT_LENGTH":
+            key = f"HTTP_{key}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(wsgi_app, environ: dict) -> tuple:
+    """
+    Run a WSGI app to completion (executor thread).
+    
+    Returns:
+        (status code, ASGI header list, list of body chunks)
+    """
+    response = {}
+    chunks = []
+    
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+        ]
+        return chunks.append
+    
+    result = wsgi_app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                chunks.append(chunk)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], chunks
+
+
+app = AsyncApp(api.app)
+
+
+def _collect_async_metrics() -> list:
+    """Scrape-time view of async admission state."""
+    stats = app.stats()
+    return [
+        ("async_in_flight", "gauge", "Requests running or queued on the async executor",
+         [((), stats["in_flight"])]),
+        ("async_capacity", "gauge", "Most requests admitted at once", [((), stats["capacity"])])
+    ]
+
+
+api.METRICS.add_collector(_collect_async_metrics)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "src.asgi:app", host="0.0.0.0", port=int(os.environ.get("PORT", 8080)),
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)), log_level="warning"
+    )
@@ -0,0 +1,162 @@
+# Dynamic Micro-Batching for Model Inference
+# MLOps HW2 - Efe Çetin
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row requests into one vectorized call.
+    
+    Request threads call submit() and wait on the returned future. A
+    background thread collects rows until max_batch_size rows are queued
+    or max_wait_ms has passed since the first one arrived, runs
+    predict_fn once on the stacked rows, and fans results back out.
+    Rows submitted with their own predict_fn (e.g. the model a request
+    captured before a hot swap) are batched only with rows for the same
+    function.
+    """
+    
+    def __init__(
+        self,
+        predict_fn: Callable[['np.ndarray'], 'np.ndarray'],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        on_batch: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            predict_fn: Maps an (n, n_features) matrix to n result rows,
+                e.g. FlightDelayModel.predict_proba_batch
+            max_batch_size: Most rows combined into one call
+            max_wait_ms: Longest a row waits for others to join its batch
+            on_batch: Called with the size of every completed batch
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+        
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        
+        self._batches = 0
+        self._rows = 0
+        self._batch_sizes = Counter()
+    
+    def submit(self, row, predict_fn: Optional[Callable] = None) -> Future:
+        """
+        Queue one feature row for the next batch.
+        
+        Args:
+            row: Feature values for a single flight
+            predict_fn: Function scoring this row (default: the batcher's)
+        
+        Returns:
+            Future resolving to this row's result
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, predict_fn, future))
+        return future
+    
+    def predict(self, row, timeout: Optional[float] = None, predict_fn: Optional[Callable] = None):
+        """Submit a row and block until its result is ready."""
+        return self.submit(row, predict_fn).result(timeout)
+    
+    def stats(self) -> dict:
+        """
+        Snapshot of queue depth and batch-size statistics.
+        
+        Returns:
+            Dictionary of counters for monitoring
+        """
+        with self._lock:
+            batches = self._batches
+            rows = self._rows
+            sizes = dict(sorted(self._batch_sizes.items()))
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": rows / batches if batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batch_size_counts": sizes
+        }
+    
+    def _ensure_worker(self) -> None:
+        """Start the worker thread, again after a fork if needed."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Threads do not survive fork(), so pre-forked workers
+                # each start their own on first use
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, name="micro-batcher", daemon=True
+                )
+                self._thread.start()
+                self._pid = pid
+    
+    def _collect(self, q: queue.Queue) -> list:
+        """Block for one row, then gather more until full or timed out."""
+        batch = [q.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self) -> None:
+        """Worker loop: collect a batch, predict once, resolve futures."""
+        import numpy as np
+        
+        q = self._queue
+        while True:
+            # One call per predict function, in arrival order
+            groups = {}
+            for row, predict_fn, future in self._collect(q):
+                groups.setdefault(predict_fn or self.predict_fn, []).append((row, future))
+            
+            for predict_fn, batch in groups.items():
+                futures = [future for _, future in batch]
+                try:
+                    results = predict_fn(np.array([row for row, _ in batch], dtype=np.float64))
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+                
+                with self._lock:
+                    self._batches += 1
+                    self._rows += len(batch)
+                    self._batch_sizes[len(batch)] += 1
+                if self.on_batch is not None:
+                    self.on_batch(len(batch))
+                
+                for future, result in zip(futures, results):
+                    future.set_result(result)
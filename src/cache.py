@@ -0,0 +1,134 @@
+# Prediction Response Cache
+# MLOps HW2 - Efe Çetin
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class PredictionCache:
+    """
+    Bounded in-process LRU cache with optional TTL expiry.
+    
+    Entries belong to one model version. The first get/put with a
+    different version drops everything, so a newly loaded model never
+    serves results computed by the previous one.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl_seconds: float = 300.0):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Most entries kept; least recently used are evicted
+            ttl_seconds: Entry lifetime in seconds (0 disables expiry)
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def _check_version(self, version: Hashable) -> None:
+        """Drop all entries when the model version changes (lock held)."""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+    
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value.
+        
+        Args:
+            key: Normalized feature tuple
+            version: Version of the model that would compute the value
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, version: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+        
+        Args:
+            key: Normalized feature tuple
+            version: Version of the model that computed the value
+            value: Value to cache
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self, version: Optional[Hashable] = None) -> None:
+        """
+        Remove every entry.
+        
+        Args:
+            version: Model version the following entries belong to; when
+                given, dropping non-empty contents counts as an
+                invalidation, as on a version change seen by get/put
+        """
+        with self._lock:
+            if version is not None:
+                if self._entries:
+                    self.invalidations += 1
+                self._version = version
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        """
+        Snapshot of cache counters.
+        
+        Returns:
+            Dictionary of counters for monitoring
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._version
+            }
@@ -0,0 +1,305 @@
+# Columnar Binary Payloads for Bulk Prediction
+# MLOps HW2 - Efe Çetin
+#
+# A bulk request is a NumPy .npz archive (np.savez, uncompressed) with one
+# array per column, so a million flights parse in milliseconds instead of
+# going through a JSON object per row:
+#
+#   origin, dest, airline          integer indices into ..._dictionary
+#   origin_dictionary, ...         distinct codes (unicode or ASCII bytes)
+#   dep_time, arr_time,            optional numeric columns; NaN means
+#   elapsed_time, distance         missing (filled like an omitted field)
+#
+# A code column may also be sent as a plain string array, which is
+# dictionary-encoded on the server. Stored members are read in place:
+# each column is an np.frombuffer view of the request body, and numeric
+# columns are written straight into the model's feature matrix. The
+# response is an .npz of the same kind (see encode_response).
+
+import io
+import struct
+import zipfile
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from src.feature_engineering import (
+    FEATURE_NAMES,
+    NUMERIC_FEATURE_FIELDS,
+    hash_airline_code,
+    hash_airport_code
+)
+from src.schema import ROUTE_FIELDS, ValidationError
+
+# Suffix of the member holding a code column's distinct values
+DICTIONARY_SUFFIX = "_dictionary"
+
+# Code column -> (hash function, bucket count), as in extract_features
+_CODE_HASHES = {
+    "origin": (hash_airport_code, 100),
+    "dest": (hash_airport_code, 100),
+    "airline": (hash_airline_code, 20)
+}
+
+
+class BatchTooLargeError(ValidationError):
+    """A column holds more rows or bytes than the caller's row cap allows."""
+
+
+# Widest accepted array element: 16 characters of a unicode code column
+# (float64 and int64 columns are 8 bytes)
+MAX_ELEMENT_BYTES = 64
+
+# Zip local file header: signature ... file name length, extra field length
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+def _read_header(member, name: str, max_rows) -> tuple:
+    """Shape, order, dtype and byte size of an .npy stream, checked."""
+    version = npy_format.read_magic(member)
+    if version == (1, 0):
+        shape, fortran_order, dtype = npy_format.read_array_header_1_0(member)
+    else:
+        shape, fortran_order, dtype = npy_format.read_array_header_2_0(member)
+    if dtype.hasobject:
+        raise ValidationError(f"Column {name} has an object dtype")
+    if dtype.itemsize > MAX_ELEMENT_BYTES:
+        raise ValidationError(f"Column {name} has elements wider than {MAX_ELEMENT_BYTES} bytes")
+    
+    count = int(np.prod(shape, dtype=np.int64))
+    if max_rows is not None and count > max_rows:
+        raise BatchTooLargeError(f"Column {name} exceeds {max_rows} rows")
+    nbytes = count * dtype.itemsize
+    if max_rows is not None and nbytes > max_rows * MAX_ELEMENT_BYTES:
+        raise BatchTooLargeError(f"Column {name} exceeds {max_rows * MAX_ELEMENT_BYTES} bytes")
+    return shape, fortran_order, dtype, count, nbytes
+
+
+def _member_array(body, zf: zipfile.ZipFile, info: zipfile.ZipInfo, max_rows) -> np.ndarray:
+    """One .npy member as a read-only view of body, or a copy if compressed."""
+    name = info.filename[:-4]
+    if info.compress_type != zipfile.ZIP_STORED:
+        # The header is checked before the data is inflated, so a small
+        # compressed member cannot expand past max_rows * MAX_ELEMENT_BYTES
+        with zf.open(info) as f:
+            shape, fortran_order, dtype, count, nbytes = _read_header(f, name, max_rows)
+            data = f.read(nbytes)
+        if len(data) < nbytes:
+            raise ValidationError(f"Column {name} is truncated")
+        array = np.frombuffer(data, dtype=dtype, count=count)
+        return array.reshape(shape, order="F" if fortran_order else "C")
+    
+    header = _LOCAL_HEADER.unpack_from(body, info.header_offset)
+    start = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+    member = io.BytesIO(memoryview(body)[start:start + info.file_size])
+    shape, fortran_order, dtype, count, nbytes = _read_header(member, name, max_rows)
+    if member.tell() + nbytes > info.file_size:
+        raise ValidationError(f"Column {name} is truncated")
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=start + member.tell())
+    order = "F" if fortran_order else "C"
+    return array.reshape(shape, order=order)
+
+
+def read_npz(body: bytes, max_rows: int = None) -> dict:
+    """
+    Read the arrays of an .npz payload without copying stored members.
+    
+    Args:
+        body: Raw request body written by np.savez (np.savez_compressed
+            also works, at the cost of decompressing each column)
+        max_rows: Largest element count accepted per column, checked
+            from the member header before any data is read; elements
+            are at most MAX_ELEMENT_BYTES wide either way
+    
+    Returns:
+        Dictionary of column name to array; all members are read-only,
+        and uncompressed ones are views of body
+    
+    Raises:
+        BatchTooLargeError: If a column holds more than max_rows values
+        ValidationError: If body is not an .npz archive or holds object
+            arrays or elements wider than MAX_ELEMENT_BYTES
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            return {
+                info.filename[:-4]: _member_array(body, zf, info, max_rows)
+                for info in zf.infolist() if info.filename.endswith(".npy")
+            }
+    except ValidationError:
+        raise
+    except (zipfile.BadZipFile, ValueError, struct.error, EOFError) as e:
+        raise ValidationError(f"Invalid .npz payload: {e}")
+
+
+def _decode_ascii(codes: np.ndarray, field: str) -> np.ndarray:
+    """Decode a bytes array of codes, rejecting non-ASCII bytes."""
+    try:
+        return np.char.decode(codes, "ascii")
+    except UnicodeDecodeError:
+        raise ValidationError(f"Column {field} has non-ASCII codes")
+
+
+def _code_buckets(columns: dict, field: str, n_rows) -> np.ndarray:
+    """Hash bucket of every row's code, hashing each distinct code once."""
+    values = columns.get(field)
+    if values is None:
+        raise ValidationError(f"Missing required column: {field}")
+    if values.ndim != 1:
+        raise ValidationError(f"Column {field} must be one-dimensional")
+    
+    dictionary = columns.get(field + DICTIONARY_SUFFIX)
+    if dictionary is None:
+        if values.dtype.kind not in "US":
+            raise ValidationError(f"Column {field} must hold strings or dictionary indices")
+        dictionary, indices = np.unique(values, return_inverse=True)
+    else:
+        if values.dtype.kind not in "iu":
+            raise ValidationError(f"Column {field} must hold integer dictionary indices")
+        if dictionary.dtype.kind not in "US":
+            raise ValidationError(f"Column {field}{DICTIONARY_SUFFIX} must hold strings")
+        indices = values
+        if len(indices) and (indices.min() < 0 or indices.max() >= len(dictionary)):
+            raise ValidationError(f"Column {field} has indices outside its dictionary")
+    
+    if n_rows is not None and len(indices) != n_rows:
+        raise ValidationError(f"Column {field} has {len(indices)} rows, expected {n_rows}")
+    if dictionary.dtype.kind == "S":
+        dictionary = _decode_ascii(dictionary, field)
+    
+    hash_fn, num_buckets = _CODE_HASHES[field]
+    buckets = np.fromiter(
+        (hash_fn(str(code), num_buckets) for code in dictionary),
+        dtype=np.int32,
+        count=len(dictionary)
+    )
+    return buckets[indices]
+
+
+def route_codes(columns: dict, field: str) -> np.ndarray:
+    """
+    Decoded code strings of one route column.
+    
+    Args:
+        columns: Output of read_npz, already validated by
+            build_columnar_matrix
+        field: origin, dest or airline
+    
+    Returns:
+        Unicode array with one code per row
+    
+    Raises:
+        ValidationError: If a bytes code is not ASCII
+    """
+    values = columns[field]
+    dictionary = columns.get(field + DICTIONARY_SUFFIX)
+    codes = values if dictionary is None else dictionary[values]
+    return _decode_ascii(codes, field) if codes.dtype.kind == "S" else codes
+
+
+def build_columnar_matrix(columns: dict, feature_columns: list, defaults=None) -> tuple:
+    """
+    Build the model input matrix from decoded request columns.
+    
+    Args:
+        columns: Output of read_npz
+        feature_columns: Column order the model was trained on
+        defaults: Fallback values for missing columns and NaN values
+    
+    Returns:
+        Tuple of (float64 matrix of shape (n_rows, len(feature_columns)),
+        int32 hashed features of shape (n_rows, 3) in FEATURE_NAMES order)
+    
+    Raises:
+        ValidationError: If a route column is missing, columns differ in
+            length, or a numeric column is not numeric or holds
+            infinite values
+    """
+    n_rows = None
+    hashed_columns = []
+    for field in ROUTE_FIELDS:
+        buckets = _code_buckets(columns, field, n_rows)
+        n_rows = len(buckets)
+        hashed_columns.append(buckets)
+    hashed = np.column_stack(hashed_columns) if n_rows else np.empty((0, 3), dtype=np.int32)
+    
+    X = np.empty((n_rows, len(feature_columns)), dtype=np.float64)
+    for j, column in enumerate(feature_columns):
+        key = column.lower()
+        if key in FEATURE_NAMES:
+            X[:, j] = hashed[:, FEATURE_NAMES.index(key)]
+            continue
+        
+        field = NUMERIC_FEATURE_FIELDS.get(column)
+        if field is None:
+            raise ValidationError(f"Unsupported feature column: {column}")
+        
+        default = (defaults or {}).get(column, 0.0)
+        values = columns.get(field)
+        if values is None:
+            X[:, j] = default
+            continue
+        if values.dtype.kind not in "iuf" or values.shape != (n_rows,):
+            raise ValidationError(f"Column {field} must be a numeric array of {n_rows} rows")
+        # The only copy: request buffer -> feature matrix
+        X[:, j] = values
+        if np.isinf(X[:, j]).any():
+            raise ValidationError(f"Column {field} has infinite values")
+        X[np.isnan(X[:, j]), j] = default
+    return X, hashed
+
+
+def encode_request(columns: dict) -> bytes:
+    """
+    Encode flight columns as a columnar request body.
+    
+    Args:
+        columns: Mapping of request field name to a sequence of values;
+            route codes are dictionary-encoded, numeric fields are sent
+            as float64 (None/NaN for missing)
+    
+    Returns:
+        .npz bytes for POST /predict/batch with Content-Type
+        application/x-npz
+    """
+    arrays = {}
+    for field, values in columns.items():
+        if field in ROUTE_FIELDS:
+            dictionary, indices = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+            index_dtype = np.int16 if len(dictionary) <= np.iinfo(np.int16).max else np.int32
+            arrays[field] = indices.astype(index_dtype)
+            arrays[field + DICTIONARY_SUFFIX] = dictionary
+        else:
+            arrays[field] = np.asarray(values, dtype=np.float64)
+    return write_npz(arrays)
+
+
+def encode_response(hashed: np.ndarray, predictions: np.ndarray, labels: dict) -> bytes:
+    """
+    Encode bulk prediction results as an .npz body.
+    
+    The archive holds origin_hash, dest_hash and airline_hash (int32),
+    prediction (int8) and prediction_label_dictionary, whose entry k is
+    the label of class k.
+    
+    Args:
+        hashed: int32 array of shape (n_rows, 3) from build_columnar_matrix
+        predictions: Predicted class per row
+        labels: Class -> label text (DELAY_LABELS)
+    
+    Returns:
+        .npz bytes
+    """
+    arrays = {name: hashed[:, j] for j, name in enumerate(FEATURE_NAMES)}
+    arrays["prediction"] = predictions.astype(np.int8)
+    arrays["prediction_label" + DICTIONARY_SUFFIX] = np.array(
+        [labels[k] for k in range(max(labels) + 1)]
+    )
+    return write_npz(arrays)
+
+
+def write_npz(arrays: dict) -> bytes:
+    """Uncompressed .npz bytes of the given arrays (readable by np.load)."""
+    out = io.BytesIO()
+    np.savez(out, **arrays)
+    return out.getvalue()
@@ -0,0 +1,159 @@
+# Fused Single-Row Inference Engine
+# MLOps HW2 - Efe Çetin
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+from src.artifact import (
+    ArrayLinearModel,
+    ArrayTreeEnsemble,
+    model_arrays,
+    scores_to_proba
+)
+
+
+class FastInferenceEngine:
+    """
+    Scale + score + argmax for one row without sklearn's per-call overhead.
+    
+    Scaler and model parameters are pulled into NumPy arrays once. Each
+    call then skips input validation and list-to-array conversion, and
+    standardizes into a per-thread preallocated buffer.
+    """
+    
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, model_type: str,
+                 arrays: dict, meta: dict, classes: list):
+        """
+        Initialize the engine from extracted parameters.
+        
+        Args:
+            mean: Scaler mean per feature
+            scale: Scaler scale per feature
+            model_type: 'gradient_boosting' or 'linear'
+            arrays: Parameter arrays as produced by artifact.model_arrays
+            meta: Model metadata (proba mode, learning_rate, max_depth)
+            classes: Class label for each probability column
+        """
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.model_type = model_type
+        self.proba = meta["proba"]
+        self.classes = [int(c) for c in classes]
+        self.n_features = len(self.mean)
+        self._local = threading.local()
+        
+        if model_type == "gradient_boosting":
+            self.roots = np.asarray(arrays["roots"], dtype=np.intp)
+            self.tree_class = np.asarray(arrays["tree_class"], dtype=np.intp)
+            self.feature = np.asarray(arrays["feature"], dtype=np.intp)
+            self.threshold = np.asarray(arrays["threshold"])
+            # children[node, 1] is the left child (taken when x <= threshold)
+            self.children = np.column_stack([arrays["right"], arrays["left"]]).astype(np.intp)
+            self.value = np.asarray(arrays["value"])
+            self.init_raw = np.asarray(arrays["init_raw"])
+            self.learning_rate = meta["learning_rate"]
+            self.max_depth = meta["max_depth"]
+            self.n_scores = len(self.init_raw)
+            self._score = self._score_trees
+        elif model_type == "linear":
+            self.coef = np.ascontiguousarray(arrays["coef"])
+            self.intercept = np.asarray(arrays["intercept"])
+            self._score = self._score_linear
+        else:
+            raise ValueError(f"Unsupported model type: {model_type}")
+    
+    @classmethod
+    def from_estimators(cls, scaler, model, n_features: int) -> Optional["FastInferenceEngine"]:
+        """
+        Build an engine from a loaded scaler and model.
+        
+        Args:
+            scaler: Fitted StandardScaler or artifact.ArrayScaler
+            model: Fitted estimator or artifact array model
+            n_features: Width of the model input
+        
+        Returns:
+            The engine, or None if the estimator types are unsupported
+            (callers then fall back to sklearn)
+        """
+        mean = getattr(scaler, "mean_", None)
+        scale = getattr(scaler, "scale_", None)
+        if mean is None or scale is None:
+            return None
+        if not getattr(scaler, "with_mean", True):
+            mean = np.zeros(n_features)
+        if not getattr(scaler, "with_std", True):
+            scale = np.ones(n_features)
+        
+        if isinstance(model, ArrayTreeEnsemble):
+            model_type, arrays = model.model_type, model.arrays
+            meta = {"proba": model.proba, "learning_rate": model.learning_rate,
+                    "max_depth": model.max_depth}
+        elif isinstance(model, ArrayLinearModel):
+            model_type, arrays, meta = model.model_type, model.arrays, {"proba": model.proba}
+        else:
+            try:
+                model_type, arrays, meta = model_arrays(model, n_features)
+            except ValueError:
+                return None
+        
+        return cls(mean, scale, model_type, arrays, meta, model.classes_)
+    
+    def _buffer(self) -> np.ndarray:
+        """Per-thread input buffer, allocated on first use."""
+        buf = getattr(self._local, "x", None)
+        if buf is None:
+            buf = self._local.x = np.empty(self.n_features, dtype=np.float64)
+        return buf
+    
+    def _scaled(self, features) -> np.ndarray:
+        """Standardize one row into the thread's buffer."""
+        if len(features) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {len(features)}")
+        x = self._buffer()
+        x[:] = features
+        np.subtract(x, self.mean, out=x)
+        np.divide(x, self.scale, out=x)
+        return x
+    
+    def _score_linear(self, x: np.ndarray) -> np.ndarray:
+        """Decision scores of a linear model."""
+        return self.coef @ x + self.intercept
+    
+    def _score_trees(self, x: np.ndarray) -> np.ndarray:
+        """Boosted scores: walk every tree in lockstep, then sum per class."""
+        # Match sklearn: inputs are compared as float32
+        x32 = x.astype(np.float32)
+        node = self.roots
+        for _ in range(self.max_depth):
+            go_left = x32[self.feature[node]] <= self.threshold[node]
+            node = self.children[node, go_left.view(np.int8)]
+        leaf_sums = np.bincount(self.tree_class, weights=self.value[node], minlength=self.n_scores)
+        return self.init_raw + self.learning_rate * leaf_sums
+    
+    def predict_proba(self, features) -> np.ndarray:
+        """
+        Class probabilities for a single row.
+        
+        Args:
+            features: Raw (unscaled) feature values
+        
+        Returns:
+            1D array of probabilities, one per class
+        """
+        scores = self._score(self._scaled(features))
+        return scores_to_proba(scores[None, :], self.proba)[0]
+    
+    def predict(self, features) -> int:
+        """
+        Predicted class for a single row.
+        
+        Args:
+            features: Raw (unscaled) feature values
+        
+        Returns:
+            Class label with the highest probability
+        """
+        return self.classes[int(self.predict_proba(features).argmax())]
@@ -2,12 +2,170 @@
 # MLOps HW2 - Efe Çetin
 
 import hashlib
-from typing import Optional
+import os
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+# NumPy and pandas are imported inside the batch functions, so the
+# single-flight path (hashing, feature rows) loads neither
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# IATA codes seen in the training data (busiest US airports and carriers).
+# Their buckets are precomputed at import time; anything else goes
+# through the bounded LRU cache of the active hash scheme.
+KNOWN_AIRPORT_CODES = (
+    "ABQ", "ALB", "ANC", "ATL", "AUS", "BDL", "BHM", "BNA", "BOI", "BOS",
+    "BUF", "BUR", "BWI", "CHS", "CLE", "CLT", "CMH", "COS", "CVG", "DAL",
+    "DCA", "DEN", "DFW", "DSM", "DTW", "ELP", "EWR", "FLL", "GEG", "GRR",
+    "GSO", "GSP", "HNL", "HOU", "IAD", "IAH", "ICT", "IND", "JAX", "JFK",
+    "KOA", "LAS", "LAX", "LGA", "LGB", "LIH", "LIT", "MCI", "MCO", "MDW",
+    "MEM", "MIA", "MKE", "MSN", "MSP", "MSY", "OAK", "OGG", "OKC", "OMA",
+    "ONT", "ORD", "ORF", "PBI", "PDX", "PHL", "PHX", "PIT", "PSP", "PVD",
+    "RDU", "RIC", "RNO", "ROC", "RSW", "SAN", "SAT", "SAV", "SDF", "SEA",
+    "SFO", "SJC", "SJU", "SLC", "SMF", "SNA", "SRQ", "STL", "SYR", "TPA",
+    "TUL", "TUS", "TYS", "XNA"
+)
+
+KNOWN_AIRLINE_CODES = (
+    "9E", "AA", "AS", "B6", "DL", "EV", "F9", "G4", "HA", "MQ",
+    "NK", "OH", "OO", "QX", "UA", "WN", "YV", "YX"
+)
+
+# Size of the LRU cache in front of the hash for codes outside the known sets
+HASH_CACHE_SIZE = 4096
+
+
+def _md5_bucket(code: str, num_buckets: int) -> int:
+    """
+    MD5 bucket of a code.
+    
+    int.from_bytes over the full 16-byte digest equals int(hexdigest, 16)
+    without building the hex string, so buckets are unchanged.
+    """
+    digest = hashlib.md5(code.encode("utf-8")).digest()
+    return int.from_bytes(digest, "big") % num_buckets
+
+
+def _crc32_bucket(code: str, num_buckets: int) -> int:
+    """CRC-32 bucket of a code (non-cryptographic, several times cheaper than MD5)."""
+    return zlib.crc32(code.encode("utf-8")) % num_buckets
+
+
+# Selectable code -> bucket functions. Buckets differ between schemes, so
+# a model only works with the scheme it was trained with (the bundle's
+# hash_scheme, checked by check_hash_config).
+HASH_SCHEMES: Dict[str, Callable[[str, int], int]] = {
+    "md5": _md5_bucket,
+    "crc32": _crc32_bucket
+}
+
+DEFAULT_HASH_SCHEME = "md5"
+
+# Buckets extract_features hashes each code into
+HASH_BUCKETS = {'origin': 100, 'dest': 100, 'airline': 20}
+
+_CACHED_SCHEMES = {
+    name: lru_cache(maxsize=HASH_CACHE_SIZE)(fn) for name, fn in HASH_SCHEMES.items()
+}
+_md5_bucket_cached = _CACHED_SCHEMES["md5"]
+
+
+def _build_bucket_index(
+    codes: tuple,
+    bucket_sizes: tuple,
+    bucket_fn: Callable[[str, int], int] = _md5_bucket
+) -> Dict[int, Dict[str, int]]:
+    """Precompute {num_buckets: {code: bucket}} for a fixed code list."""
+    return {
+        num_buckets: {code: bucket_fn(code, num_buckets) for code in codes}
+        for num_buckets in bucket_sizes
+    }
+
+
+# Active scheme state, replaced as a whole by set_hash_scheme
+_hash_scheme = DEFAULT_HASH_SCHEME
+_bucket_cached = _md5_bucket_cached
+# num_buckets -> code -> bucket, for the bucket counts the model uses
+_BUCKET_INDEX = _build_bucket_index(
+    KNOWN_AIRPORT_CODES + KNOWN_AIRLINE_CODES, (100, 20)
+)
+
+
+def set_hash_scheme(name: str) -> None:
+    """
+    Select the hash function behind every code bucket in this process.
+    
+    Call it at startup, before features are computed or cached (e.g.
+    by a RouteFeatureStore); requests in flight during a switch may mix
+    schemes.
+    
+    Args:
+        name: Key of HASH_SCHEMES
+    
+    Raises:
+        ValueError: If the scheme is unknown
+    """
+    global _hash_scheme, _bucket_cached, _BUCKET_INDEX
+    if name not in HASH_SCHEMES:
+        raise ValueError(f"Unknown hash scheme: {name} (choose from {', '.join(HASH_SCHEMES)})")
+    _BUCKET_INDEX = _build_bucket_index(
+        KNOWN_AIRPORT_CODES + KNOWN_AIRLINE_CODES, (100, 20), HASH_SCHEMES[name]
+    )
+    _bucket_cached = _CACHED_SCHEMES[name]
+    _hash_scheme = name
+
+
+def get_hash_scheme() -> str:
+    """Name of the active hash scheme."""
+    return _hash_scheme
+
+
+# Process-wide scheme; must match the hash_scheme of the model being served
+if os.environ.get("HASH_SCHEME", DEFAULT_HASH_SCHEME) != DEFAULT_HASH_SCHEME:
+    set_hash_scheme(os.environ["HASH_SCHEME"])
+
+
+def check_hash_config(hash_scheme: Optional[str], hash_buckets: Optional[dict]) -> None:
+    """
+    Refuse a model trained on differently hashed features.
+    
+    Args:
+        hash_scheme: Scheme recorded in the model bundle (None for
+            bundles that predate the field, which used MD5)
+        hash_buckets: Bucket counts recorded in the bundle, or None
+    
+    Raises:
+        ValueError: If the scheme or bucket counts differ from the ones
+            features are computed with in this process
+    """
+    scheme = hash_scheme or DEFAULT_HASH_SCHEME
+    if scheme != _hash_scheme:
+        raise ValueError(
+            f"Model was trained with {scheme} feature hashing but this process uses "
+            f"{_hash_scheme} (set HASH_SCHEME={scheme})"
+        )
+    if hash_buckets is not None and dict(hash_buckets) != HASH_BUCKETS:
+        raise ValueError(
+            f"Model was trained with hash buckets {dict(hash_buckets)}, features use {HASH_BUCKETS}"
+        )
+
+
+def _code_bucket(code: str, num_buckets: int) -> int:
+    """Look a code up in the precomputed index, falling back to the LRU cache."""
+    index = _BUCKET_INDEX.get(num_buckets)
+    if index is not None:
+        bucket = index.get(code)
+        if bucket is not None:
+            return bucket
+    return _bucket_cached(code, num_buckets)
 
 
 def hash_airport_code(code: str, num_buckets: int = 100) -> int:
     """
-    Hash airport code into a bucket index using MD5 hashing.
+    Hash airport code into a bucket index with the active hash scheme.
     
     Args:
         code: Airport code (e.g., 'JFK', 'LAX')
@@ -18,10 +176,7 @@ def hash_airport_code(code: str, num_buckets: int = 100) -> int:
     """
     if not code or not isinstance(code, str):
         return 0
-    encoded = code.encode("utf-8")
-    hashed = hashlib.md5(encoded).hexdigest()
-    hashed_int = int(hashed, 16)
-    return hashed_int % num_buckets
+    return _code_bucket(code, num_buckets)
 
 
 def hash_airline_code(code: str, num_buckets: int = 20) -> int:
@@ -37,10 +192,7 @@ def hash_airline_code(code: str, num_buckets: int = 20) -> int:
     """
     if not code or not isinstance(code, str):
         return 0
-    encoded = code.encode("utf-8")
-    hashed = hashlib.md5(encoded).hexdigest()
-    hashed_int = int(hashed, 16)
-    return hashed_int % num_buckets
+    return _code_bucket(code, num_buckets)
 
 
 def categorize_delay(delay_minutes: Optional[float]) -> int:
@@ -69,6 +221,37 @@ def categorize_delay(delay_minutes: Optional[float]) -> int:
         return 2
 
 
+# Upper bounds (inclusive) of delay categories 0 and 1
+DELAY_THRESHOLDS = (10, 30)
+
+# Delay category labels, shared by the API and the offline scorer
+DELAY_LABELS = {
+    0: "On-time (0-10 min)",
+    1: "Medium Delay (11-30 min)",
+    2: "Large Delay (31+ min)"
+}
+
+
+def categorize_delay_batch(delay_minutes) -> 'np.ndarray':
+    """
+    Vectorized categorize_delay over an array of delays.
+    
+    Args:
+        delay_minutes: Array-like of delays in minutes; None/NaN count
+            as missing, like None in categorize_delay
+    
+    Returns:
+        int8 array of category labels (0, 1, or 2)
+    """
+    import numpy as np
+    
+    delays = np.asarray(delay_minutes, dtype=np.float64)
+    # right=True gives bins (-inf, 10], (10, 30], (30, inf)
+    categories = np.digitize(delays, DELAY_THRESHOLDS, right=True).astype(np.int8)
+    categories[np.isnan(delays)] = 0
+    return categories
+
+
 def extract_features(origin: str, dest: str, airline: str) -> dict:
     """
     Extract hashed features from flight data.
@@ -86,3 +269,161 @@ def extract_features(origin: str, dest: str, airline: str) -> dict:
         'dest_hash': hash_airport_code(dest, 100),
         'airline_hash': hash_airline_code(airline, 20)
     }
+
+
+# Column order of extract_features_batch output
+FEATURE_NAMES = ('origin_hash', 'dest_hash', 'airline_hash')
+
+
+def _hash_column(values, hash_fn, num_buckets: int) -> 'np.ndarray':
+    """
+    Hash a column of codes, hashing each distinct code only once.
+    
+    pd.factorize gives the distinct codes plus an inverse index in O(n)
+    without sorting, and tolerates None/NaN in object columns (code -1).
+    """
+    import numpy as np
+    import pandas as pd
+    
+    inverse, uniques = pd.factorize(np.asarray(values, dtype=object))
+    # Trailing 0 is the bucket for missing values (inverse == -1)
+    buckets = np.fromiter(
+        (hash_fn(code, num_buckets) for code in uniques),
+        dtype=np.int32,
+        count=len(uniques)
+    )
+    return np.append(buckets, np.int32(0))[inverse]
+
+
+def extract_features_batch(origin, dest=None, airline=None) -> 'np.ndarray':
+    """
+    Vectorized extract_features over whole columns of flights.
+    
+    Args:
+        origin: Origin airport codes, or a DataFrame with origin, dest
+            and airline columns
+        dest: Destination airport codes
+        airline: Airline codes
+    
+    Returns:
+        C-contiguous int32 array of shape (n_rows, 3), columns in
+        FEATURE_NAMES order; row i equals extract_features for flight i
+    """
+    import numpy as np
+    
+    if dest is None and airline is None and hasattr(origin, 'columns'):
+        origin, dest, airline = origin['origin'], origin['dest'], origin['airline']
+    
+    columns = (
+        (origin, hash_airport_code, 100),
+        (dest, hash_airport_code, 100),
+        (airline, hash_airline_code, 20)
+    )
+    lengths = {len(values) for values, _, _ in columns}
+    if len(lengths) != 1:
+        raise ValueError(f"Column lengths differ: {sorted(lengths)}")
+    
+    out = np.empty((lengths.pop(), len(FEATURE_NAMES)), dtype=np.int32)
+    for j, (values, hash_fn, num_buckets) in enumerate(columns):
+        out[:, j] = _hash_column(values, hash_fn, num_buckets)
+    return out
+
+
+# Request fields that back the raw numeric model columns
+NUMERIC_FEATURE_FIELDS = {
+    'CRS_DEP_TIME': 'dep_time',
+    'CRS_ARR_TIME': 'arr_time',
+    'CRS_ELAPSED_TIME': 'elapsed_time',
+    'DISTANCE': 'distance'
+}
+
+
+def build_feature_vector(
+    hashed: dict,
+    data: dict,
+    feature_columns: list,
+    defaults: Optional[dict] = None
+) -> list:
+    """
+    Build a model input row ordered by the bundle's feature columns.
+    
+    Args:
+        hashed: Output of extract_features for this flight
+        data: Raw flight data holding the numeric fields
+        feature_columns: Column order the model was trained on
+        defaults: Fallback values for missing numeric columns
+    
+    Returns:
+        List of feature values in feature_columns order
+    
+    Raises:
+        ValueError: If a numeric field is invalid or a column is unknown
+    """
+    row = []
+    for column in feature_columns:
+        key = column.lower()
+        if key in hashed:
+            row.append(hashed[key])
+            continue
+        
+        field = NUMERIC_FEATURE_FIELDS.get(column)
+        if field is None:
+            raise ValueError(f"Unsupported feature column: {column}")
+        
+        value = data.get(field)
+        if value is None:
+            value = (defaults or {}).get(column, 0.0)
+        try:
+            row.append(float(value))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid numeric value for {field}: {value!r}")
+    return row
+
+
+def build_feature_matrix(
+    frame: 'pd.DataFrame',
+    feature_columns: list,
+    defaults: Optional[dict] = None
+) -> 'np.ndarray':
+    """
+    Vectorized build_feature_vector over a DataFrame of flights.
+    
+    Args:
+        frame: Flights with origin, dest and airline columns plus any of
+            the numeric request fields (dep_time, arr_time, ...)
+        feature_columns: Column order the model was trained on
+        defaults: Fallback values for missing or NaN numeric fields
+    
+    Returns:
+        float64 array of shape (len(frame), len(feature_columns))
+    
+    Raises:
+        ValueError: If a numeric column is not numeric or a feature
+            column is unknown
+    """
+    import numpy as np
+    import pandas as pd
+    
+    hashed = extract_features_batch(frame)
+    X = np.empty((len(frame), len(feature_columns)), dtype=np.float64)
+    
+    for j, column in enumerate(feature_columns):
+        key = column.lower()
+        if key in FEATURE_NAMES:
+            X[:, j] = hashed[:, FEATURE_NAMES.index(key)]
+            continue
+        
+        field = NUMERIC_FEATURE_FIELDS.get(column)
+        if field is None:
+            raise ValueError(f"Unsupported feature column: {column}")
+        
+        default = (defaults or {}).get(column, 0.0)
+        if field not in frame:
+            X[:, j] = default
+            continue
+        try:
+            values = pd.to_numeric(frame[field]).to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid numeric values in column {field}")
+        X[:, j] = np.where(np.isnan(values), default, values)
+    return X
@@ -0,0 +1,278 @@
+# Route-Level Feature Store
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m src.feature_store FLIGHTS ROUTES [--top N]
+#
+# The hashed features of an (origin, dest, airline) route never change,
+# and a few thousand routes carry almost all traffic. RouteFeatureStore
+# precomputes them into an int32 table with a dict index, so the predict
+# path fetches a ready-made row instead of rehashing three codes.
+
+import argparse
+import csv
+import sys
+import threading
+from collections import Counter
+from typing import Iterable, Optional, Tuple
+
+from src.feature_engineering import FEATURE_NAMES, extract_features
+
+# Default cap on routes held, including ones inserted at runtime
+DEFAULT_MAX_ROUTES = 100000
+
+# Columns of a route list file
+ROUTE_COLUMNS = ('origin', 'dest', 'airline')
+
+
+class RouteFeatureStore:
+    """
+    Precomputed hashed features per (origin, dest, airline) route.
+    
+    Rows live in a C-contiguous int32 array of shape (capacity, 3) in
+    FEATURE_NAMES order; a dict maps each route tuple to its row. Reads
+    take no lock: insert() writes the row (growing the table if needed)
+    before publishing the index entry, so a reader that finds a route
+    always sees its finished row. Hit/miss counters are updated without
+    the lock and may undercount slightly under concurrent threads.
+    """
+    
+    def __init__(
+        self,
+        routes: Iterable[Tuple[str, str, str]] = (),
+        insert_unknown: bool = False,
+        max_routes: int = DEFAULT_MAX_ROUTES
+    ):
+        """
+        Initialize the store and precompute the given routes.
+        
+        Args:
+            routes: (origin, dest, airline) tuples to precompute
+            insert_unknown: Add routes missed by lookup() to the table
+            max_routes: Most routes held; inserts stop once it is reached
+        """
+        if max_routes < 1:
+            raise ValueError("max_routes must be at least 1")
+        
+        # Imported here so the API can start without NumPy until it is needed
+        import numpy as np
+        
+        self.insert_unknown = insert_unknown
+        self.max_routes = max_routes
+        self._table = np.zeros((16, len(FEATURE_NAMES)), dtype=np.int32)
+        self._index = {}
+        # Distinct code strings, and bytes of index keys and their strings
+        self._codes = set()
+        self._key_bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        
+        for origin, dest, airline in routes:
+            self.insert(origin, dest, airline)
+        # Only count runtime insertions
+        self.inserts = 0
+    
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'RouteFeatureStore':
+        """
+        Build a store from a route list CSV.
+        
+        Args:
+            path: CSV with a header naming origin, dest and airline
+                columns (other columns, such as a count, are ignored)
+            **kwargs: Passed to RouteFeatureStore
+        
+        Returns:
+            The populated store
+        
+        Raises:
+            ValueError: If a route column is missing from the header
+        """
+        return cls(read_routes(path), **kwargs)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __contains__(self, route) -> bool:
+        return route in self._index
+    
+    def insert(self, origin: str, dest: str, airline: str) -> bool:
+        """
+        Compute and store the features of one route.
+        
+        Args:
+            origin: Origin airport code
+            dest: Destination airport code
+            airline: Airline code
+        
+        Returns:
+            True if the route was added, False if already present or the
+            store is full
+        """
+        return self._store(origin, dest, airline, extract_features(origin, dest, airline))
+    
+    def _store(self, origin: str, dest: str, airline: str, features: dict) -> bool:
+        """Add a route's computed features to the table (see insert)."""
+        key = (sys.intern(origin), sys.intern(dest), sys.intern(airline))
+        with self._lock:
+            if key in self._index or len(self._index) >= self.max_routes:
+                return False
+            
+            i = len(self._index)
+            table = self._table
+            if i == len(table):
+                import numpy as np
+                table = np.zeros((min(2 * len(table), self.max_routes), table.shape[1]), dtype=np.int32)
+                table[:i] = self._table[:i]
+            table[i] = [features[name] for name in FEATURE_NAMES]
+            self._table = table
+            self._key_bytes += sys.getsizeof(key)
+            for code in key:
+                if code not in self._codes:
+                    self._codes.add(code)
+                    self._key_bytes += sys.getsizeof(code)
+            # Publish last: readers that find the key see a complete row
+            self._index[key] = i
+            self.inserts += 1
+            return True
+    
+    def lookup(self, origin: str, dest: str, airline: str) -> dict:
+        """
+        Hashed features for a route, computed live if it is not stored.
+        
+        Args:
+            origin: Origin airport code
+            dest: Destination airport code
+            airline: Airline code
+        
+        Returns:
+            Dictionary equal to extract_features(origin, dest, airline)
+        """
+        i = self._index.get((origin, dest, airline))
+        if i is not None:
+            self.hits += 1
+            table = self._table
+            return {
+                'origin_hash': table.item(i, 0),
+                'dest_hash': table.item(i, 1),
+                'airline_hash': table.item(i, 2)
+            }
+        
+        self.misses += 1
+        features = extract_features(origin, dest, airline)
+        if self.insert_unknown and all(isinstance(c, str) for c in (origin, dest, airline)):
+            self._store(origin, dest, airline, features)
+        return features
+    
+    def memory_bytes(self) -> dict:
+        """
+        Approximate memory held by the store.
+        
+        Code strings are interned and shared between routes, so each
+        distinct string is counted once.
+        
+        Returns:
+            Dictionary with table, index and total byte counts
+        """
+        with self._lock:
+            index = sys.getsizeof(self._index) + sys.getsizeof(self._codes) + self._key_bytes
+            table = self._table.nbytes
+        return {"table": table, "index": index, "total": table + index}
+    
+    def stats(self) -> dict:
+        """
+        Snapshot of store counters.
+        
+        Returns:
+            Dictionary of counters and memory use for monitoring
+        """
+        lookups = self.hits + self.misses
+        memory = self.memory_bytes()
+        return {
+            "routes": len(self._index),
+            "capacity": len(self._table),
+            "max_routes": self.max_routes,
+            "insert_unknown": self.insert_unknown,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "inserts": self.inserts,
+            "table_bytes": memory["table"],
+            "index_bytes": memory["index"],
+            "memory_bytes": memory["total"]
+        }
+
+
+def read_routes(path: str) -> list:
+    """
+    Read (origin, dest, airline) tuples from a route list CSV.
+    
+    Args:
+        path: CSV with origin, dest and airline header columns
+    
+    Returns:
+        List of route tuples in file order
+    
+    Raises:
+        ValueError: If a route column is missing from the header
+    """
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in ROUTE_COLUMNS if c not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"Route file {path} is missing columns: {', '.join(missing)}")
+        return [tuple(row[c] for c in ROUTE_COLUMNS) for row in reader]
+
+
+def top_routes(flights_path: str, top: Optional[int] = None, chunk_size: int = 100000) -> list:
+    """
+    Count routes in a flights file, most frequent first.
+    
+    Args:
+        flights_path: CSV or Parquet of flights, using request field
+            names or the BTS column names in src.score.COLUMN_ALIASES
+        top: Keep only the most frequent routes (None keeps all)
+        chunk_size: Rows read at a time
+    
+    Returns:
+        List of ((origin, dest, airline), count) pairs
+    """
+    from src.score import COLUMN_ALIASES, read_chunks
+    
+    counts = Counter()
+    for frame in read_chunks(flights_path, chunk_size):
+        frame = frame.rename(columns={
+            name: field for name, field in COLUMN_ALIASES.items()
+            if name in frame.columns and field not in frame.columns
+        })
+        frame = frame.dropna(subset=list(ROUTE_COLUMNS))
+        counts.update(zip(*(frame[c].astype(str) for c in ROUTE_COLUMNS)))
+    return counts.most_common(top)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build a route list file for the feature store from historical flights"
+    )
+    parser.add_argument("flights", help="Flights CSV or Parquet file")
+    parser.add_argument("routes", help="Route list CSV to write")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Keep only the N most frequent routes (default: all)")
+    args = parser.parse_args(argv)
+    
+    routes = top_routes(args.flights, args.top)
+    with open(args.routes, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([*ROUTE_COLUMNS, 'count'])
+        for route, count in routes:
+            writer.writerow([*route, count])
+    
+    total = sum(count for _, count in routes)
+    print(f"Wrote {len(routes)} routes covering {total} flights to {args.routes}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# Gunicorn Configuration for Production Serving
+# MLOps HW2 - Efe Çetin
+#
+# Usage: gunicorn -c python:src.gunicorn_config src.api:app
+
+import gc
+import glob
+import multiprocessing
+import os
+
+# Listen address, same PORT variable as the dev server
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# Pre-forked worker processes (inference is CPU bound, so one per core)
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+
+# Seconds a request may run before its worker is killed and restarted
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+
+# Seconds workers get to finish in-flight requests after SIGTERM
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Import src.api in the master so the model is unpickled once and the
+# workers share its pages copy-on-write
+preload_app = True
+
+accesslog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def pre_fork(server, worker):
+    """Move preloaded objects out of GC tracking before forking.
+    
+    Without this, the first collection in each worker touches every
+    object header and un-shares the model's pages.
+    """
+    gc.freeze()
+
+
+def on_starting(server):
+    """Remove metric snapshots left behind by a previous master."""
+    directory = os.environ.get("METRICS_MULTIPROC_DIR")
+    if directory:
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    """Start per-worker background threads (they do not survive fork)."""
+    from src.api import start_worker_services
+    start_worker_services()
+
+
+def worker_exit(server, worker):
+    """Flush per-worker buffers (the prediction log) before the worker exits."""
+    from src.api import stop_worker_services
+    stop_worker_services()
@@ -0,0 +1,69 @@
+# Fast JSON Encoding / Decoding
+# MLOps HW2 - Efe Çetin
+#
+# Uses orjson when it is installed and falls back to the stdlib json
+# module otherwise. OrjsonProvider plugs the same codec into Flask, so
+# jsonify() and request.get_json() pick it up without route changes.
+
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+if HAS_ORJSON:
+    # numpy scalars/arrays and int dict keys (e.g. /stats histograms) as-is
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize obj to a compact JSON string.
+    
+    Args:
+        obj: JSON-compatible value (numpy values allowed with orjson)
+    
+    Returns:
+        JSON text
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def loads(data) -> Any:
+    """
+    Parse JSON text or bytes.
+    
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps/loads above."""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs or not HAS_ORJSON:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs or not HAS_ORJSON:
+            return super().loads(s, **kwargs)
+        return loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        if not HAS_ORJSON:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
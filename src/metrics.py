@@ -0,0 +1,311 @@
+# Prometheus-Style Metrics
+# MLOps HW2 - Efe Çetin
+#
+# Recording is lock-free: every thread increments its own shard (plain
+# dicts only that thread writes to), and shards are summed at scrape time.
+# Shards of threads that have exited are folded into one retired shard at
+# scrape time, so thread churn does not grow the shard list.
+# With several pre-forked workers, set METRICS_MULTIPROC_DIR so each worker
+# periodically writes a snapshot that any worker merges into its scrape.
+
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Latency buckets in seconds (sub-millisecond up to a few seconds)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+# Batch-size buckets (rows per model call)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 10000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """Counters and histograms written by a single thread."""
+    
+    __slots__ = ("counters", "histograms")
+    
+    def __init__(self):
+        self.counters: Dict[tuple, float] = {}
+        # (name, labels) -> [bucket counts (last is +Inf), sum, count]
+        self.histograms: Dict[tuple, list] = {}
+
+
+class MetricsRegistry:
+    """Registry of counters, gauges and histograms rendered as Prometheus text."""
+    
+    def __init__(self, namespace: str = "flight_delay"):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            namespace: Prefix added to every metric name
+        """
+        self.namespace = namespace
+        self._meta: Dict[str, tuple] = {}
+        self._gauges: Dict[tuple, float] = {}
+        self._collectors: List[Callable[[], list]] = []
+        # (weak reference to the owning thread, its shard)
+        self._shards: List[tuple] = []
+        self._retired = _Shard()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._multiproc_dir: Optional[str] = None
+    
+    def counter(self, name: str, help_text: str) -> None:
+        """Declare a counter."""
+        self._meta[name] = ("counter", help_text, None)
+    
+    def gauge(self, name: str, help_text: str) -> None:
+        """Declare a gauge."""
+        self._meta[name] = ("gauge", help_text, None)
+    
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> None:
+        """Declare a histogram with sorted upper bucket bounds."""
+        self._meta[name] = ("histogram", help_text, tuple(sorted(buckets)))
+    
+    def add_collector(self, collector: Callable[[], list]) -> None:
+        """
+        Register a callback evaluated at scrape time.
+        
+        Args:
+            collector: Returns a list of (name, type, help, samples) where
+                samples is a list of (labels, value)
+        """
+        self._collectors.append(collector)
+    
+    def _shard(self) -> _Shard:
+        """This thread's shard, created on first use."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+    
+    def inc(self, name: str, labels: Labels = (), amount: float = 1.0) -> None:
+        """Increment a counter."""
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0.0) + amount
+    
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Record one histogram observation."""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        entry = histograms.get(key)
+        buckets = self._meta[name][2]
+        if entry is None:
+            entry = histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+    
+    def set_gauge(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Set a gauge value (process-wide, not sharded)."""
+        self._gauges[(name, labels)] = value
+    
+    def snapshot(self) -> dict:
+        """
+        Sum all thread shards of this process.
+        
+        Returns:
+            Dict with 'counters' and 'histograms' keyed by (name, labels)
+        """
+        with self._lock:
+            self._retire_dead_shards()
+            shards = [shard for _, shard in self._shards] + [self._retired]
+        
+        counters: Dict[tuple, float] = {}
+        histograms: Dict[tuple, list] = {}
+        for shard in shards:
+            for key, value in shard.counters.copy().items():
+                counters[key] = counters.get(key, 0.0) + value
+            for key, (buckets, total, count) in shard.histograms.copy().items():
+                _merge_histogram(histograms, key, list(buckets), total, count)
+        return {"counters": counters, "histograms": histograms}
+    
+    def _retire_dead_shards(self) -> None:
+        """Fold shards of exited threads into the retired shard (lock held)."""
+        live = []
+        retired = self._retired
+        for ref, shard in self._shards:
+            thread = ref()
+            if thread is not None and thread.is_alive():
+                live.append((ref, shard))
+                continue
+            # The owner is gone, so nothing writes to this shard any more
+            for key, value in shard.counters.items():
+                retired.counters[key] = retired.counters.get(key, 0.0) + value
+            for key, (buckets, total, count) in shard.histograms.items():
+                _merge_histogram(retired.histograms, key, buckets, total, count)
+        self._shards = live
+    
+    def enable_multiprocess(self, directory: str, interval: float = 5.0) -> None:
+        """
+        Share metrics between pre-forked workers through snapshot files.
+        
+        Call once in each worker after fork. A daemon thread writes this
+        process's snapshot every `interval` seconds; render() merges the
+        latest snapshot of every other worker.
+        
+        Args:
+            directory: Directory shared by all workers
+            interval: Seconds between snapshot writes
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._multiproc_dir = directory
+        
+        def flush_loop():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot()
+        
+        threading.Thread(target=flush_loop, name="metrics-flush", daemon=True).start()
+    
+    def write_snapshot(self) -> None:
+        """Atomically write this process's snapshot to the shared directory."""
+        if self._multiproc_dir is None:
+            return
+        snap = self.snapshot()
+        payload = {
+            "counters": [[name, labels, value] for (name, labels), value in snap["counters"].items()],
+            "histograms": [
+                [name, labels, buckets, total, count]
+                for (name, labels), (buckets, total, count) in snap["histograms"].items()
+            ]
+        }
+        path = os.path.join(self._multiproc_dir, f"metrics-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+    
+    def _merged_snapshot(self) -> dict:
+        """Own live snapshot plus the latest snapshot of every other worker."""
+        snap = self.snapshot()
+        if self._multiproc_dir is None:
+            return snap
+        
+        own = f"metrics-{os.getpid()}.json"
+        for path in glob.glob(os.path.join(self._multiproc_dir, "metrics-*.json")):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                with open(path) as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in other["counters"]:
+                key = (name, _as_labels(labels))
+                snap["counters"][key] = snap["counters"].get(key, 0.0) + value
+            for name, labels, buckets, total, count in other["histograms"]:
+                _merge_histogram(snap["histograms"], (name, _as_labels(labels)), buckets, total, count)
+        return snap
+    
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text (version 0.0.4)
+        """
+        snap = self._merged_snapshot()
+        lines = []
+        
+        for name, (kind, help_text, buckets) in self._meta.items():
+            full = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(snap["counters"].items()):
+                    if metric == name:
+                        lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+            elif kind == "gauge":
+                for (metric, labels), value in sorted(self._gauges.items()):
+                    if metric == name:
+                        lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+            else:
+                for (metric, labels), (counts, total, count) in sorted(snap["histograms"].items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                        cumulative += bucket_count
+                        le = labels + (("le", _format_value(bound)),)
+                        lines.append(f"{full}_bucket{_format_labels(le)} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {count}")
+        
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full} {help_text}")
+                lines.append(f"# TYPE {full} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+        
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Records the time between successive mark() calls as stage latencies."""
+    
+    __slots__ = ("registry", "labels", "last")
+    
+    def __init__(self, registry: MetricsRegistry, endpoint: str):
+        self.registry = registry
+        self.labels = (("endpoint", endpoint),)
+        self.last = time.perf_counter()
+    
+    def mark(self, stage: str) -> None:
+        """Close the current stage and start timing the next one."""
+        now = time.perf_counter()
+        self.registry.observe("stage_duration_seconds", now - self.last, self.labels + (("stage", stage),))
+        self.last = now
+
+
+def _as_labels(labels) -> Labels:
+    """JSON lists back into the hashable label tuple form."""
+    return tuple((k, v) for k, v in labels)
+
+
+def _merge_histogram(target: dict, key: tuple, buckets: list, total: float, count: int) -> None:
+    """Add one histogram's buckets, sum and count into target[key]."""
+    entry = target.get(key)
+    if entry is None:
+        target[key] = [list(buckets), total, count]
+        return
+    entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+    entry[1] += total
+    entry[2] += count
+
+
+def _escape(value) -> str:
+    """Escape a label value for the exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    """Render a label tuple as {k="v",...}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
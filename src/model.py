@@ -1,10 +1,28 @@
 # Model Loading and Inference
 # MLOps HW2 - Efe Çetin
 
+import hashlib
+import logging
 import pickle
 import os
-from typing import Optional
-import numpy as np
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from src.feature_engineering import DEFAULT_HASH_SCHEME, check_hash_config
+
+# NumPy, the artifact loader and the fast engine are imported on first
+# load, so importing this module (e.g. to hash features) stays cheap
+if TYPE_CHECKING:
+    import numpy as np
+    from src.fast_inference import FastInferenceEngine
+
+logger = logging.getLogger(__name__)
+
+# Set FAST_INFERENCE=0 to always score single rows through sklearn
+FAST_INFERENCE = os.environ.get('FAST_INFERENCE', '1') == '1'
+
+DEFAULT_MODEL_PATH = 'model/flight_delay_model.pkl'
 
 
 class FlightDelayModel:
@@ -15,11 +33,16 @@ class FlightDelayModel:
         Initialize model wrapper.
         
         Args:
-            model_path: Path to the pickled model file
+            model_path: Path to the pickled model file or artifact
         """
         self.model = None
         self.scaler = None
         self.feature_columns = None
+        self.feature_defaults = {}
+        self.classes = []
+        self.engine: Optional['FastInferenceEngine'] = None
+        self.version: Optional[str] = None
+        self.hash_scheme: Optional[str] = None
         self.loaded = False
         
         if model_path:
@@ -27,22 +50,74 @@ class FlightDelayModel:
     
     def load(self, model_path: str) -> None:
         """
-        Load model from pickle file.
+        Load model from a pickle file or an exported artifact directory.
+        
+        Artifacts (see src/artifact.py) are memory-mapped read-only, so
+        worker processes share one physical copy of the parameters.
         
         Args:
-            model_path: Path to the pickled model file
+            model_path: Path to the pickled model file, or to an artifact
+                directory / its manifest.json
+        
+        Raises:
+            ValueError: If the bundle's hash scheme or bucket counts do not
+                match the features computed in this process
         """
+        from src.artifact import artifact_version, is_artifact, load_artifact
+        from src.fast_inference import FastInferenceEngine
+        
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found: {model_path}")
         
-        with open(model_path, 'rb') as f:
-            bundle = pickle.load(f)
+        if is_artifact(model_path):
+            bundle = load_artifact(model_path)
+            version = artifact_version(model_path)
+        else:
+            with open(model_path, 'rb') as f:
+                data = f.read()
+            bundle = pickle.loads(data)
+            version = hashlib.sha256(data).hexdigest()[:12]
+        
+        # Buckets must come from the hash the model was trained on
+        check_hash_config(bundle.get('hash_scheme'), bundle.get('hash_buckets'))
+        self.hash_scheme = bundle.get('hash_scheme') or DEFAULT_HASH_SCHEME
         
         self.model = bundle['model']
         self.scaler = bundle['scaler']
         self.feature_columns = bundle['feature_columns']
+        # Rows are always plain arrays in feature_columns order; with the
+        # fitted names left in place sklearn warns on every transform call
+        names = getattr(self.scaler, 'feature_names_in_', None)
+        if names is not None and list(names) == list(self.feature_columns):
+            del self.scaler.feature_names_in_
+        # Training means stand in for numeric fields a caller omits
+        self.feature_defaults = dict(zip(
+            self.feature_columns,
+            getattr(self.scaler, 'mean_', [])
+        ))
+        # Class label for each predict_proba column
+        self.classes = [int(c) for c in self.model.classes_]
+        # Fused single-row path; None for estimators it cannot handle
+        self.engine = FastInferenceEngine.from_estimators(
+            self.scaler, self.model, len(self.feature_columns)
+        ) if FAST_INFERENCE else None
+        # Content hash; keys caches and is reported to clients
+        self.version = version
         self.loaded = True
     
+    def warm_up(self, batch_size: int = 8) -> None:
+        """
+        Run throwaway predictions so the first real requests do not pay
+        one-time costs (engine buffers, sklearn dispatch, mmap page faults).
+        
+        Args:
+            batch_size: Rows in the warm-up batch call
+        """
+        row = [float(self.feature_defaults.get(c, 0.0)) for c in self.feature_columns]
+        self.predict(row)
+        self.predict_proba(row)
+        self.predict_proba_batch([row] * batch_size)
+    
     def predict(self, features: list) -> int:
         """
         Make a prediction.
@@ -53,12 +128,9 @@ class FlightDelayModel:
         Returns:
             Predicted delay category (0, 1, or 2)
         """
-        if not self.loaded:
-            raise RuntimeError("Model not loaded")
-
-        features_scaled = self.scaler.transform([features])
-        prediction = self.model.predict(features_scaled)
-        return int(prediction[0])
+        if self.engine is not None:
+            return self.engine.predict(features)
+        return int(self.predict_batch([features])[0])
     
     def predict_proba(self, features: list) -> list:
         """
@@ -70,22 +142,207 @@ class FlightDelayModel:
         Returns:
             List of probabilities for each class
         """
+        if self.engine is not None:
+            return self.engine.predict_proba(features).tolist()
+        return self.predict_proba_batch([features])[0].tolist()
+    
+    def predict_batch(self, features) -> 'np.ndarray':
+        """
+        Predict many rows with a single scaler and model call.
+        
+        Args:
+            features: 2D array-like of shape (n_rows, n_features)
+        
+        Returns:
+            Array of predicted delay categories, one per row
+        """
+        import numpy as np
+        
+        X = self._as_matrix(features)
+        if len(X) == 0:
+            return np.empty(0, dtype=np.int64)
+        return self.model.predict(self.scaler.transform(X)).astype(np.int64)
+    
+    def predict_proba_batch(self, features) -> 'np.ndarray':
+        """
+        Get class probabilities for many rows in one call.
+        
+        Args:
+            features: 2D array-like of shape (n_rows, n_features)
+        
+        Returns:
+            Array of shape (n_rows, n_classes)
+        """
+        import numpy as np
+        
+        X = self._as_matrix(features)
+        if len(X) == 0:
+            return np.empty((0, len(self.model.classes_)), dtype=np.float64)
+        return self.model.predict_proba(self.scaler.transform(X))
+    
+    def _as_matrix(self, features) -> 'np.ndarray':
+        """Validate load state and coerce rows into a float64 matrix."""
+        import numpy as np
+        
         if not self.loaded:
             raise RuntimeError("Model not loaded")
-
-        features_scaled = self.scaler.transform([features])
-        proba = self.model.predict_proba(features_scaled)
-        return proba[0].tolist()
+        
+        X = np.asarray(features, dtype=np.float64)
+        if X.size == 0:
+            return X.reshape(0, len(self.feature_columns))
+        if X.ndim != 2 or X.shape[1] != len(self.feature_columns):
+            raise ValueError(
+                f"Expected rows of {len(self.feature_columns)} features, got shape {X.shape}"
+            )
+        return X
 
 
 # Singleton model instance
 _model_instance: Optional[FlightDelayModel] = None
 
 
+def model_path() -> str:
+    """Configured model location (MODEL_PATH, default DEFAULT_MODEL_PATH)."""
+    return os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH)
+
+
 def get_model() -> FlightDelayModel:
     """Get or create the singleton model instance."""
     global _model_instance
     if _model_instance is None:
-        model_path = os.environ.get('MODEL_PATH', 'model/flight_delay_model.pkl')
-        _model_instance = FlightDelayModel(model_path)
+        _model_instance = FlightDelayModel(model_path())
     return _model_instance
+
+
+def set_model(model: FlightDelayModel) -> None:
+    """Replace the singleton returned by get_model()."""
+    global _model_instance
+    _model_instance = model
+
+
+class ModelReloader:
+    """
+    Load a replacement model off the request path and swap it in atomically.
+    
+    reload() builds and warms a new FlightDelayModel while the old one
+    keeps serving, then hands it to on_swap. Swapping is a single
+    reference assignment, so requests that already took a reference to
+    the old model finish on it. start() polls model_path and reloads
+    when its modification time or size changes.
+    """
+    
+    def __init__(
+        self,
+        model_path: str,
+        on_swap: Callable[[FlightDelayModel], None],
+        poll_interval: float = 0.0
+    ):
+        """
+        Initialize the reloader.
+        
+        Args:
+            model_path: Pickle file or artifact directory to watch
+            on_swap: Called with each newly loaded, warmed model
+            poll_interval: Seconds between file checks; 0 disables watching
+        """
+        self.model_path = model_path
+        self.on_swap = on_swap
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._thread = None
+        self._signature = self._file_signature()
+        
+        self._reloads = 0
+        self._failures = 0
+        self._last_reload_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+    
+    def _file_signature(self) -> Optional[tuple]:
+        """(mtime_ns, size) of the model file, or None if it is missing."""
+        path = self.model_path
+        if os.path.isdir(path):
+            from src.artifact import MANIFEST_NAME
+            path = os.path.join(path, MANIFEST_NAME)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def reload(self) -> FlightDelayModel:
+        """
+        Load, warm and swap in the model at model_path.
+        
+        Concurrent calls are serialized. On failure, including on_swap
+        refusing the model, the current model stays in place, the failure
+        is recorded and the exception propagates.
+        
+        Returns:
+            The newly active model
+        """
+        with self._lock:
+            signature = self._file_signature()
+            try:
+                model = FlightDelayModel(self.model_path)
+                model.warm_up()
+                self.on_swap(model)
+            except Exception as e:
+                self._failures += 1
+                self._last_error = f"{type(e).__name__}: {e}"
+                raise
+            self._signature = signature
+            self._reloads += 1
+            self._last_reload_at = time.time()
+            self._last_error = None
+            return model
+    
+    def check(self) -> bool:
+        """
+        Reload if the model file changed since the last load.
+        
+        Returns:
+            True if a new model was swapped in
+        """
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return False
+        # Remember it even if loading fails, so a half-written file is
+        # retried once the writer touches it again rather than every poll
+        self._signature = signature
+        self.reload()
+        return True
+    
+    def start(self) -> None:
+        """Start the background file watcher (no-op if disabled or running)."""
+        if self.poll_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="model-reloader", daemon=True)
+        self._thread.start()
+    
+    def _watch(self) -> None:
+        """Watcher loop: poll the model file and reload on change."""
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self.check():
+                    logger.info("Reloaded model from %s", self.model_path)
+            except Exception:
+                logger.exception("Model reload from %s failed; keeping current model", self.model_path)
+    
+    def stats(self) -> dict:
+        """
+        Reload counters for monitoring.
+        
+        Returns:
+            Dictionary with reloads, failures, last_reload_at, last_error,
+            watching and poll_interval
+        """
+        return {
+            "reloads": self._reloads,
+            "failures": self._failures,
+            "last_reload_at": self._last_reload_at,
+            "last_error": self._last_error,
+            "watching": self._thread is not None,
+            "poll_interval": self.poll_interval
+        }
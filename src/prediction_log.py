@@ -0,0 +1,332 @@
+# Buffered Prediction Log
+# MLOps HW2 - Efe Çetin
+#
+# Every prediction is recorded for auditing and retraining without putting
+# disk I/O on the request path. Request threads append entries to a bounded
+# in-memory buffer; a background thread serializes them in batches to
+# JSONL files (optionally gzip-compressed) that rotate by size and age.
+# A file is written as <name>.part and renamed once complete, so readers
+# only ever see finished files.
+
+import atexit
+import gzip
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from src.json_provider import dumps
+
+logger = logging.getLogger(__name__)
+
+# What log() does when the buffer is full
+POLICIES = ("drop", "block")
+
+# gzip level: most of level 9's ratio on JSONL at a fraction of the CPU
+COMPRESS_LEVEL = 6
+
+
+class _ColumnBatch:
+    """Records of a columnar batch, expanded into rows by the writer."""
+    
+    __slots__ = ("common", "columns", "size")
+    
+    def __init__(self, common: dict, columns: dict):
+        self.common = common
+        self.columns = columns
+        self.size = len(next(iter(columns.values()))) if columns else 0
+    
+    def records(self):
+        """Yield one record dict per row."""
+        names = list(self.columns)
+        values = [_column_values(self.columns[name]) for name in names]
+        for row in zip(*values):
+            yield {**self.common, **dict(zip(names, row))}
+
+
+def _column_values(column) -> list:
+    """Column as a list of JSON values (NaN becomes None)."""
+    values = column.tolist() if hasattr(column, "tolist") else list(column)
+    if values and isinstance(values[0], float):
+        values = [None if isinstance(v, float) and math.isnan(v) else v for v in values]
+    return values
+
+
+class PredictionLogger:
+    """
+    Non-blocking, batched writer of prediction records.
+    
+    The buffer holds up to capacity records; an entry is one record
+    (log), or all records of one batch request (log_batch, log_columns).
+    An entry that does not fit is only accepted into an empty buffer, so
+    memory is bounded by capacity records or one batch. When it does not
+    fit, the "drop" policy discards the new entry and the "block" policy
+    waits up to block_timeout seconds for space before dropping it.
+    
+    Records are dicts serialized by the writer thread, so callers must
+    not modify them after logging.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        capacity: int = 10000,
+        policy: str = "drop",
+        block_timeout: float = 1.0,
+        flush_interval: float = 1.0,
+        flush_records: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: float = 3600.0,
+        compress: bool = False
+    ):
+        """
+        Initialize the logger (the writer thread starts on first use).
+        
+        Args:
+            directory: Directory for the JSONL files
+            capacity: Most buffered records
+            policy: "drop" or "block" when the buffer is full
+            block_timeout: Longest a "block" producer waits for space
+            flush_interval: Longest a record waits before being written
+            flush_records: Buffered records that trigger an early flush
+            max_bytes: Uncompressed bytes after which a file is rotated
+            max_age: Seconds after which a file is rotated
+            compress: Write .jsonl.gz instead of .jsonl
+        
+        Raises:
+            ValueError: If policy is unknown or capacity is not positive
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy} (choose from {', '.join(POLICIES)})")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        
+        self.directory = directory
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._buffer = deque()
+        self._pending = 0  # records in _buffer
+        self._closing = False
+        self._thread = None
+        self._pid = None
+        
+        # Current output file, owned by the writer thread
+        self._file = None
+        self._path = None
+        self._file_bytes = 0
+        self._opened_at = 0.0
+        self._seq = 0
+        
+        self.logged = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.flushed = 0
+        self.write_errors = 0
+        self.files = 0
+    
+    def log(self, record: dict) -> bool:
+        """
+        Queue one prediction record.
+        
+        Args:
+            record: JSON-compatible dict
+        
+        Returns:
+            True if queued, False if dropped
+        """
+        return self._put(record, 1)
+    
+    def log_batch(self, records: list) -> bool:
+        """Queue the records of one batch request as a single entry."""
+        return self._put(records, len(records)) if records else True
+    
+    def log_columns(self, common: dict, columns: dict) -> bool:
+        """
+        Queue a columnar batch as a single entry.
+        
+        The writer turns row i into {**common, name: columns[name][i], ...},
+        so per-row dicts are never built on the request thread.
+        
+        Args:
+            common: Fields shared by every record (timestamp, version, ...)
+            columns: Equal-length arrays or lists keyed by field name
+        
+        Returns:
+            True if queued, False if dropped
+        """
+        batch = _ColumnBatch(common, columns)
+        return self._put(batch, batch.size) if batch.size else True
+    
+    def _put(self, entry, records: int) -> bool:
+        """Append an entry, applying the full-buffer policy."""
+        self._ensure_writer()
+        
+        def fits():
+            return not self._buffer or self._pending + records <= self.capacity
+        
+        with self._lock:
+            if not fits() and not self._closing:
+                if self.policy == "drop":
+                    self.dropped += records
+                    return False
+                self.blocked += 1
+                self._not_full.wait_for(lambda: fits() or self._closing, self.block_timeout)
+            if not fits() or self._closing:
+                self.dropped += records
+                return False
+            
+            self._buffer.append(entry)
+            self.logged += records
+            self._pending += records
+            if self._pending >= self.flush_records:
+                self._not_empty.notify()
+        return True
+    
+    def _ensure_writer(self) -> None:
+        """Start the writer thread, again after a fork if needed."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Threads and open files do not carry over a fork, so
+                # every worker writes its own files
+                self._buffer = deque()
+                self._pending = 0
+                self._file = None
+                self._thread = threading.Thread(
+                    target=self._run, name="prediction-log", daemon=True
+                )
+                self._thread.start()
+                if self._pid is None:
+                    atexit.register(self.close)
+                self._pid = pid
+    
+    def _run(self) -> None:
+        """Writer loop: wait for a batch or the flush interval, then write."""
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + self.flush_interval
+                while self._pending < self.flush_records and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait(remaining)
+                entries, self._buffer = self._buffer, deque()
+                self._pending = 0
+                closing = self._closing
+                self._not_full.notify_all()
+            
+            if entries:
+                self._write(entries)
+            if self._file is not None and (
+                closing or time.monotonic() - self._opened_at >= self.max_age
+            ):
+                self._rotate()
+            if closing:
+                return
+    
+    def _write(self, entries) -> None:
+        """Serialize entries and append them to the current file."""
+        lines = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                lines.append(dumps(entry))
+            else:
+                records = entry.records() if isinstance(entry, _ColumnBatch) else entry
+                lines.extend(dumps(record) for record in records)
+        data = ("\n".join(lines) + "\n").encode()
+        
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+        except OSError:
+            logger.exception("Writing %d prediction records to %s failed", len(lines), self.directory)
+            with self._lock:
+                self.write_errors += 1
+                self.dropped += len(lines)
+            return
+        
+        self._file_bytes += len(data)
+        with self._lock:
+            self.flushed += len(lines)
+        if self._file_bytes >= self.max_bytes:
+            self._rotate()
+    
+    def _open(self) -> None:
+        """Start a new .part file."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._seq += 1
+        name = f"predictions-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._seq:04d}.jsonl"
+        self._path = os.path.join(self.directory, name + (".gz" if self.compress else ""))
+        part = self._path + ".part"
+        if self.compress:
+            self._file = gzip.open(part, "wb", compresslevel=COMPRESS_LEVEL)
+        else:
+            self._file = open(part, "wb")
+        self._file_bytes = 0
+        self._opened_at = time.monotonic()
+    
+    def _rotate(self) -> None:
+        """Close the current file and give it its final name."""
+        try:
+            self._file.close()
+            os.replace(self._path + ".part", self._path)
+            self.files += 1
+        except OSError:
+            logger.exception("Closing prediction log %s failed", self._path)
+            self.write_errors += 1
+        self._file = None
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Flush buffered records, finish the current file and stop the writer.
+        
+        Records logged afterwards are dropped.
+        
+        Args:
+            timeout: Longest to wait for the writer
+        """
+        with self._lock:
+            self._closing = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
+    
+    def stats(self) -> dict:
+        """
+        Snapshot of logger counters.
+        
+        Returns:
+            Dictionary of counters for monitoring
+        """
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "policy": self.policy,
+                "capacity": self.capacity,
+                "buffered": self._pending,
+                "logged": self.logged,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+                "flushed": self.flushed,
+                "write_errors": self.write_errors,
+                "files": self.files,
+                "compress": self.compress
+            }
@@ -0,0 +1,243 @@
+# Sampled Request Profiling
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m src.profiling DUMP_DIR [--sort cumulative] [--limit 30]
+#
+# RequestProfiler runs cProfile on a random fraction of requests and
+# merges the results into one pstats table. At most one request per
+# process is profiled at a time, which bounds the overhead under load and
+# is required on Python 3.12+, where only one profiler can be active.
+# The API only installs its request hooks when PROFILE_SAMPLE_RATE > 0,
+# so a disabled profiler costs nothing.
+
+import argparse
+import cProfile
+import glob
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished profiles kept unmerged before the next one triggers a merge
+MERGE_EVERY = 32
+
+
+class RequestProfiler:
+    """Aggregate cProfile statistics over a sample of requests."""
+    
+    def __init__(self, sample_rate: float, dump_dir: Optional[str] = None):
+        """
+        Initialize the profiler.
+        
+        Args:
+            sample_rate: Fraction of requests to profile (0 < rate <= 1)
+            dump_dir: Directory for periodic per-process .prof dumps
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        
+        self.sample_rate = sample_rate
+        self.dump_dir = dump_dir
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._merged: Optional[pstats.Stats] = None
+        self._thread = None
+        
+        self.profiled = 0
+        self.skipped_busy = 0
+        self.last_dump_at: Optional[float] = None
+    
+    def start(self) -> Optional[cProfile.Profile]:
+        """
+        Possibly start profiling the current request.
+        
+        Returns:
+            The running profile to pass to stop(), or None if this
+            request is not sampled or another one is being profiled
+        """
+        if random.random() >= self.sample_rate:
+            return None
+        if not self._active.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) owns the interpreter hook
+            self._active.release()
+            self.skipped_busy += 1
+            return None
+        return profile
+    
+    def stop(self, profile: cProfile.Profile) -> None:
+        """
+        Stop a profile returned by start() and queue it for aggregation.
+        
+        Args:
+            profile: The running profile
+        """
+        profile.disable()
+        self._active.release()
+        with self._lock:
+            self._pending.append(profile)
+            self.profiled += 1
+            if len(self._pending) >= MERGE_EVERY:
+                self._merge()
+    
+    def _merge(self) -> Optional[pstats.Stats]:
+        """Fold pending profiles into the aggregate (lock held)."""
+        if self._pending:
+            if self._merged is None:
+                self._merged = pstats.Stats(self._pending[0])
+                self._merged.add(*self._pending[1:])
+            else:
+                self._merged.add(*self._pending)
+            self._pending = []
+        return self._merged
+    
+    def raw_stats(self) -> dict:
+        """
+        Aggregated statistics in pstats' internal form.
+        
+        Returns:
+            Copy of the pstats dict ({} before any request is profiled);
+            marshal.dumps of it is a .prof file pstats and snakeviz read
+        """
+        with self._lock:
+            merged = self._merge()
+            return dict(merged.stats) if merged is not None else {}
+    
+    def report(self, sort: str = "cumulative", limit: int = 30) -> str:
+        """
+        Human-readable table of the aggregated statistics.
+        
+        Args:
+            sort: pstats sort key (cumulative, tottime, calls, ...)
+            limit: Most functions listed
+        
+        Returns:
+            pstats text output
+        
+        Raises:
+            KeyError: If sort is not a pstats sort key
+        """
+        out = io.StringIO()
+        with self._lock:
+            merged = self._merge()
+            if merged is None:
+                return "No requests profiled yet\n"
+            merged.stream = out
+            merged.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+    
+    def reset(self) -> None:
+        """Discard all collected statistics."""
+        with self._lock:
+            self._pending = []
+            self._merged = None
+            self.profiled = 0
+            self.skipped_busy = 0
+    
+    def dump(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write the aggregated statistics as a .prof file.
+        
+        Args:
+            path: Output file (default: profile-<pid>.prof in dump_dir)
+        
+        Returns:
+            The path written, or None if there was nothing to write
+        """
+        stats = self.raw_stats()
+        if not stats:
+            return None
+        if path is None:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, f"profile-{os.getpid()}.prof")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump(stats, f)
+        os.replace(tmp, path)
+        self.last_dump_at = time.time()
+        return path
+    
+    def start_dumper(self, interval: float) -> None:
+        """Dump to dump_dir every interval seconds (no-op without dump_dir)."""
+        if not self.dump_dir or interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._dump_loop, args=(interval,), name="profile-dumper", daemon=True
+        )
+        self._thread.start()
+    
+    def _dump_loop(self, interval: float) -> None:
+        """Dumper loop; a failed write is logged and retried next time."""
+        while True:
+            time.sleep(interval)
+            try:
+                self.dump()
+            except Exception:
+                logger.exception("Writing profile to %s failed", self.dump_dir)
+    
+    def summary(self) -> dict:
+        """
+        Profiler counters for monitoring.
+        
+        Returns:
+            Dictionary with sample_rate, profiled, skipped_busy, dump_dir
+            and last_dump_at
+        """
+        return {
+            "sample_rate": self.sample_rate,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "dump_dir": self.dump_dir,
+            "last_dump_at": self.last_dump_at
+        }
+
+
+def load_dumps(dump_dir: str) -> Optional[pstats.Stats]:
+    """
+    Merge every worker's .prof file in a dump directory.
+    
+    Args:
+        dump_dir: Directory written by RequestProfiler.dump
+    
+    Returns:
+        Combined statistics, or None if the directory has no dumps
+    """
+    paths = sorted(glob.glob(os.path.join(dump_dir, "*.prof")))
+    if not paths:
+        return None
+    return pstats.Stats(*paths)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Print merged request profiles from all workers")
+    parser.add_argument("dump_dir", help="PROFILE_DUMP_DIR of the service")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key")
+    parser.add_argument("--limit", type=int, default=30, help="Most functions listed")
+    args = parser.parse_args(argv)
+    
+    stats = load_dumps(args.dump_dir)
+    if stats is None:
+        print(f"No .prof files in {args.dump_dir}", file=sys.stderr)
+        return 1
+    stats.stream = sys.stdout
+    stats.sort_stats(args.sort).print_stats(args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+# Multi-Model Registry with Shadow Scoring
+# MLOps HW2 - Efe Çetin
+#
+# ModelRegistry holds several loaded models under labels. One is the
+# primary that answers requests; the others are candidates. A sampled
+# fraction of requests is handed to a background thread together with
+# the feature rows and primary predictions already computed, and every
+# candidate scores the same rows there. Per-model latency and the rate
+# at which each candidate agrees with the primary show whether a
+# candidate is ready to be promoted, without a separate deployment.
+# Call latencies go to thread-local metric shards, so timing a request
+# takes no process-wide lock.
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.metrics import LATENCY_BUCKETS, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Niceness of the shadow thread where the OS supports per-thread priority
+SHADOW_NICE = 19
+
+
+class _ModelStats:
+    """Agreement counters of one registered model (shadow thread only)."""
+    
+    __slots__ = ("compared", "agreed", "errors")
+    
+    def __init__(self):
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+
+
+def _bucket_percentile(bounds: tuple, counts: list, q: float) -> Optional[float]:
+    """
+    Percentile estimated from histogram buckets (None if empty).
+    
+    Interpolates linearly inside the bucket holding the rank, like
+    Prometheus' histogram_quantile; ranks in the +Inf bucket return the
+    largest finite bound.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q / 100.0 * total
+    below = 0
+    for i, count in enumerate(counts):
+        if count and below + count >= rank:
+            if i == len(bounds):
+                return bounds[-1]
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - below) / count
+        below += count
+    return bounds[-1]
+
+
+def _every(values, step: int):
+    """Every step-th item, copied so the source can be freed."""
+    sample = values[::step]
+    # A NumPy slice is a view that would keep the whole matrix alive
+    return sample.copy() if getattr(sample, "base", None) is not None else sample
+
+
+class ModelRegistry:
+    """
+    Labeled models with one primary and shadow-scored candidates.
+    
+    The model table is replaced as a whole on every change, so readers
+    take no lock. shadow() never blocks the caller: a sampled request is
+    queued for the shadow thread, and dropped (and counted) if the queue
+    already holds max_queue_rows rows. Requests larger than max_rows are
+    down-sampled to an evenly spaced copy of max_rows rows, so a queued
+    item never keeps a large request matrix alive.
+    
+    Candidates score the primary's feature rows, so they must use the
+    same feature columns; a missing numeric field is filled with the
+    primary's default.
+    
+    Each registered model carries its label as registry_label, so
+    label_of() is a lookup rather than a scan.
+    """
+    
+    def __init__(
+        self,
+        shadow_sample_rate: float = 0.0,
+        max_queue_rows: int = 10000,
+        max_rows: int = 1000,
+        on_score: Optional[Callable[[str, float, int], None]] = None,
+        on_primary: Optional[Callable[[object], None]] = None
+    ):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            shadow_sample_rate: Fraction of requests scored by every
+                candidate (0 disables shadow scoring)
+            max_queue_rows: Rows waiting for the shadow thread before
+                new requests are dropped
+            max_rows: Most rows of one request that are shadow-scored
+            on_score: Called with (label, seconds, rows) for every timed
+                model call, e.g. to feed a metrics histogram
+            on_primary: Called with the new primary model whenever it
+                changes, under the registry lock, so the serving path
+                always routes to the registry's primary
+        """
+        if not 0 <= shadow_sample_rate <= 1:
+            raise ValueError("shadow_sample_rate must be in [0, 1]")
+        
+        self.shadow_sample_rate = shadow_sample_rate
+        self.max_queue_rows = max_queue_rows
+        self.max_rows = max_rows
+        self.on_score = on_score
+        self.on_primary = on_primary
+        
+        self._lock = threading.Lock()
+        self._models: Dict[str, object] = {}
+        self._primary: Optional[str] = None
+        self._candidates: tuple = ()
+        self._stats: Dict[str, _ModelStats] = {}
+        # Per-model calls, rows and latency histogram
+        self._calls = MetricsRegistry(namespace="registry")
+        self._calls.counter("calls", "Timed model calls")
+        self._calls.counter("rows", "Rows scored by timed calls")
+        self._calls.histogram("seconds", "Latency of timed model calls")
+        
+        self._queue = queue.Queue()
+        self._queued_rows = 0
+        self._thread = None
+        self._pid = None
+        
+        self.shadow_requests = 0
+        self.shadow_rows = 0
+        self.shadow_dropped = 0
+    
+    @property
+    def primary_label(self) -> Optional[str]:
+        """Label of the primary model (None while empty)."""
+        return self._primary
+    
+    @property
+    def primary(self):
+        """The primary model, or None while empty."""
+        return self._models.get(self._primary)
+    
+    @property
+    def candidates(self) -> tuple:
+        """Labels of the shadow-scored models."""
+        return self._candidates
+    
+    @property
+    def shadowing(self) -> bool:
+        """Whether requests may be shadow-scored (candidates and a rate above 0)."""
+        return bool(self._candidates) and self.shadow_sample_rate > 0
+    
+    def get(self, label: str):
+        """
+        Look up a model by label.
+        
+        Raises:
+            KeyError: If no model has that label
+        """
+        return self._models[label]
+    
+    def register(self, label: str, model, primary: bool = False) -> None:
+        """
+        Add or replace a model.
+        
+        The first model registered becomes the primary. Replacing or
+        changing the primary resets the candidates' agreement counts,
+        which are only meaningful against one primary.
+        
+        Args:
+            label: Name of the model (e.g. its release version)
+            model: Loaded FlightDelayModel
+            primary: Serve it instead of the current primary
+        
+        Raises:
+            ValueError: If its feature columns differ from the other models'
+        """
+        with self._lock:
+            for other_label, other in self._models.items():
+                if other_label != label and list(other.feature_columns) != list(model.feature_columns):
+                    raise ValueError(
+                        f"Model {label} uses feature columns {model.feature_columns}, "
+                        f"but {other_label} uses {other.feature_columns}"
+                    )
+            models = dict(self._models)
+            models[label] = model
+            model.registry_label = label
+            self._stats.setdefault(label, _ModelStats())
+            if primary or self._primary is None or label == self._primary:
+                self._set_primary(models, label)
+            else:
+                self._models = models
+                self._candidates = tuple(sorted(m for m in models if m != self._primary))
+    
+    def set_primary(self, label: str) -> None:
+        """
+        Route traffic to another registered model.
+        
+        The previous primary becomes a candidate.
+        
+        Raises:
+            KeyError: If no model has that label
+        """
+        with self._lock:
+            if label not in self._models:
+                raise KeyError(label)
+            self._set_primary(dict(self._models), label)
+    
+    def remove(self, label: str) -> None:
+        """
+        Drop a candidate model.
+        
+        Raises:
+            KeyError: If no model has that label
+            ValueError: If it is the primary
+        """
+        with self._lock:
+            if label == self._primary:
+                raise ValueError("Cannot remove the primary model")
+            models = dict(self._models)
+            del models[label]
+            self._models = models
+            self._stats.pop(label, None)
+            self._candidates = tuple(sorted(m for m in models if m != self._primary))
+    
+    def _set_primary(self, models: dict, label: str) -> None:
+        """Publish a new table with label as primary (lock held)."""
+        for candidate in models:
+            stats = self._stats.setdefault(candidate, _ModelStats())
+            stats.compared = stats.agreed = 0
+        self._models = models
+        self._primary = label
+        self._candidates = tuple(sorted(m for m in models if m != label))
+        if self.on_primary is not None:
+            self.on_primary(models[label])
+    
+    def label_of(self, model) -> Optional[str]:
+        """Label a model is registered under (None if it is not, or no longer)."""
+        label = getattr(model, "registry_label", None)
+        return label if self._models.get(label) is model else None
+    
+    def observe(self, label: str, seconds: float, rows: int) -> None:
+        """
+        Record one timed call of a model, without taking a lock.
+        
+        Calls for unregistered labels (None included) are ignored.
+        
+        Args:
+            label: Model label
+            seconds: Wall time of the call
+            rows: Rows scored
+        """
+        if label not in self._models:
+            return
+        labels = (("model", label),)
+        self._calls.inc("calls", labels)
+        self._calls.inc("rows", labels, rows)
+        self._calls.observe("seconds", seconds, labels)
+        if self.on_score is not None:
+            self.on_score(label, seconds, rows)
+    
+    def shadow(self, rows, predictions, label: Optional[str] = None) -> bool:
+        """
+        Possibly queue a scored request for the candidates.
+        
+        Args:
+            rows: Feature rows given to the primary (list or matrix)
+            predictions: The primary's predicted classes for those rows
+            label: Model that produced them (default: the primary); rows
+                scored by a model that is no longer primary are not
+                compared
+        
+        Returns:
+            True if the request was sampled and queued
+        """
+        if not self._candidates or random.random() >= self.shadow_sample_rate:
+            return False
+        primary = self._primary if label is None else label
+        if primary != self._primary:
+            return False
+        
+        if len(rows) > self.max_rows:
+            step = -(-len(rows) // self.max_rows)
+            rows, predictions = _every(rows, step), _every(predictions, step)
+        n = len(rows)
+        self._ensure_worker()
+        with self._lock:
+            if self._queued_rows + n > self.max_queue_rows:
+                self.shadow_dropped += 1
+                return False
+            self._queued_rows += n
+            self.shadow_requests += 1
+            self.shadow_rows += n
+        self._queue.put((rows, predictions, primary))
+        return True
+    
+    def drain(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every queued shadow request has been scored.
+        
+        Returns:
+            True if the queue emptied within timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+    
+    def _ensure_worker(self) -> None:
+        """Start the shadow thread, again after a fork if needed."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Threads do not survive fork(), so pre-forked workers
+                # each start their own on first use
+                self._queue = queue.Queue()
+                self._queued_rows = 0
+                self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                self._thread.start()
+                self._pid = pid
+    
+    def _run(self) -> None:
+        """Shadow loop: score each queued request with every candidate."""
+        import numpy as np
+        
+        try:
+            # Lowest CPU priority for this thread (Linux), so request
+            # threads win whenever both are runnable
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SHADOW_NICE)
+        except (AttributeError, OSError):
+            pass
+        
+        q = self._queue
+        while True:
+            rows, predictions, primary = q.get()
+            try:
+                X = np.asarray(rows, dtype=np.float64)
+                expected = np.asarray(predictions)
+                for label in self._candidates:
+                    self._score_candidate(label, X, expected, primary)
+            except Exception:
+                logger.exception("Shadow scoring failed")
+            finally:
+                with self._lock:
+                    self._queued_rows -= len(rows)
+                q.task_done()
+    
+    def _score_candidate(self, label: str, X, expected, primary: Optional[str]) -> None:
+        """Time one candidate on X and count its agreement with the primary."""
+        model = self._models.get(label)
+        stats = self._stats.get(label)
+        if model is None or stats is None or label == primary:
+            return
+        
+        start = time.perf_counter()
+        try:
+            predicted = model.predict_batch(X)
+        except Exception:
+            logger.exception("Shadow model %s failed", label)
+            with self._lock:
+                stats.errors += 1
+            return
+        self.observe(label, time.perf_counter() - start, len(X))
+        
+        with self._lock:
+            # Skip if the primary changed while this request was queued
+            if primary == self._primary:
+                stats.compared += len(X)
+                stats.agreed += int((predicted == expected).sum())
+    
+    def stats(self) -> dict:
+        """
+        Per-model and shadow-queue statistics.
+        
+        Returns:
+            Dictionary with primary, shadow settings and counters, and a
+            models entry mapping each label to its version, role, calls,
+            rows, mean/p50/p99 call latency in ms (percentiles estimated
+            from histogram buckets), mean per-row latency in us and, for
+            candidates, rows compared, agreement_rate and errors
+        """
+        with self._lock:
+            models = self._models
+            snapshot = {
+                label: (stats.compared, stats.agreed, stats.errors)
+                for label, stats in self._stats.items() if label in models
+            }
+        timed = self._calls.snapshot()
+        
+        report = {}
+        for label, (compared, agreed, errors) in sorted(snapshot.items()):
+            labels = (("model", label),)
+            calls = int(timed["counters"].get(("calls", labels), 0))
+            rows = int(timed["counters"].get(("rows", labels), 0))
+            counts, seconds, _ = timed["histograms"].get(("seconds", labels), ([], 0.0, 0))
+            p50 = _bucket_percentile(LATENCY_BUCKETS, counts, 50)
+            p99 = _bucket_percentile(LATENCY_BUCKETS, counts, 99)
+            entry = {
+                "version": getattr(models[label], "version", None),
+                "role": "primary" if label == self._primary else "shadow",
+                "calls": calls,
+                "rows": rows,
+                "mean_ms": seconds / calls * 1000 if calls else None,
+                "p50_ms": p50 * 1000 if p50 is not None else None,
+                "p99_ms": p99 * 1000 if p99 is not None else None,
+                "us_per_row": seconds / rows * 1e6 if rows else None
+            }
+            if label != self._primary:
+                entry.update({
+                    "compared_rows": compared,
+                    "agreement_rate": agreed / compared if compared else None,
+                    "errors": errors
+                })
+            report[label] = entry
+        
+        return {
+            "primary": self._primary,
+            "shadow_sample_rate": self.shadow_sample_rate,
+            "shadow_requests": self.shadow_requests,
+            "shadow_rows": self.shadow_rows,
+            "shadow_dropped": self.shadow_dropped,
+            "shadow_queue_depth": self._queue.qsize(),
+            "shadow_queued_rows": self._queued_rows,
+            "models": report
+        }
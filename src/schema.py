@@ -0,0 +1,69 @@
+# Request Schema for Flight Payloads
+# MLOps HW2 - Efe Çetin
+#
+# One pass over a fixed field list validates a flight and coerces its
+# numeric fields to float, replacing the per-endpoint required-field loops.
+
+import math
+
+from src.feature_engineering import NUMERIC_FEATURE_FIELDS
+
+# Route codes, hashed by extract_features
+ROUTE_FIELDS = ("origin", "dest", "airline")
+
+# Optional numeric fields (None when omitted)
+NUMERIC_FIELDS = tuple(NUMERIC_FEATURE_FIELDS.values())
+
+
+class ValidationError(ValueError):
+    """Raised when a request payload does not match the flight schema."""
+
+
+def _coerce_number(field: str, value) -> float:
+    """Coerce a JSON number or numeric string to a finite float."""
+    if isinstance(value, bool):
+        raise ValidationError(f"Invalid numeric value for {field}: {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid numeric value for {field}: {value!r}")
+    if not math.isfinite(number):
+        raise ValidationError(f"Invalid numeric value for {field}: {value!r}")
+    return number
+
+
+def parse_flight(data, require_route: bool = True) -> dict:
+    """
+    Validate one flight payload and normalize its fields.
+    
+    Args:
+        data: Parsed JSON value for a single flight
+        require_route: Reject payloads missing a route code; when False
+            missing codes become "" (hashed to bucket 0)
+    
+    Returns:
+        Dictionary with every ROUTE_FIELDS value as a string and every
+        NUMERIC_FIELDS value as a float or None. Unknown keys are dropped.
+    
+    Raises:
+        ValidationError: If data is not an object, a route code is
+            missing or not a string, or a numeric field is not numeric
+    """
+    if not isinstance(data, dict):
+        raise ValidationError("Flight must be a JSON object")
+    
+    flight = {}
+    for field in ROUTE_FIELDS:
+        value = data.get(field)
+        if value is None:
+            if require_route:
+                raise ValidationError(f"Missing required field: {field}")
+            value = ""
+        elif not isinstance(value, str):
+            raise ValidationError(f"Field {field} must be a string")
+        flight[field] = value
+    
+    for field in NUMERIC_FIELDS:
+        value = data.get(field)
+        flight[field] = None if value is None else _coerce_number(field, value)
+    return flight
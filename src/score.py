@@ -0,0 +1,284 @@
+# Offline Batch Scoring over CSV / Parquet Files
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m src.score flights.csv scored.csv [--workers N] [--chunk-size ROWS]
+#
+# The input is read in chunks, and each chunk is scored in vectorized form
+# (build_feature_matrix + predict_proba_batch) by a process pool whose
+# workers each load the model once. Results are written in input order as
+# soon as the chunk at the head of the window is done, so memory stays
+# bounded by workers * chunk size regardless of file size. Parquet needs
+# pyarrow; CSV needs nothing beyond pandas.
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import DELAY_LABELS, build_feature_matrix
+from src.model import FlightDelayModel, model_path as configured_model_path
+from src.schema import NUMERIC_FIELDS, ROUTE_FIELDS
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Source column names (BTS on-time data, the model's own columns) mapped
+# to the request field names build_feature_matrix reads
+COLUMN_ALIASES = {
+    'ORIGIN': 'origin',
+    'DEST': 'dest',
+    'AIRLINE': 'airline',
+    'OP_CARRIER': 'airline',
+    'OP_UNIQUE_CARRIER': 'airline',
+    'CRS_DEP_TIME': 'dep_time',
+    'CRS_ARR_TIME': 'arr_time',
+    'CRS_ELAPSED_TIME': 'elapsed_time',
+    'DISTANCE': 'distance'
+}
+
+# Model loaded once per pool worker by _init_worker
+_worker_model: Optional[FlightDelayModel] = None
+
+
+def _file_format(path: str) -> str:
+    """'parquet' or 'csv' from the file extension."""
+    return 'parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def _require_pyarrow():
+    """Import pyarrow.parquet or fail with an install hint."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet input/output requires pyarrow (pip install pyarrow)")
+    return pq
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV or Parquet file as DataFrames of at most chunk_size rows.
+    
+    Args:
+        path: Input file
+        chunk_size: Rows per chunk
+    
+    Yields:
+        One DataFrame per chunk
+    """
+    if _file_format(path) == 'parquet':
+        pq = _require_pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # Airport and airline codes must stay strings ("NA" is not missing);
+        # numeric fields are float64 in every chunk, blank or not
+        dtypes = {}
+        for field in (*ROUTE_FIELDS, *NUMERIC_FIELDS):
+            dtype = str if field in ROUTE_FIELDS else np.float64
+            for name in (field, *[alias for alias, f in COLUMN_ALIASES.items() if f == field]):
+                dtypes[name] = dtype
+        yield from pd.read_csv(
+            path, chunksize=chunk_size, dtype=dtypes, keep_default_na=False,
+            na_values=['']
+        )
+
+
+def empty_frame(path: str) -> pd.DataFrame:
+    """
+    The columns of a CSV or Parquet file, with no rows.
+    
+    Args:
+        path: Input file
+    
+    Returns:
+        Empty DataFrame with the file's columns and (for Parquet) dtypes
+    """
+    if _file_format(path) == 'parquet':
+        pq = _require_pyarrow()
+        return pq.read_schema(path).empty_table().to_pandas()
+    return pd.read_csv(path, nrows=0)
+
+
+def score_frame(model: FlightDelayModel, frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score one chunk of flights.
+    
+    Args:
+        model: Loaded model
+        frame: Flights using request field names or COLUMN_ALIASES names
+    
+    Returns:
+        The input columns plus prediction, prediction_label and one
+        prob_<class> column per entry of model.classes
+    """
+    renamed = frame.rename(columns={
+        name: field for name, field in COLUMN_ALIASES.items()
+        if name in frame.columns and field not in frame.columns
+    })
+    for field in ('origin', 'dest', 'airline'):
+        if field not in renamed:
+            raise ValueError(f"Missing required column: {field}")
+    
+    X = build_feature_matrix(renamed, model.feature_columns, model.feature_defaults)
+    proba = model.predict_proba_batch(X)
+    classes = np.asarray(model.classes)
+    prediction = classes[proba.argmax(axis=1)] if len(proba) else np.empty(0, dtype=np.int64)
+    
+    out = frame.copy()
+    out['prediction'] = prediction
+    out['prediction_label'] = np.array([DELAY_LABELS[p] for p in prediction], dtype=object)
+    for j, cls in enumerate(model.classes):
+        out[f'prob_{cls}'] = proba[:, j]
+    return out
+
+
+def _init_worker(model_path: str) -> None:
+    """Pool initializer: load the model once per worker process."""
+    global _worker_model
+    _worker_model = FlightDelayModel(model_path)
+
+
+def _score_chunk(frame: pd.DataFrame) -> pd.DataFrame:
+    """Score a chunk with this worker's model."""
+    return score_frame(_worker_model, frame)
+
+
+class _ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.format = _file_format(path)
+        self._parquet = None
+        self._schema = None
+        self._wrote_header = False
+    
+    def write(self, frame: pd.DataFrame) -> None:
+        """Append one chunk."""
+        if self.format == 'parquet':
+            pq = _require_pyarrow()
+            import pyarrow as pa
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                # Empty object columns infer as null; every one here is text
+                self._schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ], metadata=table.schema.metadata)
+                self._parquet = pq.ParquetWriter(self.path, self._schema)
+            # pandas infers dtypes per chunk; the file keeps the first chunk's
+            self._parquet.write_table(table.cast(self._schema))
+        else:
+            frame.to_csv(self.path, mode='a' if self._wrote_header else 'w',
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+    
+    def close(self) -> None:
+        """Flush and close the output."""
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: Optional[str] = None,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    log=None
+) -> dict:
+    """
+    Score every flight in input_path and write the results to output_path.
+    
+    Args:
+        input_path: CSV or Parquet file of flights
+        output_path: CSV or Parquet file to write (by extension)
+        model_path: Pickled model bundle or artifact directory; defaults
+            to the server's MODEL_PATH (src.model.model_path)
+        workers: Scoring processes; 1 scores in this process
+        chunk_size: Rows per chunk handed to a worker
+        log: Optional stream for per-chunk progress lines
+    
+    Returns:
+        Dictionary with rows, chunks, seconds and rows_per_second
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    model_path = model_path or configured_model_path()
+    
+    start = time.perf_counter()
+    rows = chunks = 0
+    model = None
+    writer = _ChunkWriter(output_path)
+    
+    def emit(scored: pd.DataFrame) -> None:
+        nonlocal rows, chunks
+        writer.write(scored)
+        rows += len(scored)
+        chunks += 1
+        if log is not None:
+            elapsed = time.perf_counter() - start
+            print(f"chunk {chunks}: {rows} rows, {rows / elapsed:,.0f} rows/s", file=log)
+    
+    try:
+        if workers <= 1:
+            model = FlightDelayModel(model_path)
+            for frame in read_chunks(input_path, chunk_size):
+                emit(score_frame(model, frame))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(model_path,)
+            ) as pool:
+                # Bounded window keeps output ordered and memory flat
+                pending = deque()
+                for frame in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(_score_chunk, frame))
+                    if len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+        
+        if chunks == 0:
+            # Empty input: still write a valid file with the output columns
+            writer.write(score_frame(model or FlightDelayModel(model_path), empty_frame(input_path)))
+    finally:
+        writer.close()
+    
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of flights offline")
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--model", help="Model pickle or artifact directory (default: MODEL_PATH)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Scoring processes (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--quiet", action="store_true", help="No per-chunk progress")
+    args = parser.parse_args(argv)
+    
+    result = score_file(
+        args.input, args.output, model_path=args.model, workers=args.workers,
+        chunk_size=args.chunk_size, log=None if args.quiet else sys.stderr
+    )
+    print(
+        f"Scored {result['rows']} rows in {result['seconds']:.2f}s "
+        f"({result['rows_per_second']:,.0f} rows/s, {args.workers} workers)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# Out-of-Core Training of the Model Bundle
+# MLOps HW2 - Efe Çetin
+#
+# Usage: python -m src.train flights.csv model/flight_delay_model.pkl [--epochs N] [--workers N]
+#
+# The flights file is streamed in chunks and never held in memory.
+# Pass 1 fits the StandardScaler with partial_fit; each following epoch
+# streams the file again and updates an SGDClassifier (logistic loss)
+# with partial_fit on the scaled chunk. Chunk preprocessing
+# (build_feature_matrix + categorize_delay_batch) optionally runs in a
+# process pool; chunks are consumed in file order through a bounded
+# window, so memory stays at about workers * chunk size rows. The result is
+# the same {model, scaler, feature_columns} bundle FlightDelayModel loads,
+# plus the hash scheme and bucket counts the features were built with.
+
+import argparse
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.feature_engineering import (
+    HASH_BUCKETS,
+    HASH_SCHEMES,
+    build_feature_matrix,
+    categorize_delay_batch,
+    get_hash_scheme,
+    set_hash_scheme
+)
+from src.score import COLUMN_ALIASES, DEFAULT_CHUNK_SIZE, read_chunks
+
+# Model input layout, same as the shipped bundle
+FEATURE_COLUMNS = [
+    'ORIGIN_HASH', 'DEST_HASH', 'AIRLINE_HASH',
+    'CRS_DEP_TIME', 'CRS_ARR_TIME', 'CRS_ELAPSED_TIME', 'DISTANCE'
+]
+
+# Delay categories (see categorize_delay)
+CLASSES = np.array([0, 1, 2])
+
+# Default column holding the arrival delay in minutes
+DEFAULT_LABEL_COLUMN = 'ARR_DELAY'
+
+
+def prepare_chunk(frame: pd.DataFrame, label_column: str, defaults: dict) -> tuple:
+    """
+    Turn one chunk of flights into a feature matrix and labels.
+    
+    Rows without a delay (cancelled or diverted flights) are dropped.
+    
+    Args:
+        frame: Flights using request field names or COLUMN_ALIASES names
+        label_column: Column with the delay in minutes
+        defaults: Values for missing numeric features; NaN keeps them
+            missing (StandardScaler.partial_fit ignores NaN)
+    
+    Returns:
+        Tuple of (X float64 matrix, y int64 labels, rows dropped)
+    
+    Raises:
+        ValueError: If a route column or the label column is missing
+    """
+    renamed = frame.rename(columns={
+        name: field for name, field in COLUMN_ALIASES.items()
+        if name in frame.columns and field not in frame.columns
+    })
+    for field in ('origin', 'dest', 'airline'):
+        if field not in renamed:
+            raise ValueError(f"Missing required column: {field}")
+    if label_column not in renamed:
+        raise ValueError(f"Missing label column: {label_column}")
+    
+    delays = pd.to_numeric(renamed[label_column], errors='coerce').to_numpy(dtype=np.float64)
+    keep = ~np.isnan(delays)
+    X = build_feature_matrix(renamed[keep], FEATURE_COLUMNS, defaults)
+    y = categorize_delay_batch(delays[keep]).astype(np.int64)
+    return X, y, int(len(delays) - keep.sum())
+
+
+def _prepare_chunk_task(args: tuple) -> tuple:
+    """Pool entry point for prepare_chunk."""
+    return prepare_chunk(*args)
+
+
+def iter_prepared(
+    path: str,
+    label_column: str,
+    defaults: dict,
+    chunk_size: int,
+    pool: Optional[ProcessPoolExecutor] = None,
+    window: int = 2
+) -> Iterator[tuple]:
+    """
+    Stream (X, y, dropped) chunks of a flights file in file order.
+    
+    Args:
+        path: CSV or Parquet file of flights
+        label_column: Column with the delay in minutes
+        defaults: See prepare_chunk
+        chunk_size: Rows per chunk
+        pool: Process pool for preprocessing; None prepares in-process
+        window: Chunks in flight in the pool
+    
+    Yields:
+        prepare_chunk results
+    """
+    if pool is None:
+        for frame in read_chunks(path, chunk_size):
+            yield prepare_chunk(frame, label_column, defaults)
+        return
+    
+    # Bounded window keeps chunk order and memory flat
+    pending = deque()
+    for frame in read_chunks(path, chunk_size):
+        pending.append(pool.submit(_prepare_chunk_task, (frame, label_column, defaults)))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def train(
+    input_path: str,
+    output_path: str,
+    epochs: int = 3,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+    label_column: str = DEFAULT_LABEL_COLUMN,
+    alpha: float = 1e-4,
+    random_state: int = 42,
+    hash_scheme: Optional[str] = None,
+    log=None
+) -> dict:
+    """
+    Train the scaler and model out of core and write the bundle.
+    
+    Args:
+        input_path: CSV or Parquet file of historical flights
+        output_path: Pickle file to write (replaced atomically)
+        epochs: Passes over the data for the classifier
+        chunk_size: Rows per chunk
+        workers: Preprocessing processes; 1 prepares in-process
+        label_column: Column with the arrival delay in minutes
+        alpha: SGDClassifier regularization strength
+        random_state: Seed for SGD and the per-chunk row shuffle
+        hash_scheme: Feature hash (key of HASH_SCHEMES) to train with
+            and record in the bundle; None uses the active scheme
+        log: Optional stream for per-pass progress lines
+    
+    Returns:
+        Dictionary with rows, dropped, epochs, seconds, rows_per_second
+        and per-pass details (seconds, rows_per_second and, for
+        training epochs, progressive accuracy: each chunk is scored
+        before the model learns from it)
+    
+    Raises:
+        ValueError: If the input has no labeled rows or options are invalid
+    """
+    if epochs < 1:
+        raise ValueError("epochs must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    
+    previous_scheme = get_hash_scheme()
+    hash_scheme = hash_scheme or previous_scheme
+    set_hash_scheme(hash_scheme)
+    
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    passes = []
+    rows = dropped = 0
+    
+    pool = ProcessPoolExecutor(
+        max_workers=workers, initializer=set_hash_scheme, initargs=(hash_scheme,)
+    ) if workers > 1 else None
+    try:
+        # Pass 1: scaler statistics; NaN marks missing numeric fields
+        missing = dict.fromkeys(FEATURE_COLUMNS, np.nan)
+        pass_start = time.perf_counter()
+        for X, _, chunk_dropped in iter_prepared(
+            input_path, label_column, missing, chunk_size, pool, 2 * workers
+        ):
+            if len(X):
+                scaler.partial_fit(X)
+            rows += len(X)
+            dropped += chunk_dropped
+        if rows == 0:
+            raise ValueError(f"No labeled rows in {input_path}")
+        passes.append(_pass_stats("scaler", rows, time.perf_counter() - pass_start, log))
+        
+        # Serving fills missing numeric fields with the scaler means too
+        defaults = dict(zip(FEATURE_COLUMNS, scaler.mean_))
+        for epoch in range(1, epochs + 1):
+            pass_start = time.perf_counter()
+            seen = correct = 0
+            for X, y, _ in iter_prepared(
+                input_path, label_column, defaults, chunk_size, pool, 2 * workers
+            ):
+                if len(X) == 0:
+                    continue
+                order = rng.permutation(len(X))
+                X, y = scaler.transform(X[order]), y[order]
+                if hasattr(model, 'coef_'):
+                    correct += int((model.predict(X) == y).sum())
+                    seen += len(y)
+                model.partial_fit(X, y, classes=CLASSES)
+            stats = _pass_stats(f"epoch {epoch}", rows, time.perf_counter() - pass_start, log)
+            stats["progressive_accuracy"] = correct / seen if seen else None
+            passes.append(stats)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        set_hash_scheme(previous_scheme)
+    
+    write_bundle({
+        'model': model,
+        'scaler': scaler,
+        'feature_columns': list(FEATURE_COLUMNS),
+        'hash_buckets': dict(HASH_BUCKETS),
+        'hash_scheme': hash_scheme
+    }, output_path)
+    
+    seconds = time.perf_counter() - start
+    processed = rows * (epochs + 1)
+    return {
+        "rows": rows,
+        "dropped": dropped,
+        "epochs": epochs,
+        "seconds": seconds,
+        "rows_per_second": processed / seconds if seconds > 0 else 0.0,
+        "passes": passes
+    }
+
+
+def _pass_stats(name: str, rows: int, seconds: float, log) -> dict:
+    """Throughput of one pass over the data, logged if log is set."""
+    stats = {
+        "pass": name,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0
+    }
+    if log is not None:
+        print(f"{name}: {rows} rows in {seconds:.2f}s ({stats['rows_per_second']:,.0f} rows/s)", file=log)
+    return stats
+
+
+def write_bundle(bundle: dict, path: str) -> None:
+    """
+    Pickle a model bundle, replacing path atomically.
+    
+    A watching server (MODEL_RELOAD_INTERVAL) never sees a partial file.
+    
+    Args:
+        bundle: Dictionary with model, scaler and feature_columns
+        path: Output pickle file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(bundle, f)
+    os.replace(tmp, path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Train the flight delay model bundle out of core")
+    parser.add_argument("input", help="Historical flights (.csv or .parquet) with an arrival delay column")
+    parser.add_argument("output", help="Model bundle pickle to write")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the data for the classifier")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Preprocessing processes (1 = in-process)")
+    parser.add_argument("--label-column", default=DEFAULT_LABEL_COLUMN,
+                        help="Arrival delay column in minutes")
+    parser.add_argument("--alpha", type=float, default=1e-4, help="SGD regularization strength")
+    parser.add_argument("--random-state", type=int, default=42, help="Random seed")
+    parser.add_argument("--hash-scheme", choices=sorted(HASH_SCHEMES), default=None,
+                        help="Feature hash to train with (default: HASH_SCHEME or md5)")
+    parser.add_argument("--quiet", action="store_true", help="No per-pass progress")
+    args = parser.parse_args(argv)
+    
+    result = train(
+        args.input, args.output, epochs=args.epochs, chunk_size=args.chunk_size,
+        workers=args.workers, label_column=args.label_column, alpha=args.alpha,
+        random_state=args.random_state, hash_scheme=args.hash_scheme,
+        log=None if args.quiet else sys.stderr
+    )
+    accuracy = result["passes"][-1]["progressive_accuracy"]
+    print(
+        f"Trained on {result['rows']} rows ({result['dropped']} without a delay dropped), "
+        f"{result['epochs']} epochs in {result['seconds']:.2f}s "
+        f"({result['rows_per_second']:,.0f} rows/s over all passes); "
+        f"last-epoch progressive accuracy {accuracy if accuracy is not None else float('nan'):.3f}"
+    )
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
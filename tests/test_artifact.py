@@ -0,0 +1,143 @@
+# Unit Tests for the mmap Model Artifact Format
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import json
+import os
+import pickle
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.artifact import export_artifact, load_artifact, is_artifact, MANIFEST_NAME
+from src.model import FlightDelayModel
+
+MODEL_PATH = os.path.join(project_root, 'model', 'flight_delay_model.pkl')
+
+
+def random_rows(n, seed=0):
+    """Random raw feature rows in the ranges the model was trained on."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, 100, n), rng.integers(0, 100, n), rng.integers(0, 20, n),
+        rng.integers(0, 2400, n), rng.integers(0, 2400, n),
+        rng.integers(30, 400, n), rng.integers(100, 3000, n)
+    ]).astype(np.float64)
+
+
+def synthetic_bundle(model, n_classes=3):
+    """Fit model + scaler on synthetic data and return a bundle dict."""
+    X = random_rows(600, seed=1)
+    y = (X[:, 3] // (2400 / n_classes)).astype(int).clip(0, n_classes - 1)
+    scaler = StandardScaler().fit(X)
+    model.fit(scaler.transform(X), y)
+    columns = ['ORIGIN_HASH', 'DEST_HASH', 'AIRLINE_HASH', 'CRS_DEP_TIME',
+               'CRS_ARR_TIME', 'CRS_ELAPSED_TIME', 'DISTANCE']
+    return {'model': model, 'scaler': scaler, 'feature_columns': columns}
+
+
+class TestModelArtifact(unittest.TestCase):
+    """Test cases for exporting and loading mmap artifacts."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+    
+    def assert_parity(self, bundle, rows):
+        """Artifact predictions should match the sklearn bundle."""
+        export_artifact(bundle, self.tmp.name)
+        loaded = load_artifact(self.tmp.name)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected_scaled = bundle['scaler'].transform(rows)
+        scaled = loaded['scaler'].transform(rows)
+        np.testing.assert_allclose(scaled, expected_scaled, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(
+            loaded['model'].predict_proba(scaled),
+            bundle['model'].predict_proba(expected_scaled),
+            rtol=0, atol=1e-10
+        )
+        np.testing.assert_array_equal(
+            loaded['model'].predict(scaled),
+            bundle['model'].predict(expected_scaled)
+        )
+    
+    def test_shipped_model_parity(self):
+        """The exported production model should match the pickle exactly."""
+        with open(MODEL_PATH, 'rb') as f:
+            bundle = pickle.load(f)
+        self.assert_parity(bundle, random_rows(5000))
+    
+    def test_binary_gradient_boosting_parity(self):
+        """Binary gradient boosting should export with log-odds init."""
+        bundle = synthetic_bundle(GradientBoostingClassifier(n_estimators=10), n_classes=2)
+        self.assert_parity(bundle, random_rows(500, seed=2))
+    
+    def test_linear_model_parity(self):
+        """Multinomial and one-vs-rest linear models should round-trip."""
+        for model in (LogisticRegression(max_iter=500), SGDClassifier(loss='log_loss', random_state=0)):
+            with self.subTest(model=type(model).__name__):
+                self.assert_parity(synthetic_bundle(model), random_rows(500, seed=3))
+    
+    def test_flight_delay_model_loads_artifact(self):
+        """FlightDelayModel.load should accept an artifact directory."""
+        with open(MODEL_PATH, 'rb') as f:
+            export_artifact(pickle.load(f), self.tmp.name)
+        
+        self.assertTrue(is_artifact(self.tmp.name))
+        self.assertFalse(is_artifact(MODEL_PATH))
+        
+        from_pickle = FlightDelayModel(MODEL_PATH)
+        from_artifact = FlightDelayModel(os.path.join(self.tmp.name, MANIFEST_NAME))
+        rows = random_rows(200)
+        self.assertEqual(from_artifact.feature_columns, from_pickle.feature_columns)
+        self.assertEqual(from_artifact.classes, from_pickle.classes)
+        self.assertEqual(
+            from_artifact.predict_batch(rows).tolist(),
+            from_pickle.predict_batch(rows).tolist()
+        )
+    
+    def test_arrays_are_memory_mapped(self):
+        """Arrays should be read-only memory maps by default."""
+        with open(MODEL_PATH, 'rb') as f:
+            export_artifact(pickle.load(f), self.tmp.name)
+        loaded = load_artifact(self.tmp.name)
+        self.assertIsInstance(loaded['model'].threshold, np.memmap)
+        self.assertFalse(loaded['model'].threshold.flags.writeable)
+        self.assertEqual(loaded['hash_buckets'], {'origin': 100, 'dest': 100, 'airline': 20})
+    
+    def test_hash_scheme_survives_export(self):
+        """The bundle's hash scheme should be kept and checked on load."""
+        bundle = synthetic_bundle(LogisticRegression(max_iter=500))
+        bundle['hash_scheme'] = 'crc32'
+        export_artifact(bundle, self.tmp.name)
+        self.assertEqual(load_artifact(self.tmp.name)['hash_scheme'], 'crc32')
+        with self.assertRaises(ValueError):
+            FlightDelayModel(self.tmp.name)
+    
+    def test_rejects_unknown_format(self):
+        """A manifest with another format version should be refused."""
+        bundle = synthetic_bundle(LogisticRegression(max_iter=500))
+        manifest_path = export_artifact(bundle, self.tmp.name)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest['format_version'] = 99
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        with self.assertRaises(ValueError):
+            load_artifact(self.tmp.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
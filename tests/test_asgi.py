@@ -0,0 +1,158 @@
+# Tests for the Async (ASGI) Serving Mode
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+import threading
+
+from werkzeug.datastructures import Headers
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tests import test_integration
+from src.asgi import AsyncApp, app as asgi_app
+
+
+class AsgiResponse:
+    """The parts of a Flask test response the integration tests read."""
+    
+    def __init__(self, status: int, headers: list, body: bytes):
+        self.status_code = status
+        self.headers = Headers([(k.decode("latin-1"), v.decode("latin-1")) for k, v in headers])
+        self.data = body
+        self.content_type = self.headers.get("content-type", "")
+        self.mimetype = self.content_type.split(";")[0].strip()
+
+
+async def call_asgi(app, method: str, path: str, body: bytes = b"", headers=None) -> AsgiResponse:
+    """Send one HTTP request through an ASGI app and collect the response."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+    }
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+    
+    async def receive():
+        return pending.pop(0) if pending else {"type": "http.disconnect"}
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app(scope, receive, send)
+    start = sent[0]
+    return AsgiResponse(start["status"], start["headers"], b"".join(m.get("body", b"") for m in sent[1:]))
+
+
+class AsgiTestClient:
+    """Minimal stand-in for Flask's test client that drives an ASGI app."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    def open(self, method: str, path: str, data=None, content_type=None, headers=None) -> AsgiResponse:
+        body = data.encode() if isinstance(data, str) else (data or b"")
+        headers = dict(headers or {})
+        if content_type:
+            headers["Content-Type"] = content_type
+        return asyncio.run(call_asgi(self.app, method, path, body, headers))
+    
+    def get(self, path: str, **kwargs) -> AsgiResponse:
+        return self.open("GET", path, **kwargs)
+    
+    def post(self, path: str, **kwargs) -> AsgiResponse:
+        return self.open("POST", path, **kwargs)
+    
+    def delete(self, path: str, **kwargs) -> AsgiResponse:
+        return self.open("DELETE", path, **kwargs)
+
+
+class TestAsyncAPIIntegration(test_integration.TestAPIIntegration):
+    """The full Flask integration suite, served through src.asgi."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up an ASGI test client."""
+        cls.client = AsgiTestClient(asgi_app)
+
+
+class TestAsyncBackpressure(unittest.TestCase):
+    """Test cases for admission control of the async executor."""
+    
+    def setUp(self):
+        """A WSGI app that blocks until released."""
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        
+        def slow_app(environ, start_response):
+            self.entered.set()
+            self.release.wait(5)
+            start_response("200 OK", [("Content-Type", "application/json")])
+            return [b'{"ok": true}']
+        
+        self.app = AsyncApp(slow_app, max_workers=1, max_queue=0, max_body_bytes=1024)
+    
+    def test_full_queue_returns_503_and_health_stays_up(self):
+        """Requests beyond capacity get 503 while /health is answered on the loop."""
+        async def scenario():
+            first = asyncio.ensure_future(call_asgi(self.app, "POST", "/predict", b"{}"))
+            while self.app.in_flight == 0:
+                await asyncio.sleep(0.001)
+            await asyncio.get_running_loop().run_in_executor(None, self.entered.wait, 5)
+            
+            rejected = await call_asgi(self.app, "POST", "/predict", b"{}")
+            health = await call_asgi(self.app, "GET", "/health")
+            self.release.set()
+            return await first, rejected, health
+        
+        first, rejected, health = asyncio.run(scenario())
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(rejected.status_code, 503)
+        self.assertEqual(rejected.headers["retry-after"], "1")
+        self.assertIn("error", json.loads(rejected.data))
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual(self.app.stats()["rejected"], 1)
+        self.assertEqual(self.app.in_flight, 0)
+    
+    def test_oversized_body_returns_413(self):
+        """Bodies above max_body_bytes are refused before dispatch."""
+        response = asyncio.run(call_asgi(self.app, "POST", "/predict", b"x" * 2048))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(self.entered.is_set())
+        self.assertEqual(self.app.in_flight, 0)
+    
+    def test_rejected_body_is_never_read(self):
+        """A request refused with 503 should not have its body received."""
+        received = []
+        sent = []
+        
+        async def receive():
+            received.append(True)
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {"type": "http", "method": "POST", "path": "/predict", "headers": []}
+        self.app.in_flight = self.app.capacity
+        try:
+            asyncio.run(self.app(scope, receive, send))
+        finally:
+            self.app.in_flight = 0
+        self.assertEqual(sent[0]["status"], 503)
+        self.assertEqual(received, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
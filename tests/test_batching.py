@@ -0,0 +1,108 @@
+# Unit Tests for Micro-Batching
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.batching import MicroBatcher
+
+
+class RecordingPredictor:
+    """Fake vectorized predictor that records the batch sizes it receives."""
+    
+    def __init__(self, block: threading.Event = None):
+        self.batch_sizes = []
+        self.block = block
+    
+    def __call__(self, rows):
+        if self.block is not None:
+            self.block.wait(5)
+        self.batch_sizes.append(len(rows))
+        return rows.sum(axis=1)
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Test cases for the dynamic micro-batcher."""
+    
+    def test_results_fan_out_to_callers(self):
+        """Each caller should get the result for its own row."""
+        batcher = MicroBatcher(RecordingPredictor(), max_batch_size=8, max_wait_ms=5)
+        futures = [batcher.submit([i, i]) for i in range(20)]
+        self.assertEqual([f.result(5) for f in futures], [2 * i for i in range(20)])
+    
+    def test_concurrent_rows_are_batched(self):
+        """Rows queued while the worker is busy should share one call."""
+        gate = threading.Event()
+        predictor = RecordingPredictor(block=gate)
+        batcher = MicroBatcher(predictor, max_batch_size=4, max_wait_ms=50)
+        
+        first = batcher.submit([0])
+        futures = [batcher.submit([i]) for i in range(1, 9)]
+        gate.set()
+        first.result(5)
+        for future in futures:
+            future.result(5)
+        
+        self.assertLessEqual(max(predictor.batch_sizes), 4)
+        self.assertLess(len(predictor.batch_sizes), 9)
+        self.assertEqual(batcher.stats()['rows'], 9)
+    
+    def test_rows_are_grouped_by_predict_fn(self):
+        """Rows submitted with their own predict_fn should only be scored by it."""
+        gate = threading.Event()
+        default, old, new = RecordingPredictor(block=gate), RecordingPredictor(), RecordingPredictor()
+        batcher = MicroBatcher(default, max_batch_size=8, max_wait_ms=50)
+        
+        blocker = batcher.submit([0.0])
+        futures = [
+            batcher.submit([1.0], predict_fn=old),
+            batcher.submit([2.0], predict_fn=new),
+            batcher.submit([3.0], predict_fn=old),
+            batcher.submit([4.0])
+        ]
+        gate.set()
+        blocker.result(5)
+        self.assertEqual([f.result(5) for f in futures], [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual((old.batch_sizes, new.batch_sizes), ([2], [1]))
+        self.assertEqual(sum(default.batch_sizes), 2)
+        self.assertEqual(batcher.stats()['rows'], 5)
+    
+    def test_exceptions_propagate(self):
+        """A failing batch should raise in every waiting caller."""
+        def failing(rows):
+            raise ValueError("boom")
+        
+        batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.predict([1.0], timeout=5)
+        # The worker keeps running after a failure
+        batcher.predict_fn = RecordingPredictor()
+        self.assertEqual(batcher.predict([1.0, 2.0], timeout=5), 3.0)
+    
+    def test_stats(self):
+        """Stats should report queue depth and batch-size counts."""
+        batcher = MicroBatcher(RecordingPredictor(), max_batch_size=2, max_wait_ms=1)
+        batcher.predict(np.array([1.0]), timeout=5)
+        stats = batcher.stats()
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(stats['batch_size_counts'], {1: 1})
+        self.assertEqual(stats['mean_batch_size'], 1.0)
+    
+    def test_rejects_invalid_batch_size(self):
+        """max_batch_size below 1 should raise ValueError."""
+        with self.assertRaises(ValueError):
+            MicroBatcher(RecordingPredictor(), max_batch_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
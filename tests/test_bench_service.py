@@ -0,0 +1,78 @@
+# Unit Tests for the Load-Test Suite
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import sys
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.bench_service import (
+    build_scenarios,
+    compare_results,
+    flask_client_transport,
+    main,
+    make_flights,
+    run_scenario
+)
+
+
+def _document(rps: float, p99_ms: float) -> dict:
+    """Minimal results document for one scenario."""
+    return {"results": {"predict": {"rps": rps, "p99_ms": p99_ms}}}
+
+
+class TestCompareResults(unittest.TestCase):
+    """Test cases for regression detection against a baseline."""
+    
+    def test_within_threshold_passes(self):
+        """Changes smaller than the threshold should not be reported."""
+        self.assertEqual(compare_results(_document(950, 10.5), _document(1000, 10.0), 0.1), [])
+    
+    def test_throughput_drop_is_reported(self):
+        """An RPS drop beyond the threshold should be a regression."""
+        regressions = compare_results(_document(800, 10.0), _document(1000, 10.0), 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("rps", regressions[0])
+    
+    def test_latency_increase_is_reported(self):
+        """A p99 increase beyond the threshold should be a regression."""
+        regressions = compare_results(_document(1000, 15.0), _document(1000, 10.0), 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("p99", regressions[0])
+    
+    def test_new_scenarios_are_ignored(self):
+        """Scenarios missing from the baseline should not fail the run."""
+        self.assertEqual(compare_results(_document(1, 100.0), {"results": {}}, 0.1), [])
+
+
+class TestRunScenario(unittest.TestCase):
+    """Test cases for driving scenarios through the Flask test client."""
+    
+    def test_all_scenarios_succeed(self):
+        """Every scenario should complete without errors and report percentiles."""
+        scenarios = build_scenarios(make_flights(20))
+        make_post = flask_client_transport()
+        for name, scenario in scenarios.items():
+            with self.subTest(scenario=name):
+                result = run_scenario(make_post, scenario, concurrency=2, requests=6, warmup=1)
+                self.assertEqual(result["requests"], 6)
+                self.assertEqual(result["errors"], 0)
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+                self.assertGreater(result["rps"], 0)
+    
+    def test_zero_requests_are_rejected(self):
+        """--requests 0 should be a usage error, not a crash on an empty latency list."""
+        scenario = build_scenarios(make_flights(2))["predict"]
+        with self.assertRaises(ValueError):
+            run_scenario(flask_client_transport(), scenario, concurrency=2, requests=0, warmup=0)
+        with self.assertRaises(SystemExit) as ctx:
+            main(["--requests", "0"])
+        self.assertEqual(ctx.exception.code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# Unit Tests for the Prediction Cache
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import sys
+import time
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.cache import PredictionCache
+
+
+class TestPredictionCache(unittest.TestCase):
+    """Test cases for the LRU/TTL prediction cache."""
+    
+    def test_hit_and_miss_counters(self):
+        """Lookups should count hits and misses."""
+        cache = PredictionCache(maxsize=10)
+        self.assertIsNone(cache.get((1, 2), "v1"))
+        cache.put((1, 2), "v1", 0)
+        self.assertEqual(cache.get((1, 2), "v1"), 0)
+        
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+    
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted first."""
+        cache = PredictionCache(maxsize=2)
+        cache.put("a", "v1", 1)
+        cache.put("b", "v1", 2)
+        cache.get("a", "v1")
+        cache.put("c", "v1", 3)
+        
+        self.assertEqual(cache.get("a", "v1"), 1)
+        self.assertIsNone(cache.get("b", "v1"))
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_ttl_expiry(self):
+        """Entries older than the TTL should be treated as misses."""
+        cache = PredictionCache(maxsize=10, ttl_seconds=0.01)
+        cache.put("a", "v1", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a", "v1"))
+        self.assertEqual(cache.stats()['expirations'], 1)
+    
+    def test_zero_ttl_never_expires(self):
+        """A TTL of 0 should disable expiry."""
+        cache = PredictionCache(maxsize=10, ttl_seconds=0)
+        cache.put("a", "v1", 1)
+        self.assertEqual(cache.get("a", "v1"), 1)
+    
+    def test_new_model_version_invalidates(self):
+        """A different model version should drop all entries."""
+        cache = PredictionCache(maxsize=10)
+        cache.put("a", "v1", 1)
+        self.assertIsNone(cache.get("a", "v2"))
+        self.assertIsNone(cache.get("a", "v1"))
+        self.assertEqual(cache.stats()['invalidations'], 1)
+        self.assertEqual(cache.stats()['model_version'], "v1")
+    
+    def test_clear_for_new_version(self):
+        """clear(version) should empty the cache, count it and adopt the version."""
+        cache = PredictionCache(maxsize=10)
+        cache.put("a", "v1", 1)
+        cache.clear("v2")
+        self.assertEqual(cache.stats()['size'], 0)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+        self.assertEqual(cache.stats()['model_version'], "v2")
+        cache.put("a", "v2", 2)
+        self.assertEqual(cache.get("a", "v2"), 2)
+    
+    def test_rejects_invalid_size(self):
+        """maxsize below 1 should raise ValueError."""
+        with self.assertRaises(ValueError):
+            PredictionCache(maxsize=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
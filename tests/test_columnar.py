@@ -0,0 +1,166 @@
+# Unit Tests for Columnar Bulk Payloads
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.columnar import (
+    BatchTooLargeError,
+    build_columnar_matrix,
+    encode_request,
+    encode_response,
+    read_npz,
+    route_codes,
+    write_npz
+)
+from src.feature_engineering import build_feature_matrix
+from src.schema import ValidationError
+
+FEATURE_COLUMNS = ['ORIGIN_HASH', 'DEST_HASH', 'AIRLINE_HASH', 'CRS_DEP_TIME',
+                   'CRS_ARR_TIME', 'CRS_ELAPSED_TIME', 'DISTANCE']
+DEFAULTS = {'CRS_DEP_TIME': 1300.0, 'CRS_ARR_TIME': 1500.0, 'CRS_ELAPSED_TIME': 140.0, 'DISTANCE': 800.0}
+
+
+def sample_columns() -> dict:
+    """Flight columns with repeated and unknown codes and missing numbers."""
+    return {
+        'origin': ['JFK', 'SFO', 'JFK', 'QQQ'],
+        'dest': ['LAX', 'ORD', 'ATL', 'LAX'],
+        'airline': ['UA', 'DL', 'UA', 'ZZ'],
+        'dep_time': [800, np.nan, 1730, 600],
+        'distance': [2475, 1846, np.nan, 100]
+    }
+
+
+class TestReadNpz(unittest.TestCase):
+    """Test cases for decoding .npz request bodies."""
+    
+    def test_stored_members_are_views(self):
+        """Uncompressed columns should be read-only views of the body."""
+        body = write_npz({'distance': np.arange(5, dtype=np.float64), 'codes': np.array(['A', 'BC'])})
+        columns = read_npz(body)
+        self.assertEqual(columns['distance'].tolist(), [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(columns['codes'].tolist(), ['A', 'BC'])
+        self.assertFalse(columns['distance'].flags.owndata)
+        self.assertFalse(columns['distance'].flags.writeable)
+    
+    def test_compressed_members(self):
+        """np.savez_compressed archives should decode to the same arrays."""
+        out = io.BytesIO()
+        np.savez_compressed(out, distance=np.array([1.5, 2.5]), matrix=np.eye(2, order='F'))
+        columns = read_npz(out.getvalue())
+        self.assertEqual(columns['distance'].tolist(), [1.5, 2.5])
+        self.assertEqual(columns['matrix'].tolist(), [[1.0, 0.0], [0.0, 1.0]])
+    
+    def test_row_cap_is_checked_before_inflating(self):
+        """A compressed member above max_rows should be refused from its header."""
+        out = io.BytesIO()
+        np.savez_compressed(out, origin=np.zeros(10 ** 7, dtype=np.int8))
+        body = out.getvalue()
+        self.assertLess(len(body), 100000)
+        with self.assertRaises(BatchTooLargeError):
+            read_npz(body, max_rows=1000)
+        self.assertEqual(len(read_npz(body, max_rows=10 ** 7)['origin']), 10 ** 7)
+    
+    def test_wide_elements_are_refused_before_inflating(self):
+        """A compressed member with an oversized string dtype should not be inflated."""
+        out = io.BytesIO()
+        np.savez_compressed(out, origin=np.full(1000, 'A', dtype='<U20000'))
+        body = out.getvalue()
+        self.assertLess(len(body), 200000)
+        with self.assertRaises(ValidationError) as ctx:
+            read_npz(body, max_rows=1000)
+        self.assertIn('wider than', str(ctx.exception))
+        with self.assertRaises(ValidationError):
+            read_npz(body)
+    
+    def test_rejects_invalid_payloads(self):
+        """Non-zip bodies and object arrays should raise ValidationError."""
+        out = io.BytesIO()
+        np.savez(out, origin=np.array(['JFK', None], dtype=object))
+        for body in (b'', b'not a zip', out.getvalue()):
+            with self.assertRaises(ValidationError):
+                read_npz(body)
+
+
+class TestBuildColumnarMatrix(unittest.TestCase):
+    """Test cases for turning request columns into model input."""
+    
+    def test_matches_build_feature_matrix(self):
+        """Dictionary-encoded columns should give build_feature_matrix's rows."""
+        columns = sample_columns()
+        X, hashed = build_columnar_matrix(read_npz(encode_request(columns)), FEATURE_COLUMNS, DEFAULTS)
+        expected = build_feature_matrix(pd.DataFrame(columns), FEATURE_COLUMNS, DEFAULTS)
+        np.testing.assert_array_equal(X, expected)
+        np.testing.assert_array_equal(hashed, expected[:, :3].astype(np.int32))
+    
+    def test_plain_string_columns(self):
+        """Code columns sent as plain strings should be encoded server-side."""
+        columns = sample_columns()
+        arrays = {k: np.asarray(v, dtype=str if k in ('origin', 'dest', 'airline') else float)
+                  for k, v in columns.items()}
+        arrays['airline'] = arrays['airline'].astype('S')
+        X, _ = build_columnar_matrix(read_npz(write_npz(arrays)), FEATURE_COLUMNS, DEFAULTS)
+        expected, _ = build_columnar_matrix(read_npz(encode_request(columns)), FEATURE_COLUMNS, DEFAULTS)
+        np.testing.assert_array_equal(X, expected)
+    
+    def test_rejects_non_ascii_bytes_codes(self):
+        """Bytes codes that are not ASCII should raise ValidationError, not UnicodeDecodeError."""
+        columns = read_npz(write_npz({
+            'origin': np.array([0]), 'origin_dictionary': np.array([b'\xff']),
+            'dest': np.array([b'LAX']), 'airline': np.array([b'U\xe9'])
+        }))
+        with self.assertRaises(ValidationError):
+            build_columnar_matrix(columns, FEATURE_COLUMNS, DEFAULTS)
+        with self.assertRaises(ValidationError):
+            route_codes(columns, 'airline')
+    
+    def test_empty_batch(self):
+        """Zero rows should give empty outputs."""
+        X, hashed = build_columnar_matrix(
+            read_npz(encode_request({'origin': [], 'dest': [], 'airline': []})), FEATURE_COLUMNS
+        )
+        self.assertEqual(X.shape, (0, 7))
+        self.assertEqual(hashed.shape, (0, 3))
+    
+    def test_rejects_inconsistent_columns(self):
+        """Bad columns should raise ValidationError."""
+        good = {k: np.asarray(v) for k, v in read_npz(encode_request(sample_columns())).items()}
+        cases = [
+            {k: v for k, v in good.items() if k != 'airline'},
+            {**good, 'dest': good['dest'][:2]},
+            {**good, 'origin': good['origin'] + 10},
+            {**good, 'distance': np.array([1.0, 2.0, np.inf, 3.0])},
+            {**good, 'dep_time': np.array(['800'] * 4)},
+            {**good, 'origin': good['origin'].astype(np.float64)}
+        ]
+        for columns in cases:
+            with self.assertRaises(ValidationError):
+                build_columnar_matrix(columns, FEATURE_COLUMNS, DEFAULTS)
+
+
+class TestEncodeResponse(unittest.TestCase):
+    """Test cases for the columnar response body."""
+    
+    def test_round_trip(self):
+        """np.load should read hashes, predictions and the label dictionary."""
+        hashed = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.int32)
+        body = encode_response(hashed, np.array([2, 0]), {0: 'a', 1: 'b', 2: 'c'})
+        result = np.load(io.BytesIO(body))
+        self.assertEqual(result['dest_hash'].tolist(), [2, 5])
+        self.assertEqual(result['prediction'].dtype, np.int8)
+        self.assertEqual(result['prediction_label_dictionary'][result['prediction']].tolist(), ['c', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
 # Unit Tests for Feature Engineering
 # MLOps HW2 - Efe Çetin
 
+import hashlib
 import unittest
 import os
 import sys
+import zlib
+
+import numpy as np
+import pandas as pd
 
 # Add project root to path for CI compatibility
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -14,8 +19,20 @@ from src.feature_engineering import (
     hash_airport_code,
     hash_airline_code,
     categorize_delay,
-    extract_features
+    categorize_delay_batch,
+    extract_features,
+    extract_features_batch,
+    build_feature_vector,
+    build_feature_matrix,
+    KNOWN_AIRPORT_CODES,
+    KNOWN_AIRLINE_CODES
 )
+from src import feature_engineering
+
+
+def legacy_md5_bucket(code, num_buckets):
+    """Reference bucketing from the original hexdigest implementation."""
+    return int(hashlib.md5(code.encode("utf-8")).hexdigest(), 16) % num_buckets
 
 
 class TestHashAirportCode(unittest.TestCase):
@@ -75,6 +92,98 @@ class TestHashAirlineCode(unittest.TestCase):
         self.assertEqual(result1, result2)
 
 
+class TestHashLookupTable(unittest.TestCase):
+    """Test cases for the precomputed bucket index and LRU cache."""
+    
+    def test_known_codes_match_legacy_buckets(self):
+        """Precomputed buckets should be bit-identical to hexdigest parsing."""
+        for code in KNOWN_AIRPORT_CODES + KNOWN_AIRLINE_CODES:
+            self.assertEqual(hash_airport_code(code), legacy_md5_bucket(code, 100))
+            self.assertEqual(hash_airline_code(code), legacy_md5_bucket(code, 20))
+    
+    def test_unknown_codes_match_legacy_buckets(self):
+        """Codes outside the index should hash the same way."""
+        for code in ["ZZZ", "Q9", "xyz", "ÅÄÖ", "LONGCODE"]:
+            for buckets in (7, 20, 100, 1000):
+                self.assertEqual(
+                    hash_airport_code(code, buckets),
+                    legacy_md5_bucket(code, buckets)
+                )
+    
+    def test_unknown_codes_are_cached(self):
+        """Repeated unknown codes should be served from the LRU cache."""
+        hash_airport_code("QQQ")
+        hits = feature_engineering._md5_bucket_cached.cache_info().hits
+        hash_airport_code("QQQ")
+        self.assertEqual(
+            feature_engineering._md5_bucket_cached.cache_info().hits, hits + 1
+        )
+    
+    def test_non_string_is_not_cached(self):
+        """Unhashable or non-string input should return 0 without raising."""
+        self.assertEqual(hash_airport_code(["JFK"]), 0)
+        self.assertEqual(hash_airline_code(42), 0)
+
+
+class TestHashSchemes(unittest.TestCase):
+    """Test cases for selectable hash schemes."""
+    
+    def tearDown(self):
+        """Restore the default scheme for other tests."""
+        feature_engineering.set_hash_scheme(feature_engineering.DEFAULT_HASH_SCHEME)
+    
+    def test_crc32_buckets(self):
+        """crc32 should bucket known and unknown codes by zlib.crc32."""
+        feature_engineering.set_hash_scheme("crc32")
+        self.assertEqual(feature_engineering.get_hash_scheme(), "crc32")
+        for code in ("JFK", "ZZZ", "ÅÄÖ"):
+            self.assertEqual(hash_airport_code(code), zlib.crc32(code.encode("utf-8")) % 100)
+        self.assertEqual(hash_airline_code("UA"), zlib.crc32(b"UA") % 20)
+        self.assertEqual(hash_airport_code(""), 0)
+        self.assertEqual(hash_airline_code(None), 0)
+    
+    def test_switch_back_restores_md5(self):
+        """Switching schemes should not leave stale buckets behind."""
+        feature_engineering.set_hash_scheme("crc32")
+        crc = extract_features("JFK", "ZZZ", "UA")
+        feature_engineering.set_hash_scheme("md5")
+        self.assertEqual(extract_features("JFK", "ZZZ", "UA"), {
+            'origin_hash': legacy_md5_bucket("JFK", 100),
+            'dest_hash': legacy_md5_bucket("ZZZ", 100),
+            'airline_hash': legacy_md5_bucket("UA", 20)
+        })
+        self.assertNotEqual(crc, extract_features("JFK", "ZZZ", "UA"))
+    
+    def test_batch_uses_active_scheme(self):
+        """extract_features_batch should hash with the active scheme."""
+        feature_engineering.set_hash_scheme("crc32")
+        batch = extract_features_batch(["JFK", "QQQ"], ["LAX", "ORD"], ["UA", "ZZ"])
+        expected = [list(extract_features(*row).values()) for row in
+                    [("JFK", "LAX", "UA"), ("QQQ", "ORD", "ZZ")]]
+        self.assertEqual(batch.tolist(), expected)
+    
+    def test_unknown_scheme_raises(self):
+        """An unknown scheme should raise ValueError and keep the current one."""
+        with self.assertRaises(ValueError):
+            feature_engineering.set_hash_scheme("sha1")
+        self.assertEqual(feature_engineering.get_hash_scheme(), "md5")
+    
+    def test_check_hash_config(self):
+        """Bundles hashed differently from this process should be refused."""
+        check = feature_engineering.check_hash_config
+        check(None, None)
+        check("md5", {'origin': 100, 'dest': 100, 'airline': 20})
+        with self.assertRaises(ValueError):
+            check("crc32", None)
+        with self.assertRaises(ValueError):
+            check("md5", {'origin': 50, 'dest': 50, 'airline': 20})
+        
+        feature_engineering.set_hash_scheme("crc32")
+        check("crc32", feature_engineering.HASH_BUCKETS)
+        with self.assertRaises(ValueError):
+            check(None, None)
+
+
 class TestCategorizeDelay(unittest.TestCase):
     """Test cases for delay categorization."""
     
@@ -108,6 +217,35 @@ class TestCategorizeDelay(unittest.TestCase):
         self.assertEqual(categorize_delay(None), 0)
 
 
+class TestCategorizeDelayBatch(unittest.TestCase):
+    """Test cases for vectorized delay categorization."""
+    
+    def test_matches_scalar_version(self):
+        """Each element should equal categorize_delay, including boundaries."""
+        delays = [
+            -15, 0, 5, 9.999, 10, 10.0001, 11, 20, 29.5, 30, 30.0001,
+            31, 60, 120, float("inf"), float("-inf"), None
+        ]
+        result = categorize_delay_batch(delays)
+        self.assertEqual(result.tolist(), [categorize_delay(d) for d in delays])
+    
+    def test_nan_treated_as_none(self):
+        """NaN should map to category 0, like None."""
+        self.assertEqual(categorize_delay_batch([float("nan"), np.nan]).tolist(), [0, 0])
+    
+    def test_random_values_match_scalar(self):
+        """Random delays should agree with the scalar function."""
+        delays = np.random.default_rng(0).uniform(-60, 120, 10000).round(1)
+        result = categorize_delay_batch(delays)
+        self.assertEqual(result.tolist(), [categorize_delay(d) for d in delays])
+    
+    def test_returns_int8(self):
+        """Output should be an int8 array of the same length."""
+        result = categorize_delay_batch(np.array([1.0, 15.0, 45.0]))
+        self.assertEqual(result.dtype, np.int8)
+        self.assertEqual(result.tolist(), [0, 1, 2])
+
+
 class TestExtractFeatures(unittest.TestCase):
     """Test cases for feature extraction."""
     
@@ -126,5 +264,88 @@ class TestExtractFeatures(unittest.TestCase):
         self.assertIsInstance(result['airline_hash'], int)
 
 
+class TestExtractFeaturesBatch(unittest.TestCase):
+    """Test cases for vectorized feature extraction."""
+    
+    ORIGINS = ["JFK", "SFO", "JFK", "", None, "ZZZ", "ATL"]
+    DESTS = ["LAX", "ORD", "LAX", "BOS", "SEA", "LAX", float("nan")]
+    AIRLINES = ["UA", "DL", "UA", "AA", "B6", 7, "Q9"]
+    
+    def expected(self):
+        """Row-by-row reference matrix."""
+        return [
+            list(extract_features(o, d, a).values())
+            for o, d, a in zip(self.ORIGINS, self.DESTS, self.AIRLINES)
+        ]
+    
+    def test_matches_extract_features_per_row(self):
+        """Every row should equal the scalar extract_features output."""
+        result = extract_features_batch(self.ORIGINS, self.DESTS, self.AIRLINES)
+        self.assertEqual(result.tolist(), self.expected())
+    
+    def test_accepts_dataframe(self):
+        """A DataFrame with origin/dest/airline columns should be accepted."""
+        df = pd.DataFrame({
+            "origin": self.ORIGINS,
+            "dest": self.DESTS,
+            "airline": self.AIRLINES
+        })
+        self.assertEqual(extract_features_batch(df).tolist(), self.expected())
+    
+    def test_returns_contiguous_int32(self):
+        """Output should be a C-contiguous int32 matrix."""
+        result = extract_features_batch(np.array(["JFK"]), ["LAX"], ["UA"])
+        self.assertEqual(result.dtype, np.int32)
+        self.assertEqual(result.shape, (1, 3))
+        self.assertTrue(result.flags['C_CONTIGUOUS'])
+    
+    def test_empty_input(self):
+        """Empty columns should give an empty (0, 3) matrix."""
+        self.assertEqual(extract_features_batch([], [], []).shape, (0, 3))
+    
+    def test_mismatched_lengths_raise(self):
+        """Columns of different lengths should raise ValueError."""
+        with self.assertRaises(ValueError):
+            extract_features_batch(["JFK"], ["LAX", "SFO"], ["UA"])
+
+
+class TestBuildFeatureMatrix(unittest.TestCase):
+    """Test cases for the vectorized model input builder."""
+    
+    COLUMNS = ['ORIGIN_HASH', 'DEST_HASH', 'AIRLINE_HASH', 'CRS_DEP_TIME',
+               'CRS_ARR_TIME', 'CRS_ELAPSED_TIME', 'DISTANCE']
+    DEFAULTS = {'CRS_DEP_TIME': 1300.0, 'CRS_ARR_TIME': 1500.0,
+                'CRS_ELAPSED_TIME': 140.0, 'DISTANCE': 800.0}
+    
+    def test_matches_build_feature_vector(self):
+        """Rows should equal the scalar builder, with NaN using defaults."""
+        df = pd.DataFrame({
+            "origin": ["JFK", "SFO", None],
+            "dest": ["LAX", "ORD", "ATL"],
+            "airline": ["UA", "DL", "AA"],
+            "dep_time": [800, None, 1730],
+            "distance": [2475, 1846, None]
+        })
+        result = build_feature_matrix(df, self.COLUMNS, self.DEFAULTS)
+        
+        for i, record in enumerate(df.to_dict('records')):
+            record = {k: (None if v is None or v != v else v) for k, v in record.items()}
+            features = extract_features(record["origin"], record["dest"], record["airline"])
+            expected = build_feature_vector(features, record, self.COLUMNS, self.DEFAULTS)
+            self.assertEqual(result[i].tolist(), expected)
+    
+    def test_invalid_numeric_column_raises(self):
+        """Non-numeric values in a numeric column should raise ValueError."""
+        df = pd.DataFrame({"origin": ["JFK"], "dest": ["LAX"], "airline": ["UA"], "distance": ["far"]})
+        with self.assertRaises(ValueError):
+            build_feature_matrix(df, self.COLUMNS)
+    
+    def test_unknown_feature_column_raises(self):
+        """Columns the builder cannot produce should raise ValueError."""
+        df = pd.DataFrame({"origin": ["JFK"], "dest": ["LAX"], "airline": ["UA"]})
+        with self.assertRaises(ValueError):
+            build_feature_matrix(df, ['WEATHER'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,148 @@
+# Unit Tests for the Route Feature Store
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import csv
+import os
+import sys
+import tempfile
+import threading
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import extract_features
+from src.feature_store import RouteFeatureStore, main, read_routes, top_routes
+
+ROUTES = [("JFK", "LAX", "UA"), ("SFO", "ORD", "DL"), ("ZZZ", "QQQ", "Q9")]
+
+
+class TestRouteFeatureStore(unittest.TestCase):
+    """Test cases for precomputed route features."""
+    
+    def test_lookup_matches_extract_features(self):
+        """Stored and live routes should both equal extract_features."""
+        store = RouteFeatureStore(ROUTES)
+        for route in ROUTES + [("BOS", "MIA", "B6"), ("", "LAX", "UA")]:
+            self.assertEqual(store.lookup(*route), extract_features(*route))
+        
+        stats = store.stats()
+        self.assertEqual(stats['routes'], 3)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['inserts'], 0)
+    
+    def test_lookup_returns_independent_dicts(self):
+        """Callers may mutate the returned dict without touching the store."""
+        store = RouteFeatureStore(ROUTES)
+        store.lookup("JFK", "LAX", "UA")['prediction'] = 1
+        self.assertEqual(store.lookup("JFK", "LAX", "UA"), extract_features("JFK", "LAX", "UA"))
+    
+    def test_insert_unknown_routes(self):
+        """Missed routes should be added when insert_unknown is set."""
+        store = RouteFeatureStore(insert_unknown=True, max_routes=2)
+        store.lookup("JFK", "LAX", "UA")
+        store.lookup("JFK", "LAX", "UA")
+        store.lookup("SFO", "ORD", "DL")
+        store.lookup("BOS", "MIA", "B6")
+        store.lookup(None, "MIA", "B6")
+        
+        stats = store.stats()
+        self.assertEqual(stats['routes'], 2)
+        self.assertEqual(stats['inserts'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertIn(("SFO", "ORD", "DL"), store)
+        self.assertNotIn(("BOS", "MIA", "B6"), store)
+    
+    def test_table_grows_and_keeps_rows(self):
+        """Rows written before the table grows should survive the copy."""
+        routes = [(f"A{i:02d}", f"B{i:02d}", "UA") for i in range(40)]
+        store = RouteFeatureStore(routes)
+        self.assertEqual(len(store), 40)
+        self.assertGreaterEqual(store.stats()['capacity'], 40)
+        for route in routes:
+            self.assertEqual(store.lookup(*route), extract_features(*route))
+    
+    def test_concurrent_inserts_and_lookups(self):
+        """Lock-free reads should stay correct while other threads insert."""
+        store = RouteFeatureStore(insert_unknown=True)
+        routes = [(f"C{i:03d}", "LAX", "UA") for i in range(300)]
+        errors = []
+        
+        def worker():
+            for route in routes:
+                if store.lookup(*route) != extract_features(*route):
+                    errors.append(route)
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(len(store), 300)
+    
+    def test_memory_bytes(self):
+        """Memory should count the table and index, sharing code strings."""
+        store = RouteFeatureStore(ROUTES)
+        memory = store.memory_bytes()
+        self.assertEqual(memory['table'], store.stats()['capacity'] * 3 * 4)
+        self.assertEqual(memory['total'], memory['table'] + memory['index'])
+        
+        grown = RouteFeatureStore(ROUTES + [("JFK", "SFO", "UA")])
+        self.assertGreater(grown.memory_bytes()['index'], memory['index'])
+    
+    def test_rejects_invalid_max_routes(self):
+        """max_routes below 1 should raise ValueError."""
+        with self.assertRaises(ValueError):
+            RouteFeatureStore(max_routes=0)
+
+
+class TestRouteFiles(unittest.TestCase):
+    """Test cases for route list files and the build CLI."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.tmpdir.name, name)
+    
+    def test_from_file(self):
+        """Stores should load routes from a CSV with extra columns."""
+        path = self._path('routes.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['count', 'airline', 'origin', 'dest'])
+            writer.writerow([10, 'UA', 'JFK', 'LAX'])
+        
+        store = RouteFeatureStore.from_file(path)
+        self.assertIn(("JFK", "LAX", "UA"), store)
+    
+    def test_read_routes_missing_column(self):
+        """A header without a route column should raise ValueError."""
+        path = self._path('routes.csv')
+        with open(path, 'w') as f:
+            f.write("origin,dest\nJFK,LAX\n")
+        with self.assertRaises(ValueError):
+            read_routes(path)
+    
+    def test_build_route_file_from_flights(self):
+        """The CLI should write the most frequent routes, BTS names accepted."""
+        flights = self._path('flights.csv')
+        with open(flights, 'w') as f:
+            f.write("ORIGIN,DEST,OP_CARRIER,DISTANCE\n")
+            f.write("JFK,LAX,UA,2475\n" * 3 + "SFO,ORD,DL,1846\n" * 2 + "BOS,MIA,B6,1258\n")
+        
+        self.assertEqual(top_routes(flights, top=1), [(("JFK", "LAX", "UA"), 3)])
+        
+        routes = self._path('routes.csv')
+        self.assertEqual(main([flights, routes, '--top', '2']), 0)
+        self.assertEqual(read_routes(routes), [("JFK", "LAX", "UA"), ("SFO", "ORD", "DL")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,16 +2,56 @@
 # MLOps HW2 - Efe Çetin
 
 import unittest
+import contextlib
+import glob
+import io
 import os
 import sys
 import json
+import marshal
+import tempfile
+import threading
+from unittest import mock
 
 # Add project root to path for CI compatibility
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+import numpy as np
+
+import src.api
 from src.api import app
+from src.columnar import encode_request
+from src.batching import MicroBatcher
+from src.cache import PredictionCache
+from src.feature_store import RouteFeatureStore
+from src.prediction_log import PredictionLogger
+from src.profiling import RequestProfiler
+from src.registry import ModelRegistry
+from src.model import FlightDelayModel, ModelReloader
+from src.feature_engineering import (
+    hash_airport_code,
+    extract_features,
+    build_feature_vector
+)
+
+
+@contextlib.contextmanager
+def isolated_primary(model, label=None, **registry_kwargs):
+    """
+    Serve model from a scratch registry wired like src.api's.
+    
+    Swaps, reloads and promotions inside the block go to the scratch
+    registry, and src.api's registry, _model and the model singleton
+    are restored afterwards, so later tests see the original primary.
+    """
+    registry = ModelRegistry(on_primary=src.api._publish_primary, **registry_kwargs)
+    with mock.patch.object(src.api, 'registry', registry), \
+            mock.patch.object(src.api, '_model', src.api._model), \
+            mock.patch('src.model._model_instance', src.api._model):
+        registry.register(label or src.api.MODEL_LABEL, model, primary=True)
+        yield registry
 
 
 class TestAPIIntegration(unittest.TestCase):
@@ -23,6 +63,10 @@ class TestAPIIntegration(unittest.TestCase):
         cls.client = app.test_client()
         cls.client.testing = True
     
+    def tearDown(self):
+        """Every test must leave the module's registry serving _model."""
+        self.assertIs(src.api.registry.primary, src.api._model)
+    
     def test_health_endpoint(self):
         """Test /health endpoint returns 200."""
         response = self.client.get('/health')
@@ -30,6 +74,157 @@ class TestAPIIntegration(unittest.TestCase):
         
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'healthy')
+        self.assertTrue(data['model_loaded'])
+        self.assertEqual(data['model_version'], src.api._model.version)
+    
+    def test_health_not_ready_without_model(self):
+        """Test /health and /predict return 503 until the model is loaded."""
+        payload = {"origin": "JFK", "dest": "LAX", "airline": "UA"}
+        
+        with mock.patch.object(src.api, '_model', None):
+            health = self.client.get('/health')
+            predict = self.client.post(
+                '/predict',
+                data=json.dumps(payload),
+                content_type='application/json'
+            )
+        
+        self.assertEqual(health.status_code, 503)
+        self.assertFalse(json.loads(health.data)['model_loaded'])
+        self.assertEqual(predict.status_code, 503)
+    
+    def test_admin_reload_requires_token(self):
+        """Test /admin/reload is disabled without ADMIN_TOKEN and checks the header."""
+        self.assertEqual(self.client.post('/admin/reload').status_code, 403)
+        
+        with mock.patch.object(src.api, 'ADMIN_TOKEN', 'secret'):
+            response = self.client.post('/admin/reload', headers={'X-Admin-Token': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+    
+    def test_admin_reload_swaps_model(self):
+        """Test /admin/reload loads the model again and reports both versions."""
+        reloader = ModelReloader(src.api.model_reloader.model_path, src.api._swap_model)
+        original = src.api._model
+        
+        with isolated_primary(original), \
+                mock.patch.object(src.api, 'ADMIN_TOKEN', 'secret'), \
+                mock.patch.object(src.api, 'model_reloader', reloader):
+            response = self.client.post('/admin/reload', headers={'X-Admin-Token': 'secret'})
+            self.assertIsNot(src.api._model, original)
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['previous_version'], original.version)
+        self.assertEqual(data['model_version'], original.version)
+        self.assertEqual(reloader.stats()['reloads'], 1)
+    
+    def test_in_flight_request_finishes_on_old_model(self):
+        """Test a swap mid-request does not affect the request already running."""
+        payload = json.dumps({"origin": "JFK", "dest": "LAX", "airline": "UA"})
+        old = FlightDelayModel(src.api.model_reloader.model_path)
+        new = FlightDelayModel(src.api.model_reloader.model_path)
+        old.version, new.version = "old-version", "new-version"
+        
+        entered, release = threading.Event(), threading.Event()
+        old_predict = old.predict
+        
+        def slow_predict(row):
+            entered.set()
+            release.wait(5)
+            return old_predict(row)
+        
+        old.predict = slow_predict
+        responses = {}
+        
+        def call():
+            responses['in_flight'] = app.test_client().post(
+                '/predict', data=payload, content_type='application/json'
+            )
+        
+        with isolated_primary(old), \
+                mock.patch.object(src.api, 'prediction_cache', None):
+            thread = threading.Thread(target=call)
+            thread.start()
+            self.assertTrue(entered.wait(5))
+            src.api._swap_model(new)
+            release.set()
+            thread.join(5)
+            after = self.client.post('/predict', data=payload, content_type='application/json')
+        
+        self.assertEqual(json.loads(responses['in_flight'].data)['model_version'], "old-version")
+        self.assertEqual(json.loads(after.data)['model_version'], "new-version")
+    
+    def test_admin_profile(self):
+        """Test /admin/profile reports sampled requests and needs profiling enabled."""
+        headers = {'X-Admin-Token': 'secret'}
+        with mock.patch.object(src.api, 'ADMIN_TOKEN', 'secret'):
+            self.assertEqual(self.client.get('/admin/profile', headers=headers).status_code, 404)
+            
+            # Install the hooks api.py registers when PROFILE_SAMPLE_RATE > 0
+            profiler = RequestProfiler(1.0)
+            before = [*app.before_request_funcs[None], src.api._start_profile]
+            with mock.patch.object(src.api, 'profiler', profiler), \
+                    mock.patch.dict(app.before_request_funcs, {None: before}), \
+                    mock.patch.dict(app.teardown_request_funcs, {None: [src.api._stop_profile]}):
+                self.client.post(
+                    '/predict',
+                    data=json.dumps({"origin": "JFK", "dest": "LAX", "airline": "UA"}),
+                    content_type='application/json'
+                )
+                self.client.get('/health')
+                
+                report = self.client.get('/admin/profile?limit=50', headers=headers)
+                raw = self.client.get('/admin/profile?format=pstats', headers=headers)
+                bad = self.client.get('/admin/profile?sort=bogus', headers=headers)
+                stats = json.loads(self.client.get('/stats').data)['profiling']
+                reset = self.client.delete('/admin/profile', headers=headers)
+            denied = self.client.get('/admin/profile', headers={'X-Admin-Token': 'wrong'})
+        
+        self.assertEqual(report.status_code, 200)
+        self.assertIn('(predict)', report.data.decode())
+        self.assertEqual(raw.status_code, 200)
+        self.assertTrue(any(k[2] == 'predict' for k in marshal.loads(raw.data)))
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(stats['profiled'], 1)
+        self.assertEqual(json.loads(reset.data)['profiled'], 0)
+        self.assertEqual(denied.status_code, 401)
+    
+    def test_predict_uses_model_with_numeric_fields(self):
+        """Test /predict scores the feature row built from feature_columns."""
+        payload = {
+            "origin": "JFK",
+            "dest": "LAX",
+            "airline": "UA",
+            "dep_time": 800,
+            "arr_time": 1100,
+            "elapsed_time": 360,
+            "distance": 2475
+        }
+        
+        response = self.client.post(
+            '/predict',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        
+        model = src.api._model
+        features = extract_features("JFK", "LAX", "UA")
+        row = build_feature_vector(features, payload, model.feature_columns)
+        self.assertEqual(json.loads(response.data)['prediction'], model.predict(row))
+    
+    def test_predict_invalid_numeric_field(self):
+        """Test /predict rejects non-numeric values for numeric fields."""
+        payload = {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": "far"}
+        
+        response = self.client.post(
+            '/predict',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, 400)
     
     def test_predict_endpoint_success(self):
         """Test /predict endpoint with valid data."""
@@ -77,6 +272,436 @@ class TestAPIIntegration(unittest.TestCase):
         response = self.client.post('/predict')
         self.assertEqual(response.status_code, 400)
     
+    def test_predict_batch_endpoint(self):
+        """Test /predict/batch keeps order and reports per-item errors."""
+        payload = {
+            "flights": [
+                {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": 2475},
+                {"origin": "SFO"},
+                {"origin": "ATL", "dest": "DFW", "airline": "AA", "distance": "far"},
+                {"origin": "SFO", "dest": "ORD", "airline": "DL"}
+            ]
+        }
+        
+        response = self.client.post(
+            '/predict/batch',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['errors'], 2)
+        
+        results = data['predictions']
+        self.assertIn(results[0]['prediction'], [0, 1, 2])
+        self.assertEqual(results[1]['index'], 1)
+        self.assertIn('error', results[1])
+        self.assertIn('error', results[2])
+        self.assertEqual(results[3]['origin_hash'], hash_airport_code("SFO"))
+        self.assertIn(results[3]['prediction'], [0, 1, 2])
+    
+    def test_predict_batch_accepts_bare_array(self):
+        """Test /predict/batch accepts a top-level JSON array."""
+        payload = [{"origin": "JFK", "dest": "LAX", "airline": "UA"}]
+        
+        response = self.client.post(
+            '/predict/batch',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['count'], 1)
+    
+    def test_predict_batch_rejects_non_array(self):
+        """Test /predict/batch rejects payloads without a flight array."""
+        response = self.client.post(
+            '/predict/batch',
+            data=json.dumps({"origin": "JFK"}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_predict_batch_columnar(self):
+        """An .npz batch should get the same predictions as JSON, as .npz."""
+        flights = [
+            {"origin": "JFK", "dest": "LAX", "airline": "UA", "dep_time": 800, "distance": 2475},
+            {"origin": "SFO", "dest": "ORD", "airline": "DL"},
+            {"origin": "QQQ", "dest": "DFW", "airline": "AA", "dep_time": 1930}
+        ]
+        columns = {field: [f.get(field) for f in flights] for field in ("origin", "dest", "airline")}
+        for field in ("dep_time", "distance"):
+            columns[field] = [np.nan if f.get(field) is None else f[field] for f in flights]
+        
+        response = self.client.post(
+            '/predict/batch', data=encode_request(columns), content_type='application/x-npz'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-npz')
+        
+        result = np.load(io.BytesIO(response.data))
+        expected = json.loads(self.client.post(
+            '/predict/batch', data=json.dumps(flights), content_type='application/json'
+        ).data)
+        self.assertEqual(response.headers['X-Model-Version'], expected['model_version'])
+        self.assertEqual(result['prediction'].tolist(), [p['prediction'] for p in expected['predictions']])
+        self.assertEqual(result['origin_hash'].tolist(), [p['origin_hash'] for p in expected['predictions']])
+        labels = result['prediction_label_dictionary'][result['prediction']]
+        self.assertEqual(labels.tolist(), [p['prediction_label'] for p in expected['predictions']])
+    
+    def test_predict_batch_columnar_rejects_bad_payload(self):
+        """Malformed or incomplete .npz bodies should be rejected with 400."""
+        partial = encode_request({"origin": ["JFK"], "dest": ["LAX"]})
+        for body in (b"not a zip", partial):
+            response = self.client.post('/predict/batch', data=body, content_type='application/x-npz')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', json.loads(response.data))
+    
+    def test_predict_batch_columnar_rejects_non_ascii_codes(self):
+        """A bytes dictionary with non-ASCII codes is a client error, not a 500."""
+        out = io.BytesIO()
+        np.savez(
+            out, origin=np.array([0]), origin_dictionary=np.array([b'\xff']),
+            dest=np.array(['LAX']), airline=np.array(['UA'])
+        )
+        response = self.client.post('/predict/batch', data=out.getvalue(), content_type='application/x-npz')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non-ASCII', json.loads(response.data)['error'])
+    
+    def test_predict_batch_columnar_row_cap_covers_compressed_columns(self):
+        """A compressed column above the row cap should get 413 before it is inflated."""
+        out = io.BytesIO()
+        np.savez_compressed(out, origin=np.zeros(5000, dtype=np.int8))
+        with mock.patch.object(src.api, 'MAX_COLUMNAR_BATCH_SIZE', 1000):
+            response = self.client.post('/predict/batch', data=out.getvalue(), content_type='application/x-npz')
+        self.assertEqual(response.status_code, 413)
+    
+    def test_predict_with_micro_batching(self):
+        """Test /predict gives the same answer when routed through the batcher."""
+        payload = {"origin": "SFO", "dest": "ORD", "airline": "DL", "distance": 1846}
+        batcher = MicroBatcher(src.api._predict_proba_rows, max_batch_size=4, max_wait_ms=1)
+        
+        direct = self.client.post(
+            '/predict',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        with mock.patch.object(src.api, 'batcher', batcher), \
+                mock.patch.object(src.api, 'prediction_cache', None):
+            batched = self.client.post(
+                '/predict',
+                data=json.dumps(payload),
+                content_type='application/json'
+            )
+            stats = json.loads(self.client.get('/stats').data)
+        
+        self.assertEqual(json.loads(batched.data), json.loads(direct.data))
+        self.assertEqual(stats['batching']['rows'], 1)
+    
+    def test_micro_batched_request_uses_captured_model(self):
+        """Test a batched /predict is scored by the model it reports, even after a swap."""
+        payload = json.dumps({"origin": "SFO", "dest": "ORD", "airline": "DL"})
+        old = FlightDelayModel(src.api.model_reloader.model_path)
+        new = FlightDelayModel(src.api.model_reloader.model_path)
+        old.version, new.version = "old-version", "new-version"
+        scored_by = []
+        
+        def recording(model):
+            predict = model.predict_proba_batch
+            
+            def wrapper(rows):
+                scored_by.append(model.version)
+                return predict(rows)
+            return wrapper
+        
+        old.predict_proba_batch = recording(old)
+        new.predict_proba_batch = recording(new)
+        batcher = MicroBatcher(src.api._predict_proba_rows, max_batch_size=4, max_wait_ms=1)
+        
+        # The handler captured old; the global already points at new
+        with mock.patch.object(src.api, 'batcher', batcher), \
+                mock.patch.object(src.api, 'prediction_cache', None), \
+                mock.patch.object(src.api, '_model', old), \
+                mock.patch.object(src.api, '_predict_proba_rows', new.predict_proba_batch), \
+                mock.patch.object(batcher, 'predict_fn', new.predict_proba_batch):
+            response = self.client.post('/predict', data=payload, content_type='application/json')
+        
+        self.assertEqual(json.loads(response.data)['model_version'], "old-version")
+        self.assertEqual(scored_by, ["old-version"])
+    
+    def test_predict_response_cache(self):
+        """Test repeated /predict calls are served from the cache."""
+        payload = {"origin": "BOS", "dest": "MIA", "airline": "B6", "distance": 1258}
+        cache = PredictionCache(maxsize=16)
+        
+        with mock.patch.object(src.api, 'prediction_cache', cache):
+            first = self.client.post(
+                '/predict',
+                data=json.dumps(payload),
+                content_type='application/json'
+            )
+            with mock.patch.object(src.api._model, 'predict', side_effect=AssertionError):
+                second = self.client.post(
+                    '/predict',
+                    data=json.dumps(payload),
+                    content_type='application/json'
+                )
+            stats = json.loads(self.client.get('/stats').data)['cache']
+        
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(json.loads(first.data), json.loads(second.data))
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['model_version'], src.api._model.version)
+    
+    def test_cache_hits_resume_after_swap(self):
+        """A swap should empty the cache once, and hits resume on the new model."""
+        payload = json.dumps({"origin": "BOS", "dest": "MIA", "airline": "B6"})
+        cache = PredictionCache(maxsize=16)
+        new = FlightDelayModel(src.api.model_reloader.model_path)
+        new.version = "new-version"
+        
+        with isolated_primary(src.api._model) as registry, \
+                mock.patch.object(src.api, 'prediction_cache', cache):
+            self.client.post('/predict', data=payload, content_type='application/json')
+            self.client.post('/predict', data=payload, content_type='application/json')
+            registry.register(src.api.MODEL_LABEL, new, primary=True)
+            swapped = cache.stats()
+            after = [
+                json.loads(self.client.post('/predict', data=payload, content_type='application/json').data)
+                for _ in range(2)
+            ]
+            stats = cache.stats()
+        
+        self.assertEqual((swapped['size'], swapped['invalidations']), (0, 1))
+        self.assertEqual(swapped['model_version'], "new-version")
+        self.assertEqual([r['model_version'] for r in after], ["new-version"] * 2)
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+    
+    def test_prediction_log(self):
+        """Every prediction path should write one log record per scored flight."""
+        flights = [
+            {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": 2475},
+            {"origin": "SFO", "dest": "ORD", "airline": "DL"}
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log = PredictionLogger(tmpdir)
+            with mock.patch.object(src.api, 'prediction_log', log), \
+                    mock.patch.object(src.api, 'prediction_cache', None):
+                single = json.loads(self.client.post(
+                    '/predict', data=json.dumps(flights[0]), content_type='application/json'
+                ).data)
+                self.client.post(
+                    '/predict/batch', data=json.dumps(flights + [{"origin": "SFO"}]),
+                    content_type='application/json'
+                )
+                self.client.post(
+                    '/predict/stream', data="\n".join(json.dumps(f) for f in flights),
+                    content_type='application/x-ndjson'
+                ).data
+                self.client.post(
+                    '/predict/batch', content_type='application/x-npz',
+                    data=encode_request({k: [f.get(k, np.nan) for f in flights]
+                                         for k in ("origin", "dest", "airline", "distance")})
+                )
+                stats = json.loads(self.client.get('/stats').data)['prediction_log']
+            log.close()
+            
+            records = []
+            for path in sorted(glob.glob(os.path.join(tmpdir, '*.jsonl'))):
+                with open(path) as f:
+                    records.extend(json.loads(line) for line in f)
+        
+        self.assertEqual(stats['logged'], 7)
+        self.assertEqual([r['endpoint'] for r in records], [
+            '/predict', '/predict/batch', '/predict/batch', '/predict/stream', '/predict/stream',
+            '/predict/batch', '/predict/batch'
+        ])
+        first = records[0]
+        self.assertEqual(first['model_version'], single['model_version'])
+        self.assertEqual(first['prediction'], single['prediction'])
+        self.assertEqual(first['origin_hash'], single['origin_hash'])
+        self.assertEqual((first['origin'], first['distance'], first['dep_time']), ('JFK', 2475.0, None))
+        # Batch, stream and columnar log the two valid flights alike
+        summary = [(r['origin'], r['distance'], r['prediction']) for r in records[1:]]
+        self.assertEqual(summary[0][:2], ('JFK', 2475.0))
+        self.assertEqual(summary[1][:2], ('SFO', None))
+        self.assertEqual(summary[2:4], summary[:2])
+        self.assertEqual(summary[4:6], summary[:2])
+    
+    def test_shadow_scoring(self):
+        """Every prediction path should shadow-score its rows with the candidates."""
+        flights = [
+            {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": 2475},
+            {"origin": "SFO", "dest": "ORD", "airline": "DL"}
+        ]
+        primary = FlightDelayModel(src.api.model_reloader.model_path)
+        shadowing = isolated_primary(
+            primary, "primary", shadow_sample_rate=1.0, on_score=src.api._record_model_call
+        )
+        
+        with shadowing as registry, mock.patch.object(src.api, 'prediction_cache', None):
+            registry.register("candidate", FlightDelayModel(src.api.model_reloader.model_path))
+            single = self.client.post(
+                '/predict', data=json.dumps(flights[0]), content_type='application/json'
+            )
+            self.client.post('/predict/batch', data=json.dumps(flights), content_type='application/json')
+            self.client.post(
+                '/predict/stream', data="\n".join(json.dumps(f) for f in flights),
+                content_type='application/x-ndjson'
+            ).data
+            self.client.post(
+                '/predict/batch', content_type='application/x-npz',
+                data=encode_request({k: [f.get(k, np.nan) for f in flights]
+                                     for k in ("origin", "dest", "airline", "distance")})
+            )
+            self.assertTrue(registry.drain())
+            stats = json.loads(self.client.get('/stats').data)['models']
+            metrics = self.client.get('/metrics').data.decode()
+        
+        self.assertEqual(single.status_code, 200)
+        self.assertEqual(stats['primary'], 'primary')
+        self.assertEqual(stats['shadow_requests'], 4)
+        primary, candidate = stats['models']['primary'], stats['models']['candidate']
+        self.assertEqual((primary['calls'], primary['rows']), (4, 7))
+        self.assertEqual((candidate['calls'], candidate['compared_rows']), (4, 7))
+        # Same bundle: the candidate agrees on every row
+        self.assertEqual(candidate['agreement_rate'], 1.0)
+        self.assertIn('flight_delay_model_agreement_rate{model="candidate"} 1', metrics)
+        self.assertIn('flight_delay_model_inference_seconds_count{model="candidate"}', metrics)
+    
+    def test_set_primary_routes_traffic(self):
+        """Promoting a candidate should move traffic and latency stats to it."""
+        payload = json.dumps({"origin": "JFK", "dest": "LAX", "airline": "UA"})
+        candidate = FlightDelayModel(src.api.model_reloader.model_path)
+        candidate.version = "candidate-version"
+        primary = FlightDelayModel(src.api.model_reloader.model_path)
+        
+        with isolated_primary(primary, "primary", shadow_sample_rate=1.0) as registry, \
+                mock.patch.object(src.api, 'prediction_cache', None):
+            registry.register("candidate", candidate)
+            before = json.loads(self.client.post('/predict', data=payload, content_type='application/json').data)
+            self.assertTrue(registry.drain())
+            registry.set_primary("candidate")
+            after = json.loads(self.client.post('/predict', data=payload, content_type='application/json').data)
+            self.assertTrue(registry.drain())
+            models = registry.stats()["models"]
+        
+        self.assertNotEqual(before['model_version'], "candidate-version")
+        self.assertEqual(after['model_version'], "candidate-version")
+        self.assertEqual((models['primary']['role'], models['candidate']['role']), ('shadow', 'primary'))
+        # Each model served one request and shadow-scored the other
+        self.assertEqual((models['primary']['calls'], models['candidate']['calls']), (2, 2))
+    
+    def test_no_registry_work_without_shadowing(self):
+        """Without candidates, requests should skip label lookup and per-model timing."""
+        payload = json.dumps({"origin": "JFK", "dest": "LAX", "airline": "UA"})
+        primary = FlightDelayModel(src.api.model_reloader.model_path)
+        
+        with isolated_primary(primary, shadow_sample_rate=1.0) as registry, \
+                mock.patch.object(registry, 'label_of') as label_of, \
+                mock.patch.object(registry, 'observe') as observe:
+            response = self.client.post('/predict', data=payload, content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        label_of.assert_not_called()
+        observe.assert_not_called()
+    
+    def test_parse_candidates(self):
+        """MODEL_CANDIDATES should parse label=path pairs and reject bad entries."""
+        self.assertEqual(
+            src.api.parse_candidates(" v2=model/v2.pkl, v3=/srv/v3 ,"),
+            [("v2", "model/v2.pkl"), ("v3", "/srv/v3")]
+        )
+        self.assertEqual(src.api.parse_candidates(""), [])
+        for spec in ("v2", "=model.pkl", "v2=a,v2=b", f"{src.api.MODEL_LABEL}=a"):
+            with self.assertRaises(ValueError):
+                src.api.parse_candidates(spec)
+    
+    def test_predict_uses_feature_store(self):
+        """Test /predict takes route features from the store and matches live hashing."""
+        payload = {"origin": "DEN", "dest": "SEA", "airline": "AS", "distance": 1024}
+        store = RouteFeatureStore([("DEN", "SEA", "AS")])
+        
+        direct = self.client.post(
+            '/predict',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        with mock.patch.object(src.api, 'feature_store', store), \
+                mock.patch.object(src.api, 'prediction_cache', None), \
+                mock.patch('src.api.extract_features', side_effect=AssertionError):
+            stored = self.client.post(
+                '/predict',
+                data=json.dumps(payload),
+                content_type='application/json'
+            )
+            stats = json.loads(self.client.get('/stats').data)['feature_store']
+        
+        self.assertEqual(stored.status_code, 200)
+        self.assertEqual(json.loads(stored.data), json.loads(direct.data))
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['routes'], 1)
+        self.assertGreater(stats['memory_bytes'], 0)
+    
+    def test_predict_stream_endpoint(self):
+        """Test /predict/stream scores NDJSON lines with per-line errors."""
+        lines = [
+            json.dumps({"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": 2475}),
+            "{not json",
+            "",
+            json.dumps({"origin": "SFO", "dest": "ORD"}),
+            json.dumps([1, 2, 3]),
+            json.dumps({"origin": "ATL", "dest": "DFW", "airline": "AA"})
+        ]
+        body = "\n".join(lines) + "\n"
+        
+        with mock.patch.object(src.api, 'STREAM_CHUNK_SIZE', 2), \
+                mock.patch.object(src.api._model, 'predict_batch',
+                                  wraps=src.api._model.predict_batch) as predict_batch:
+            response = self.client.post(
+                '/predict/stream',
+                data=body,
+                content_type='application/x-ndjson'
+            )
+            results = [json.loads(line) for line in response.data.decode().splitlines()]
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([r['line'] for r in results], [1, 2, 4, 5, 6])
+        self.assertIn(results[0]['prediction'], [0, 1, 2])
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['error'], 'Missing required field: airline')
+        self.assertIn('error', results[3])
+        self.assertEqual(results[4]['origin_hash'], hash_airport_code("ATL"))
+        # Five non-empty lines in chunks of two; the all-error chunk skips the model
+        self.assertEqual(predict_batch.call_count, 2)
+    
+    def test_metrics_endpoint(self):
+        """Test /metrics exposes request counters and stage histograms."""
+        payload = {"origin": "JFK", "dest": "LAX", "airline": "UA"}
+        self.client.post(
+            '/predict',
+            data=json.dumps(payload),
+            content_type='application/json'
+        )
+        
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        
+        text = response.data.decode()
+        self.assertIn(
+            'flight_delay_requests_total{endpoint="/predict",method="POST",status="200"}', text
+        )
+        for stage in ("parse", "features", "inference", "serialize"):
+            self.assertIn(f'endpoint="/predict",stage="{stage}"', text)
+        self.assertIn('flight_delay_model_load_seconds ', text)
+        self.assertIn('flight_delay_request_duration_seconds_count{endpoint="/predict"}', text)
+    
     def test_features_endpoint_success(self):
         """Test /features endpoint with valid data."""
         payload = {
@@ -102,6 +727,18 @@ class TestAPIIntegration(unittest.TestCase):
         self.assertGreaterEqual(data['origin_hash'], 0)
         self.assertLess(data['origin_hash'], 100)
     
+    def test_features_endpoint_rejects_invalid_payload(self):
+        """Test /features returns 400 for missing JSON and non-string codes."""
+        self.assertEqual(self.client.post('/features').status_code, 400)
+        
+        response = self.client.post(
+            '/features',
+            data=json.dumps({"origin": 123, "dest": "ORD", "airline": "DL"}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data)['error'], 'Field origin must be a string')
+    
     def test_features_endpoint_consistency(self):
         """Test that same input produces same features."""
         payload = {"origin": "JFK", "dest": "LAX", "airline": "UA"}
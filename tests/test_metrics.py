@@ -0,0 +1,124 @@
+# Unit Tests for Prometheus Metrics
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.metrics import MetricsRegistry, StageTimer
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for the sharded metrics registry."""
+    
+    def setUp(self):
+        self.registry = MetricsRegistry(namespace="test")
+        self.registry.counter("requests_total", "Requests")
+        self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        self.registry.histogram("stage_duration_seconds", "Stages")
+        self.registry.gauge("load_seconds", "Load time")
+    
+    def test_counters_sum_across_threads(self):
+        """Per-thread shards should be summed at scrape time."""
+        labels = (("endpoint", "/predict"),)
+        
+        def work():
+            for _ in range(1000):
+                self.registry.inc("requests_total", labels)
+        
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['counters'][("requests_total", labels)], 4000)
+        self.assertIn('test_requests_total{endpoint="/predict"} 4000', self.registry.render())
+    
+    def test_dead_thread_shards_are_retired(self):
+        """Shards of exited threads should be folded away without losing counts."""
+        def work():
+            self.registry.inc("requests_total")
+            self.registry.observe("latency_seconds", 0.5)
+        
+        for _ in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['counters'][("requests_total", ())], 50)
+        self.assertEqual(snapshot['histograms'][("latency_seconds", ())][2], 50)
+        self.assertEqual(len(self.registry._shards), 0)
+        # Retiring twice must not double count
+        self.assertEqual(self.registry.snapshot()['counters'][("requests_total", ())], 50)
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Rendered buckets should be cumulative with +Inf, sum and count."""
+        for value in (0.05, 0.1, 0.5, 2.0):
+            self.registry.observe("latency_seconds", value)
+        text = self.registry.render()
+        
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('test_latency_seconds_sum 2.65', text)
+        self.assertIn('test_latency_seconds_count 4', text)
+        self.assertIn('# TYPE test_latency_seconds histogram', text)
+    
+    def test_gauges_and_collectors(self):
+        """Gauges and scrape-time collectors should be rendered."""
+        self.registry.set_gauge("load_seconds", 0.25)
+        self.registry.add_collector(lambda: [("cache_size", "gauge", "Size", [((), 3)])])
+        text = self.registry.render()
+        self.assertIn('test_load_seconds 0.25', text)
+        self.assertIn('test_cache_size 3', text)
+    
+    def test_label_values_are_escaped(self):
+        """Quotes and backslashes in label values should be escaped."""
+        self.registry.inc("requests_total", (("endpoint", 'a"b\\c'),))
+        self.assertIn('endpoint="a\\"b\\\\c"', self.registry.render())
+    
+    def test_stage_timer(self):
+        """StageTimer should record one observation per stage."""
+        stages = StageTimer(self.registry, "/predict")
+        stages.mark("parse")
+        stages.mark("inference")
+        histograms = self.registry.snapshot()['histograms']
+        for stage in ("parse", "inference"):
+            key = ("stage_duration_seconds", (("endpoint", "/predict"), ("stage", stage)))
+            self.assertEqual(histograms[key][2], 1)
+    
+    def test_multiprocess_snapshots_are_merged(self):
+        """Snapshots written by other workers should be merged into render()."""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.registry._multiproc_dir = tmp
+            self.registry.inc("requests_total", (("endpoint", "/health"),), 2)
+            self.registry.observe("latency_seconds", 0.5)
+            self.registry.write_snapshot()
+            
+            # Pretend the snapshot came from another worker
+            os.rename(
+                os.path.join(tmp, f"metrics-{os.getpid()}.json"),
+                os.path.join(tmp, "metrics-999999.json")
+            )
+            with open(os.path.join(tmp, "metrics-999999.json")) as f:
+                self.assertEqual(len(json.load(f)['counters']), 1)
+            
+            text = self.registry.render()
+        
+        self.assertIn('test_requests_total{endpoint="/health"} 4', text)
+        self.assertIn('test_latency_seconds_count 2', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
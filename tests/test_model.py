@@ -0,0 +1,212 @@
+# Unit Tests for Model Inference
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import extract_features, build_feature_vector
+from src.model import FlightDelayModel, ModelReloader
+from src.fast_inference import FastInferenceEngine
+
+MODEL_PATH = os.path.join(project_root, 'model', 'flight_delay_model.pkl')
+
+FLIGHTS = [
+    {"origin": "JFK", "dest": "LAX", "airline": "UA", "dep_time": 800,
+     "arr_time": 1100, "elapsed_time": 360, "distance": 2475},
+    {"origin": "SFO", "dest": "ORD", "airline": "DL", "dep_time": 1730,
+     "arr_time": 2355, "elapsed_time": 265, "distance": 1846},
+    {"origin": "ATL", "dest": "DFW", "airline": "AA"},
+]
+
+
+class TestFlightDelayModelBatch(unittest.TestCase):
+    """Test cases for vectorized batch inference."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Load the shipped model once."""
+        cls.model = FlightDelayModel(MODEL_PATH)
+        cls.rows = [
+            build_feature_vector(
+                extract_features(f["origin"], f["dest"], f["airline"]),
+                f, cls.model.feature_columns, cls.model.feature_defaults
+            )
+            for f in FLIGHTS
+        ]
+    
+    def test_predict_batch_matches_single_predict(self):
+        """Batch predictions should equal row-by-row predictions."""
+        batch = self.model.predict_batch(self.rows).tolist()
+        single = [self.model.predict(row) for row in self.rows]
+        self.assertEqual(batch, single)
+    
+    def test_predict_proba_batch_matches_single(self):
+        """Batch probabilities should equal row-by-row probabilities."""
+        batch = self.model.predict_proba_batch(self.rows)
+        self.assertEqual(batch.shape, (len(self.rows), 3))
+        for row, proba in zip(self.rows, batch):
+            for a, b in zip(self.model.predict_proba(row), proba):
+                self.assertAlmostEqual(a, b, places=12)
+    
+    def test_empty_batch(self):
+        """Empty input should return an empty result without calling sklearn."""
+        self.assertEqual(len(self.model.predict_batch([])), 0)
+        self.assertEqual(self.model.predict_proba_batch([]).shape, (0, 3))
+    
+    def test_rejects_wrong_width(self):
+        """Rows with the wrong number of features should raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.model.predict_batch([[1, 2, 3]])
+    
+    def test_missing_numeric_fields_use_training_mean(self):
+        """Omitted numeric fields should fall back to the scaler mean."""
+        row = self.rows[2]
+        self.assertAlmostEqual(row[-1], self.model.feature_defaults['DISTANCE'])
+    
+    def test_version_is_content_hash(self):
+        """Loading should record a stable content hash as the version."""
+        self.assertEqual(len(self.model.version), 12)
+        self.assertEqual(FlightDelayModel(MODEL_PATH).version, self.model.version)
+    
+    def test_unloaded_model_raises(self):
+        """Predicting before load should raise RuntimeError."""
+        with self.assertRaises(RuntimeError):
+            FlightDelayModel().predict_batch([[0] * 7])
+
+
+class TestFastInferenceEngine(unittest.TestCase):
+    """Test cases for the fused single-row inference path."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Load the shipped model and draw random rows."""
+        cls.model = FlightDelayModel(MODEL_PATH)
+        rng = np.random.default_rng(7)
+        n = 500
+        cls.rows = np.column_stack([
+            rng.integers(0, 100, n), rng.integers(0, 100, n), rng.integers(0, 20, n),
+            rng.integers(0, 2400, n), rng.integers(0, 2400, n),
+            rng.integers(30, 400, n), rng.integers(100, 3000, n)
+        ]).astype(np.float64)
+    
+    def test_engine_is_built_for_shipped_model(self):
+        """GradientBoosting + StandardScaler should get a fast path."""
+        self.assertIsNotNone(self.model.engine)
+        self.assertEqual(self.model.engine.model_type, 'gradient_boosting')
+    
+    def test_parity_with_sklearn(self):
+        """Fused predictions should match sklearn on the shipped model."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected_proba = self.model.predict_proba_batch(self.rows)
+            expected = self.model.predict_batch(self.rows)
+        
+        for row, proba, label in zip(self.rows, expected_proba, expected):
+            np.testing.assert_allclose(self.model.engine.predict_proba(row), proba, rtol=0, atol=1e-12)
+            self.assertEqual(self.model.engine.predict(row.tolist()), label)
+    
+    def test_single_row_methods_use_engine(self):
+        """predict/predict_proba should route through the engine."""
+        row = self.rows[0].tolist()
+        self.assertEqual(self.model.predict(row), self.model.engine.predict(row))
+        self.assertEqual(self.model.predict_proba(row), self.model.engine.predict_proba(row).tolist())
+    
+    def test_wrong_width_raises(self):
+        """Rows of the wrong width should raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.model.engine.predict([1.0, 2.0])
+    
+    def test_unsupported_estimator_falls_back(self):
+        """Unsupported estimators should yield no engine."""
+        from sklearn.neighbors import KNeighborsClassifier
+        knn = KNeighborsClassifier(n_neighbors=1).fit(self.rows[:10], [0, 1, 2, 0, 1, 2, 0, 1, 2, 0])
+        self.assertIsNone(FastInferenceEngine.from_estimators(self.model.scaler, knn, 7))
+        
+        model = FlightDelayModel(MODEL_PATH)
+        model.model = knn
+        model.engine = None
+        self.assertIn(model.predict(self.rows[0].tolist()), [0, 1, 2])
+
+
+class TestModelReloader(unittest.TestCase):
+    """Test cases for hot-reloading the model file."""
+    
+    def setUp(self):
+        """Copy the shipped model into a scratch directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'model.pkl')
+        shutil.copy(MODEL_PATH, self.path)
+        self.swapped = []
+        self.reloader = ModelReloader(self.path, self.swapped.append)
+    
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.tmpdir)
+    
+    def _touch(self, seconds_ahead: int = 10) -> None:
+        """Move the file's mtime forward so the watcher sees a change."""
+        mtime = os.stat(self.path).st_mtime + seconds_ahead
+        os.utime(self.path, (mtime, mtime))
+    
+    def test_check_reloads_only_on_change(self):
+        """check() should swap in a warmed model only after the file changes."""
+        self.assertFalse(self.reloader.check())
+        self._touch()
+        self.assertTrue(self.reloader.check())
+        self.assertFalse(self.reloader.check())
+        
+        self.assertEqual(len(self.swapped), 1)
+        self.assertTrue(self.swapped[0].loaded)
+        self.assertEqual(self.reloader.stats()['reloads'], 1)
+    
+    def test_failed_reload_keeps_current_model(self):
+        """A corrupt file should raise, count a failure and swap nothing."""
+        with open(self.path, 'wb') as f:
+            f.write(b'not a pickle')
+        self._touch()
+        
+        with self.assertRaises(Exception):
+            self.reloader.check()
+        self.assertEqual(self.swapped, [])
+        stats = self.reloader.stats()
+        self.assertEqual(stats['failures'], 1)
+        self.assertIsNotNone(stats['last_error'])
+        # Not retried until the file changes again
+        self.assertFalse(self.reloader.check())
+    
+    def test_refused_swap_is_recorded(self):
+        """An on_swap error should count as a failed reload."""
+        def refuse(model):
+            raise ValueError("feature columns differ")
+        
+        reloader = ModelReloader(self.path, refuse)
+        self._touch()
+        with self.assertRaises(ValueError):
+            reloader.check()
+        stats = reloader.stats()
+        self.assertEqual((stats['reloads'], stats['failures']), (0, 1))
+        self.assertIn("feature columns differ", stats['last_error'])
+    
+    def test_missing_file_is_ignored(self):
+        """A missing model file should not trigger a reload."""
+        os.remove(self.path)
+        self.assertFalse(self.reloader.check())
+    
+    def test_warm_up_runs(self):
+        """warm_up() should exercise the model without errors."""
+        FlightDelayModel(MODEL_PATH).warm_up()
+
+
+if __name__ == '__main__':
+    unittest.main()
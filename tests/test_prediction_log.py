@@ -0,0 +1,158 @@
+# Unit Tests for the Buffered Prediction Log
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.prediction_log import PredictionLogger
+
+
+def read_records(directory: str) -> list:
+    """All records of the finished log files in a directory, in file order."""
+    records = []
+    for path in sorted(glob.glob(os.path.join(directory, "predictions-*.jsonl*"))):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+class TestPredictionLogger(unittest.TestCase):
+    """Test cases for PredictionLogger."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+    
+    def test_records_are_written_in_order(self):
+        """Logged records should all reach the file by close()."""
+        log = PredictionLogger(self.tmpdir, flush_records=10)
+        for i in range(25):
+            self.assertTrue(log.log({"i": i, "prediction": i % 3}))
+        log.close()
+        
+        self.assertEqual([r["i"] for r in read_records(self.tmpdir)], list(range(25)))
+        stats = log.stats()
+        self.assertEqual((stats["logged"], stats["flushed"], stats["dropped"]), (25, 25, 0))
+        self.assertEqual(glob.glob(os.path.join(self.tmpdir, "*.part")), [])
+    
+    def test_flush_interval(self):
+        """Records should be written within flush_interval without close()."""
+        log = PredictionLogger(self.tmpdir, flush_interval=0.05, max_age=0.05)
+        log.log({"i": 1})
+        deadline = time.monotonic() + 5
+        while log.stats()["files"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(read_records(self.tmpdir), [{"i": 1}])
+        log.close()
+    
+    def test_drop_policy(self):
+        """A full buffer should drop new entries and count their records."""
+        log = PredictionLogger(self.tmpdir, capacity=3, flush_interval=60)
+        self.assertTrue(log.log({"i": 0}))
+        self.assertTrue(log.log_batch([{"i": 1}, {"i": 2}]))
+        self.assertFalse(log.log({"i": 3}))
+        self.assertFalse(log.log_batch([{"i": 4}, {"i": 5}]))
+        self.assertEqual(log.stats()["dropped"], 3)
+        log.close()
+        self.assertEqual([r["i"] for r in read_records(self.tmpdir)], [0, 1, 2])
+    
+    def test_capacity_counts_records(self):
+        """Batches should count every record; an oversized one only fits an empty buffer."""
+        log = PredictionLogger(self.tmpdir, capacity=4, flush_interval=60)
+        self.assertTrue(log.log_batch([{"i": i} for i in range(3)]))
+        self.assertFalse(log.log_batch([{"i": i} for i in range(3, 5)]))
+        self.assertEqual(log.stats()["buffered"], 3)
+        log.close()
+        
+        log = PredictionLogger(self.tmpdir, capacity=4, flush_interval=60)
+        self.assertTrue(log.log_columns({}, {"i": np.arange(10)}))
+        self.assertFalse(log.log({"i": 10}))
+        log.close()
+        self.assertEqual(log.stats()["flushed"], 10)
+    
+    def test_block_policy(self):
+        """A full "block" buffer should wait for space, then drop after the timeout."""
+        log = PredictionLogger(self.tmpdir, capacity=1, policy="block", block_timeout=0.05, flush_interval=60)
+        log.log({"i": 0})
+        start = time.perf_counter()
+        self.assertFalse(log.log({"i": 1}))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+        self.assertEqual((log.stats()["blocked"], log.stats()["dropped"]), (1, 1))
+        log.close()
+        
+        # With a draining writer, blocked producers get through
+        log = PredictionLogger(self.tmpdir, capacity=1, policy="block", block_timeout=5, flush_records=1)
+        for i in range(50):
+            self.assertTrue(log.log({"i": i}))
+        log.close()
+        self.assertEqual(log.stats()["dropped"], 0)
+    
+    def test_rotation_and_compression(self):
+        """Files should rotate by size and be valid gzip when compressed."""
+        log = PredictionLogger(self.tmpdir, flush_records=1, max_bytes=200, compress=True)
+        for i in range(0, 20, 4):
+            log.log_batch([{"i": j, "origin": "JFK", "dest": "LAX"} for j in range(i, i + 4)])
+            # One write per batch: size is checked after every write
+            deadline = time.monotonic() + 5
+            while log.stats()["flushed"] < i + 4 and time.monotonic() < deadline:
+                time.sleep(0.005)
+        log.close()
+        
+        paths = glob.glob(os.path.join(self.tmpdir, "*.jsonl.gz"))
+        self.assertGreater(len(paths), 1)
+        self.assertEqual(log.stats()["files"], len(paths))
+        self.assertEqual(sorted(r["i"] for r in read_records(self.tmpdir)), list(range(20)))
+    
+    def test_log_columns(self):
+        """Columnar batches should expand to one record per row, NaN as null."""
+        log = PredictionLogger(self.tmpdir)
+        log.log_columns({"endpoint": "/predict/batch"}, {
+            "origin": np.array(["JFK", "SFO"]),
+            "distance": np.array([2475.0, np.nan]),
+            "prediction": np.array([1, 0], dtype=np.int8)
+        })
+        log.close()
+        self.assertEqual(read_records(self.tmpdir), [
+            {"endpoint": "/predict/batch", "origin": "JFK", "distance": 2475.0, "prediction": 1},
+            {"endpoint": "/predict/batch", "origin": "SFO", "distance": None, "prediction": 0}
+        ])
+        self.assertEqual(log.stats()["flushed"], 2)
+    
+    def test_write_errors_are_counted(self):
+        """An unwritable directory should count dropped records, not raise."""
+        blocker = os.path.join(self.tmpdir, "file")
+        open(blocker, "w").close()
+        log = PredictionLogger(os.path.join(blocker, "logs"))
+        with self.assertLogs("src.prediction_log", "ERROR"):
+            self.assertTrue(log.log({"i": 0}))
+            log.close()
+        stats = log.stats()
+        self.assertEqual((stats["write_errors"], stats["dropped"], stats["flushed"]), (1, 1, 0))
+    
+    def test_invalid_arguments(self):
+        """Unknown policies and empty buffers should raise ValueError."""
+        with self.assertRaises(ValueError):
+            PredictionLogger(self.tmpdir, policy="spill")
+        with self.assertRaises(ValueError):
+            PredictionLogger(self.tmpdir, capacity=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# Unit Tests for Sampled Request Profiling
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import marshal
+import os
+import sys
+import tempfile
+import threading
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src import profiling
+from src.profiling import RequestProfiler, load_dumps
+
+
+def _work(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Test cases for RequestProfiler."""
+    
+    def _profile(self, profiler: RequestProfiler, n: int = 1000) -> bool:
+        profile = profiler.start()
+        if profile is None:
+            return False
+        _work(n)
+        profiler.stop(profile)
+        return True
+    
+    def test_rejects_invalid_sample_rate(self):
+        """Sample rates outside (0, 1] should raise ValueError."""
+        for rate in (0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                RequestProfiler(rate)
+    
+    def test_aggregates_sampled_requests(self):
+        """Profiles of every sampled request should merge into one report."""
+        profiler = RequestProfiler(1.0)
+        for _ in range(profiling.MERGE_EVERY + 3):
+            self.assertTrue(self._profile(profiler))
+        
+        stats = profiler.raw_stats()
+        calls = [v[1] for k, v in stats.items() if k[2] == '_work']
+        self.assertEqual(calls, [profiling.MERGE_EVERY + 3])
+        self.assertIn('_work', profiler.report(limit=5))
+        self.assertEqual(profiler.summary()['profiled'], profiling.MERGE_EVERY + 3)
+    
+    def test_sampling_rate(self):
+        """Only about sample_rate of requests should be profiled."""
+        profiler = RequestProfiler(0.1)
+        sampled = sum(self._profile(profiler, 1) for _ in range(2000))
+        self.assertGreater(sampled, 100)
+        self.assertLess(sampled, 320)
+    
+    def test_one_profile_at_a_time(self):
+        """A request started while another is profiled should be skipped."""
+        profiler = RequestProfiler(1.0)
+        first = profiler.start()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(profiler.start()))
+        thread.start()
+        thread.join()
+        profiler.stop(first)
+        
+        self.assertEqual(result, [None])
+        self.assertEqual(profiler.summary()['skipped_busy'], 1)
+        self.assertTrue(self._profile(profiler))
+    
+    def test_reset_and_empty_report(self):
+        """reset() should drop all statistics."""
+        profiler = RequestProfiler(1.0)
+        self._profile(profiler)
+        profiler.reset()
+        
+        self.assertEqual(profiler.raw_stats(), {})
+        self.assertEqual(profiler.report(), "No requests profiled yet\n")
+        self.assertEqual(profiler.summary()['profiled'], 0)
+    
+    def test_invalid_sort_key(self):
+        """An unknown sort key should raise KeyError."""
+        profiler = RequestProfiler(1.0)
+        self._profile(profiler)
+        with self.assertRaises(KeyError):
+            profiler.report(sort="bogus")
+    
+    def test_dump_and_merge_workers(self):
+        """Per-worker dumps should load back and merge across files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profiler = RequestProfiler(1.0, dump_dir=tmpdir)
+            self.assertIsNone(profiler.dump())
+            self.assertIsNone(load_dumps(tmpdir))
+            
+            self._profile(profiler)
+            path = profiler.dump()
+            self.assertEqual(os.path.dirname(path), tmpdir)
+            other = profiler.dump(os.path.join(tmpdir, 'profile-other.prof'))
+            with open(other, 'rb') as f:
+                self.assertEqual(marshal.load(f), profiler.raw_stats())
+            
+            merged = load_dumps(tmpdir)
+            calls = [v[1] for k, v in merged.stats.items() if k[2] == '_work']
+            self.assertEqual(calls, [2])
+            self.assertIsNotNone(profiler.summary()['last_dump_at'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+# Unit Tests for the Multi-Model Registry
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.registry import ModelRegistry
+
+COLUMNS = ["origin_hash", "dest_hash", "airline_hash", "distance"]
+
+
+class FakeModel:
+    """Predicts a class from the first feature of each row."""
+    
+    def __init__(self, version, rule=lambda X: X[:, 0] % 3, feature_columns=COLUMNS):
+        self.version = version
+        self.rule = rule
+        self.feature_columns = list(feature_columns)
+        self.calls = 0
+    
+    def predict_batch(self, X):
+        self.calls += 1
+        return np.asarray(self.rule(np.asarray(X)), dtype=np.int64)
+
+
+def rows(n: int) -> list:
+    """n feature rows whose first feature runs 0..n-1."""
+    return [[float(i), 1.0, 2.0, 100.0] for i in range(n)]
+
+
+class TestModelRegistry(unittest.TestCase):
+    """Test cases for ModelRegistry."""
+    
+    def setUp(self):
+        self.primary = FakeModel("v1")
+        self.registry = ModelRegistry(shadow_sample_rate=1.0)
+        self.registry.register("v1", self.primary)
+    
+    def test_first_model_is_primary(self):
+        """The first model registered should serve traffic; later ones shadow it."""
+        self.registry.register("v2", FakeModel("v2"))
+        self.assertEqual(self.registry.primary_label, "v1")
+        self.assertIs(self.registry.primary, self.primary)
+        self.assertEqual(self.registry.candidates, ("v2",))
+        self.assertEqual(self.registry.get("v2").version, "v2")
+        
+        self.registry.set_primary("v2")
+        self.assertEqual(self.registry.primary_label, "v2")
+        self.assertEqual(self.registry.candidates, ("v1",))
+        with self.assertRaises(KeyError):
+            self.registry.set_primary("v3")
+    
+    def test_primary_changes_are_published(self):
+        """on_primary should see every new primary, including set_primary."""
+        published = []
+        registry = ModelRegistry(on_primary=published.append)
+        v2 = FakeModel("v2")
+        registry.register("v1", self.primary)
+        registry.register("v2", v2)
+        registry.set_primary("v2")
+        self.assertEqual(published, [self.primary, v2])
+        self.assertEqual((registry.label_of(v2), registry.label_of(FakeModel("v3"))), ("v2", None))
+    
+    def test_stale_primary_is_not_shadowed(self):
+        """Rows scored by a model that is no longer primary should not be compared."""
+        self.registry.register("v2", FakeModel("v2"))
+        self.registry.set_primary("v2")
+        self.assertFalse(self.registry.shadow(rows(1), [0], "v1"))
+        self.assertTrue(self.registry.shadow(rows(1), [0], "v2"))
+        self.assertTrue(self.registry.drain())
+        self.assertEqual(self.registry.stats()["models"]["v1"]["compared_rows"], 1)
+    
+    def test_feature_columns_must_match(self):
+        """Candidates score the primary's rows, so their columns must agree."""
+        with self.assertRaises(ValueError):
+            self.registry.register("v2", FakeModel("v2", feature_columns=COLUMNS[:3]))
+        self.assertEqual(self.registry.candidates, ())
+    
+    def test_shadow_agreement(self):
+        """Candidates should score the same rows and report agreement with the primary."""
+        self.registry.register("same", FakeModel("same"))
+        # Disagrees on every row whose first feature is 1 mod 3
+        self.registry.register("other", FakeModel("other", lambda X: np.where(X[:, 0] % 3 == 1, 0, X[:, 0] % 3)))
+        X = rows(30)
+        expected = self.primary.predict_batch(X)
+        
+        self.assertTrue(self.registry.shadow(X, expected))
+        self.assertTrue(self.registry.shadow(X[:1], expected[:1].tolist()))
+        self.assertTrue(self.registry.drain())
+        
+        models = self.registry.stats()["models"]
+        self.assertEqual(models["same"]["agreement_rate"], 1.0)
+        self.assertEqual(models["other"]["compared_rows"], 31)
+        self.assertAlmostEqual(models["other"]["agreement_rate"], 21 / 31)
+        self.assertEqual(models["other"]["calls"], 2)
+        self.assertEqual(models["other"]["rows"], 31)
+        self.assertGreater(models["other"]["p99_ms"], 0)
+        self.assertEqual(models["v1"]["role"], "primary")
+        self.assertNotIn("agreement_rate", models["v1"])
+        # The primary is scored on the request thread, never by the shadow worker
+        self.assertEqual(self.primary.calls, 1)
+    
+    def test_shadow_runs_off_the_caller_thread(self):
+        """shadow() should return before a slow candidate finishes."""
+        release = threading.Event()
+        self.registry.register("slow", FakeModel("slow", lambda X: release.wait(5) and X[:, 0] % 3))
+        self.assertTrue(self.registry.shadow(rows(1), [0]))
+        self.assertEqual(self.registry.stats()["models"]["slow"]["calls"], 0)
+        release.set()
+        self.assertTrue(self.registry.drain())
+        self.assertEqual(self.registry.stats()["models"]["slow"]["calls"], 1)
+    
+    def test_full_queue_drops(self):
+        """Sampled requests beyond the queue bound should be dropped and counted."""
+        release = threading.Event()
+        registry = ModelRegistry(shadow_sample_rate=1.0, max_queue_rows=1)
+        registry.register("v1", self.primary)
+        registry.register("slow", FakeModel("slow", lambda X: release.wait(5) and X[:, 0] % 3))
+        
+        results = [registry.shadow(rows(1), [0]) for _ in range(5)]
+        release.set()
+        self.assertTrue(registry.drain())
+        stats = registry.stats()
+        self.assertEqual(stats["shadow_requests"], results.count(True))
+        self.assertEqual(stats["shadow_dropped"], results.count(False))
+        self.assertGreaterEqual(stats["shadow_dropped"], 3)
+    
+    def test_queue_is_bounded_by_rows(self):
+        """Large batches should be down-sampled to copies and count rows against the bound."""
+        release = threading.Event()
+        registry = ModelRegistry(shadow_sample_rate=1.0, max_queue_rows=250, max_rows=100)
+        registry.register("v1", self.primary)
+        seen = []
+        registry.register("slow", FakeModel("slow", lambda X: seen.append(X) or (release.wait(5) and X[:, 0] % 3)))
+        X = np.asarray(rows(1000))
+        expected = X[:, 0] % 3
+        
+        results = [registry.shadow(X, expected) for _ in range(4)]
+        queued = registry.stats()
+        release.set()
+        self.assertTrue(registry.drain())
+        # 100 rows each: two fit below 250 queued rows (the first may already be running)
+        self.assertIn(results, ([True, True, False, False], [True, True, True, False]))
+        self.assertLessEqual(queued["shadow_queued_rows"], 250)
+        stats = registry.stats()
+        self.assertEqual(stats["shadow_rows"], 100 * results.count(True))
+        self.assertEqual(stats["shadow_queued_rows"], 0)
+        self.assertEqual(stats["models"]["slow"]["agreement_rate"], 1.0)
+        self.assertEqual(len(seen[0]), 100)
+        self.assertFalse(np.shares_memory(seen[0], X))
+    
+    def test_sampling(self):
+        """A zero rate or no candidates should never queue; the rate is per request."""
+        self.assertFalse(self.registry.shadow(rows(1), [0]))
+        self.registry.register("v2", FakeModel("v2"))
+        self.assertFalse(ModelRegistry(shadow_sample_rate=0.0).shadow(rows(1), [0]))
+        
+        registry = ModelRegistry(shadow_sample_rate=0.25, max_queue_rows=2000)
+        registry.register("v1", self.primary)
+        registry.register("v2", FakeModel("v2"))
+        sampled = sum(registry.shadow(rows(1), [0]) for _ in range(2000))
+        registry.drain()
+        self.assertTrue(300 < sampled < 700, sampled)
+        with self.assertRaises(ValueError):
+            ModelRegistry(shadow_sample_rate=1.5)
+    
+    def test_candidate_errors_are_counted(self):
+        """A failing candidate should be counted without affecting the others."""
+        def fail(X):
+            raise RuntimeError("boom")
+        
+        self.registry.register("bad", FakeModel("bad", fail))
+        self.registry.register("good", FakeModel("good"))
+        with self.assertLogs("src.registry", "ERROR"):
+            self.registry.shadow(rows(3), [0, 1, 2])
+            self.assertTrue(self.registry.drain())
+        models = self.registry.stats()["models"]
+        self.assertEqual(models["bad"]["errors"], 1)
+        self.assertEqual(models["good"]["agreement_rate"], 1.0)
+    
+    def test_new_primary_resets_agreement(self):
+        """Agreement counts should restart when the primary changes."""
+        self.registry.register("v2", FakeModel("v2"))
+        self.registry.shadow(rows(3), [0, 1, 2])
+        self.assertTrue(self.registry.drain())
+        self.assertEqual(self.registry.stats()["models"]["v2"]["compared_rows"], 3)
+        
+        self.registry.register("v1", FakeModel("v1-reloaded"), primary=True)
+        models = self.registry.stats()["models"]
+        self.assertEqual(models["v1"]["version"], "v1-reloaded")
+        self.assertIsNone(models["v2"]["agreement_rate"])
+        # Latency history is kept
+        self.assertEqual(models["v2"]["calls"], 1)
+    
+    def test_observe_sums_thread_shards(self):
+        """Calls timed on several threads should all be counted."""
+        def work():
+            for _ in range(500):
+                self.registry.observe("v1", 0.001, 2)
+        
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        entry = self.registry.stats()["models"]["v1"]
+        self.assertEqual((entry["calls"], entry["rows"]), (2000, 4000))
+    
+    def test_label_lives_on_the_model(self):
+        """label_of should read the model's own label and ignore replaced models."""
+        old = self.registry.get("v1")
+        self.assertEqual(old.registry_label, "v1")
+        self.registry.register("v1", FakeModel("v1-reloaded"))
+        self.assertIsNone(self.registry.label_of(old))
+        self.assertEqual(self.registry.label_of(self.registry.get("v1")), "v1")
+    
+    def test_shadowing_needs_candidates_and_a_rate(self):
+        """shadowing should be False without candidates or with a zero rate."""
+        self.assertFalse(self.registry.shadowing)
+        self.registry.register("v2", FakeModel("v2"))
+        self.assertTrue(self.registry.shadowing)
+        registry = ModelRegistry(shadow_sample_rate=0.0)
+        registry.register("v1", FakeModel("v1"))
+        registry.register("v2", FakeModel("v2"))
+        self.assertFalse(registry.shadowing)
+    
+    def test_observe_and_remove(self):
+        """observe() should feed stats and on_score; only candidates can be removed."""
+        scored = []
+        registry = ModelRegistry(on_score=lambda *args: scored.append(args))
+        registry.register("v1", self.primary)
+        registry.register("v2", FakeModel("v2"))
+        registry.observe("v1", 0.002, 4)
+        self.assertEqual(scored, [("v1", 0.002, 4)])
+        entry = registry.stats()["models"]["v1"]
+        self.assertEqual((entry["calls"], entry["rows"]), (1, 4))
+        # Estimated inside the (1 ms, 2.5 ms] bucket
+        self.assertGreater(entry["p50_ms"], 1.0)
+        self.assertLessEqual(entry["p50_ms"], 2.5)
+        self.assertAlmostEqual(entry["mean_ms"], 2.0)
+        self.assertAlmostEqual(entry["us_per_row"], 500.0)
+        
+        with self.assertRaises(ValueError):
+            registry.remove("v1")
+        registry.remove("v2")
+        self.assertEqual(registry.candidates, ())
+        self.assertNotIn("v2", registry.stats()["models"])
+
+
+if __name__ == '__main__':
+    unittest.main()
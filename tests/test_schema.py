@@ -0,0 +1,88 @@
+# Unit Tests for Request Schema and JSON Codec
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import sys
+from unittest import mock
+
+import numpy as np
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src import json_provider
+from src.schema import ValidationError, parse_flight
+
+
+class TestParseFlight(unittest.TestCase):
+    """Test cases for single-pass flight validation."""
+    
+    def test_coerces_numeric_fields(self):
+        """Numbers and numeric strings should become floats, omitted ones None."""
+        flight = parse_flight({
+            "origin": "JFK", "dest": "LAX", "airline": "UA",
+            "dep_time": 800, "distance": "2475.5", "extra": "ignored"
+        })
+        self.assertEqual(flight["dep_time"], 800.0)
+        self.assertIsInstance(flight["dep_time"], float)
+        self.assertEqual(flight["distance"], 2475.5)
+        self.assertIsNone(flight["arr_time"])
+        self.assertNotIn("extra", flight)
+    
+    def test_missing_route_field(self):
+        """A missing or null route code should name the field."""
+        with self.assertRaises(ValidationError) as ctx:
+            parse_flight({"origin": "JFK", "dest": "LAX"})
+        self.assertEqual(str(ctx.exception), "Missing required field: airline")
+        with self.assertRaises(ValidationError):
+            parse_flight({"origin": "JFK", "dest": None, "airline": "UA"})
+    
+    def test_optional_route_fields(self):
+        """require_route=False should fill missing codes with empty strings."""
+        flight = parse_flight({"origin": "JFK"}, require_route=False)
+        self.assertEqual((flight["dest"], flight["airline"]), ("", ""))
+    
+    def test_rejects_invalid_values(self):
+        """Non-objects, non-string codes and bad numbers should be rejected."""
+        invalid = [
+            ["JFK"],
+            {"origin": 1, "dest": "LAX", "airline": "UA"},
+            {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": "far"},
+            {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": True},
+            {"origin": "JFK", "dest": "LAX", "airline": "UA", "distance": "nan"},
+        ]
+        for payload in invalid:
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValidationError):
+                    parse_flight(payload)
+    
+    def test_validation_error_is_value_error(self):
+        """Callers catching ValueError should also catch schema errors."""
+        self.assertTrue(issubclass(ValidationError, ValueError))
+
+
+class TestJsonCodec(unittest.TestCase):
+    """Test cases for the orjson / stdlib JSON codec."""
+    
+    def test_round_trip_with_numpy_and_int_keys(self):
+        """numpy scalars and int dict keys should serialize."""
+        if not json_provider.HAS_ORJSON:
+            self.skipTest("orjson not installed")
+        text = json_provider.dumps({"prediction": np.int64(2), "counts": {1: 3}})
+        self.assertEqual(json_provider.loads(text), {"prediction": 2, "counts": {"1": 3}})
+    
+    def test_stdlib_fallback(self):
+        """Without orjson the stdlib codec should produce the same JSON."""
+        with mock.patch.object(json_provider, "HAS_ORJSON", False):
+            text = json_provider.dumps({"a": [1, 2.5, "x"]})
+            self.assertEqual(text, '{"a":[1,2.5,"x"]}')
+            self.assertEqual(json_provider.loads(b'{"a": 1}'), {"a": 1})
+            with self.assertRaises(ValueError):
+                json_provider.loads("{not json")
+
+
+if __name__ == '__main__':
+    unittest.main()
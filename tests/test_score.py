@@ -0,0 +1,151 @@
+# Unit Tests for Offline Batch Scoring
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import warnings
+from unittest import mock
+
+import pandas as pd
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.feature_engineering import DELAY_LABELS, extract_features, build_feature_vector
+from src.model import FlightDelayModel
+from src.score import score_file, score_frame
+
+MODEL_PATH = os.path.join(project_root, 'model', 'flight_delay_model.pkl')
+
+# BTS-style column names, including a blank distance and the "NA" code
+CSV_TEXT = """ORIGIN,DEST,OP_CARRIER,CRS_DEP_TIME,CRS_ARR_TIME,CRS_ELAPSED_TIME,DISTANCE
+JFK,LAX,UA,800,1100,360,2475
+SFO,ORD,DL,1730,2355,265,1846
+ATL,DFW,AA,615,745,150,
+NA,BOS,B6,1200,1500,180,1000
+LAX,SEA,AS,2100,2340,160,954
+"""
+
+
+class TestScoreFile(unittest.TestCase):
+    """Test cases for the offline scoring CLI."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Load the model and compute expected single-row predictions."""
+        warnings.simplefilter("ignore")
+        cls.model = FlightDelayModel(MODEL_PATH)
+        cls.expected = []
+        for line in CSV_TEXT.strip().splitlines()[1:]:
+            origin, dest, airline, dep, arr, elapsed, distance = line.split(',')
+            data = {
+                "dep_time": dep, "arr_time": arr, "elapsed_time": elapsed,
+                "distance": distance or None
+            }
+            row = build_feature_vector(
+                extract_features(origin, dest, airline), data,
+                cls.model.feature_columns, cls.model.feature_defaults
+            )
+            cls.expected.append(cls.model.predict(row))
+    
+    def setUp(self):
+        """Write the input file into a scratch directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmpdir, "flights.csv")
+        with open(self.input, "w") as f:
+            f.write(CSV_TEXT)
+    
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.tmpdir)
+    
+    def test_in_process_matches_single_row_predictions(self):
+        """Chunked in-process scoring should match model.predict per row."""
+        output = os.path.join(self.tmpdir, "scored.csv")
+        result = score_file(self.input, output, model_path=MODEL_PATH, workers=1, chunk_size=2)
+        
+        scored = pd.read_csv(output, keep_default_na=False)
+        self.assertEqual(result["rows"], 5)
+        self.assertEqual(result["chunks"], 3)
+        self.assertEqual(scored["prediction"].tolist(), self.expected)
+        self.assertEqual(scored["ORIGIN"].tolist()[3], "NA")
+        prob_columns = [c for c in scored.columns if c.startswith("prob_")]
+        self.assertEqual(prob_columns, [f"prob_{cls}" for cls in self.model.classes])
+        self.assertEqual(scored["prediction_label"].tolist(), [DELAY_LABELS[p] for p in self.expected])
+    
+    def test_default_model_path_follows_model_path_env(self):
+        """Without model_path the scorer should load the server's MODEL_PATH."""
+        output = os.path.join(self.tmpdir, "scored.csv")
+        with mock.patch.dict(os.environ, {"MODEL_PATH": MODEL_PATH}):
+            result = score_file(self.input, output, workers=1)
+        self.assertEqual(result["rows"], 5)
+        with mock.patch.dict(os.environ, {"MODEL_PATH": os.path.join(self.tmpdir, "missing.pkl")}):
+            with self.assertRaises(FileNotFoundError):
+                score_file(self.input, output, workers=1)
+    
+    def test_process_pool_preserves_order(self):
+        """Multi-worker scoring should produce the same rows in input order."""
+        output = os.path.join(self.tmpdir, "scored.csv")
+        result = score_file(self.input, output, model_path=MODEL_PATH, workers=2, chunk_size=1)
+        
+        scored = pd.read_csv(output, keep_default_na=False)
+        self.assertEqual(result["chunks"], 5)
+        self.assertEqual(scored["prediction"].tolist(), self.expected)
+        self.assertGreater(result["rows_per_second"], 0)
+    
+    def test_header_only_csv_writes_header(self):
+        """A CSV without rows should still produce the scored header."""
+        with open(self.input, "w") as f:
+            f.write(CSV_TEXT.splitlines()[0] + "\n")
+        output = os.path.join(self.tmpdir, "scored.csv")
+        result = score_file(self.input, output, model_path=MODEL_PATH, workers=2)
+        
+        scored = pd.read_csv(output)
+        self.assertEqual(result["rows"], 0)
+        self.assertEqual(len(scored), 0)
+        self.assertIn("prediction_label", scored.columns)
+        self.assertIn(f"prob_{self.model.classes[0]}", scored.columns)
+    
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_empty_parquet_writes_schema(self):
+        """A Parquet file without rows should produce a readable, typed output file."""
+        import pyarrow.parquet as pq
+        
+        source = os.path.join(self.tmpdir, "flights.parquet")
+        pd.read_csv(self.input, nrows=0, dtype=str).to_parquet(source, index=False)
+        output = os.path.join(self.tmpdir, "scored.parquet")
+        result = score_file(source, output, model_path=MODEL_PATH, workers=1)
+        
+        schema = pq.read_schema(output)
+        self.assertEqual(result["chunks"], 0)
+        self.assertEqual(pq.read_metadata(output).num_rows, 0)
+        self.assertEqual(str(schema.field("prediction_label").type), "string")
+        self.assertIn(f"prob_{self.model.classes[-1]}", schema.names)
+    
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_csv_to_parquet_with_blank_number_in_later_chunk(self):
+        """A numeric column that only has blanks in a later chunk should not break the Parquet schema."""
+        output = os.path.join(self.tmpdir, "scored.parquet")
+        # Rows 1-2 have whole distances, row 3 (second chunk) is blank
+        result = score_file(self.input, output, model_path=MODEL_PATH, workers=1, chunk_size=2)
+        
+        scored = pd.read_parquet(output)
+        self.assertEqual(result["chunks"], 3)
+        self.assertEqual(scored["prediction"].tolist(), self.expected)
+        self.assertEqual(str(scored["DISTANCE"].dtype), "float64")
+        self.assertTrue(pd.isna(scored["DISTANCE"][2]))
+    
+    def test_missing_required_column_raises(self):
+        """Frames without a route column should be rejected."""
+        with self.assertRaises(ValueError):
+            score_frame(self.model, pd.DataFrame({"origin": ["JFK"], "dest": ["LAX"]}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# Cold-Start Tests
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import json
+import os
+import subprocess
+import sys
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import src.api
+
+# Upper bound for a fresh interpreter to import the API and answer
+# /features without a model (about 0.25 s locally; generous for CI)
+COLD_START_BUDGET_SECONDS = 3.0
+
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "scipy")
+
+
+def run_child(code: str, **env) -> dict:
+    """Run code in a fresh interpreter and parse the JSON it prints last."""
+    child = "import json, sys, time\nstart = time.perf_counter()\n" + code
+    out = subprocess.run(
+        [sys.executable, "-c", child], cwd=project_root, check=True, capture_output=True, text=True,
+        env={**os.environ, "LOG_LEVEL": "WARNING", **env}
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+class TestColdStart(unittest.TestCase):
+    """Test cases for import cost and startup reporting."""
+    
+    def test_feature_engineering_imports_without_heavy_modules(self):
+        """Hashing and request parsing should not load NumPy, pandas or sklearn."""
+        result = run_child(
+            "import src.feature_engineering, src.schema\n"
+            "print(json.dumps({'loaded': [m for m in %r if m in sys.modules],\n"
+            "                  'hash': src.feature_engineering.extract_features('JFK', 'LAX', 'UA')}))"
+            % (HEAVY_MODULES,)
+        )
+        self.assertEqual(result['loaded'], [])
+        self.assertEqual(
+            result['hash'], src.api.extract_features('JFK', 'LAX', 'UA')
+        )
+    
+    def test_features_only_cold_start(self):
+        """With background loading, /features should answer quickly without the model stack."""
+        result = run_child(
+            "import src.api\n"
+            "client = src.api.app.test_client()\n"
+            "features = client.post('/features', json={'origin': 'JFK', 'dest': 'LAX', 'airline': 'UA'})\n"
+            "health = client.get('/health')\n"
+            "print(json.dumps({'seconds': time.perf_counter() - start,\n"
+            "                  'features': features.status_code, 'health': health.status_code,\n"
+            "                  'loaded': [m for m in %r if m in sys.modules]}))"
+            % (HEAVY_MODULES,),
+            MODEL_LOAD_MODE="background"
+        )
+        self.assertEqual(result['features'], 200)
+        self.assertEqual(result['health'], 503)
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['seconds'], COLD_START_BUDGET_SECONDS)
+    
+    def test_background_model_load(self):
+        """start_worker_services() should load the model in a thread in background mode."""
+        result = run_child(
+            "import src.api\n"
+            "src.api.start_worker_services()\n"
+            "src.api._model_loader.join(30)\n"
+            "status = src.api.app.test_client().get('/health').status_code\n"
+            "print(json.dumps({'health': status, 'report': src.api.startup_report()}))",
+            MODEL_LOAD_MODE="background"
+        )
+        self.assertEqual(result['health'], 200)
+        self.assertEqual(result['report']['mode'], 'background')
+        self.assertEqual(set(result['report']['phases']), {'imports', 'model_load', 'warm_up'})
+    
+    def test_startup_report(self):
+        """The startup report should break down imports, model load and warm-up."""
+        report = src.api.startup_report()
+        self.assertEqual(set(report['phases']), {'imports', 'model_load', 'warm_up'})
+        self.assertAlmostEqual(report['total_seconds'], sum(report['phases'].values()))
+        
+        client = src.api.app.test_client()
+        self.assertEqual(json.loads(client.get('/stats').data)['startup'], report)
+        metrics = client.get('/metrics').data.decode()
+        self.assertIn('flight_delay_startup_seconds{phase="warm_up"}', metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
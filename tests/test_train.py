@@ -0,0 +1,155 @@
+# Unit Tests for Out-of-Core Training
+# MLOps HW2 - Efe Çetin
+
+import unittest
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path for CI compatibility
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src import feature_engineering
+from src.feature_engineering import KNOWN_AIRLINE_CODES, KNOWN_AIRPORT_CODES, categorize_delay
+from src.model import FlightDelayModel
+from src.train import FEATURE_COLUMNS, main, prepare_chunk, train
+
+
+def make_training_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """BTS-style flights whose delay grows with departure time."""
+    rng = np.random.default_rng(seed)
+    dep = rng.integers(500, 2300, n)
+    delay = rng.normal(-5, 10, n) + (dep - 500) / 40
+    delay[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'ORIGIN': rng.choice(KNOWN_AIRPORT_CODES, n),
+        'DEST': rng.choice(KNOWN_AIRPORT_CODES, n),
+        'OP_CARRIER': rng.choice(KNOWN_AIRLINE_CODES, n),
+        'CRS_DEP_TIME': dep,
+        'CRS_ARR_TIME': (dep + 300) % 2400,
+        'CRS_ELAPSED_TIME': rng.integers(60, 400, n),
+        'DISTANCE': rng.integers(100, 2800, n),
+        'ARR_DELAY': delay.round()
+    })
+
+
+class TestTrain(unittest.TestCase):
+    """Test cases for the training pipeline."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Write one synthetic training file shared by all tests."""
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.input = os.path.join(cls.tmpdir, "flights.csv")
+        cls.frame = make_training_frame(3000)
+        cls.frame.to_csv(cls.input, index=False)
+    
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+    
+    def _output(self, name: str) -> str:
+        return os.path.join(self.tmpdir, name)
+    
+    def test_prepare_chunk(self):
+        """Chunks should hash like extract_features and drop rows without a delay."""
+        frame = self.frame.head(200)
+        X, y, dropped = prepare_chunk(frame, 'ARR_DELAY', dict.fromkeys(FEATURE_COLUMNS, np.nan))
+        labeled = frame[frame['ARR_DELAY'].notna()]
+        
+        self.assertEqual(dropped, len(frame) - len(labeled))
+        self.assertEqual(X.shape, (len(labeled), len(FEATURE_COLUMNS)))
+        self.assertEqual(y.tolist(), [categorize_delay(d) for d in labeled['ARR_DELAY']])
+        self.assertEqual(X[:, 3].tolist(), labeled['CRS_DEP_TIME'].astype(float).tolist())
+    
+    def test_prepare_chunk_requires_label(self):
+        """A missing label column should raise ValueError."""
+        with self.assertRaises(ValueError):
+            prepare_chunk(self.frame.drop(columns=['ARR_DELAY']), 'ARR_DELAY', {})
+    
+    def test_bundle_loads_and_learns(self):
+        """The written bundle should load unchanged and beat the majority class."""
+        output = self._output("model.pkl")
+        result = train(self.input, output, epochs=3, chunk_size=500)
+        
+        labeled = self.frame['ARR_DELAY'].notna().sum()
+        self.assertEqual(result['rows'], labeled)
+        self.assertEqual(result['dropped'], len(self.frame) - labeled)
+        self.assertEqual([p['pass'] for p in result['passes']], ['scaler', 'epoch 1', 'epoch 2', 'epoch 3'])
+        self.assertGreater(result['rows_per_second'], 0)
+        
+        with open(output, 'rb') as f:
+            bundle = pickle.load(f)
+        self.assertEqual(bundle['feature_columns'], FEATURE_COLUMNS)
+        self.assertEqual(bundle['hash_scheme'], 'md5')
+        self.assertEqual(bundle['hash_buckets'], {'origin': 100, 'dest': 100, 'airline': 20})
+        
+        model = FlightDelayModel(output)
+        self.assertIsNotNone(model.engine)
+        X = np.column_stack([
+            np.zeros((5, 3)), [600, 900, 1200, 1800, 2200], [900] * 5, [200] * 5, [1000] * 5
+        ])
+        np.testing.assert_allclose(
+            [model.predict_proba(row) for row in X.tolist()],
+            model.model.predict_proba(model.scaler.transform(X)), atol=1e-9
+        )
+        
+        majority = self.frame['ARR_DELAY'].dropna().map(categorize_delay).value_counts(normalize=True).max()
+        self.assertGreater(result['passes'][-1]['progressive_accuracy'], majority)
+    
+    def test_process_pool_matches_in_process(self):
+        """Preprocessing in a pool should produce the identical model."""
+        serial, pooled = self._output("serial.pkl"), self._output("pooled.pkl")
+        train(self.input, serial, epochs=1, chunk_size=400)
+        train(self.input, pooled, epochs=1, chunk_size=400, workers=2)
+        
+        with open(serial, 'rb') as f:
+            a = pickle.load(f)
+        with open(pooled, 'rb') as f:
+            b = pickle.load(f)
+        np.testing.assert_array_equal(a['model'].coef_, b['model'].coef_)
+        np.testing.assert_array_equal(a['scaler'].mean_, b['scaler'].mean_)
+    
+    def test_hash_scheme_is_recorded_and_enforced(self):
+        """A crc32 bundle should only load while crc32 is the active scheme."""
+        output = self._output("crc32.pkl")
+        train(self.input, output, epochs=1, chunk_size=1000, workers=2, hash_scheme='crc32')
+        self.assertEqual(feature_engineering.get_hash_scheme(), 'md5')
+        
+        with open(output, 'rb') as f:
+            bundle = pickle.load(f)
+        self.assertEqual(bundle['hash_scheme'], 'crc32')
+        with self.assertRaises(ValueError):
+            FlightDelayModel(output)
+        
+        feature_engineering.set_hash_scheme('crc32')
+        try:
+            model = FlightDelayModel(output)
+            self.assertEqual(model.hash_scheme, 'crc32')
+        finally:
+            feature_engineering.set_hash_scheme('md5')
+    
+    def test_rejects_unlabeled_input(self):
+        """An input without any delay values should raise ValueError."""
+        path = self._output("unlabeled.csv")
+        self.frame.assign(ARR_DELAY=np.nan).to_csv(path, index=False)
+        with self.assertRaises(ValueError):
+            train(path, self._output("never.pkl"))
+        self.assertFalse(os.path.exists(self._output("never.pkl")))
+    
+    def test_cli(self):
+        """The CLI should write the bundle."""
+        output = self._output("cli.pkl")
+        self.assertEqual(main([self.input, output, '--epochs', '1', '--chunk-size', '1000', '--quiet']), 0)
+        self.assertTrue(FlightDelayModel(output).loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()